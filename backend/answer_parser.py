@@ -0,0 +1,249 @@
+"""
+Structured parsing of AI answers for brand mentions.
+
+The scraper flattens an answer into markdown-like text: "## " headings, "- "
+list items and "a | b | c" table rows (see the scraper's
+_extract_response_text); seeded and historical answers also use numbered
+lists and "**Title:**" headings. parse_answer() splits a response into those
+segments once, and analyze_answer() scans the answer with a single regex
+covering every brand variation, placing each mention in its segment, and
+yields per brand:
+
+- rank: 1 = first brand in the answer. Lists and tables are where answers
+  rank platforms, so brands are ordered by the first list item / table row
+  they lead (are the first brand of), then by the first one they appear in,
+  and only then by their first mention in prose
+- section: heading above the mention that decided the rank
+- count: total number of mentions
+- context: text around the mention that decided the rank
+"""
+
+import hashlib
+import json
+import re
+from bisect import bisect_right
+from collections.abc import Iterable, Mapping
+from typing import NamedTuple
+
+from sentiment import get_scorer, score_brand_sentiment
+
+# Characters kept on each side of the first mention for its context excerpt
+CONTEXT_RADIUS = 80
+
+# Segment kinds
+HEADING = "heading"
+LIST_ITEM = "list_item"
+TABLE_ROW = "table_row"
+PARAGRAPH = "paragraph"
+
+STRUCTURED_KINDS = (LIST_ITEM, TABLE_ROW)
+
+_HEADING_RE = re.compile(r"^\s{0,3}#{1,6}\s+(.+?)\s*#*\s*$")
+_BOLD_HEADING_RE = re.compile(r"^\s*\*\*([^*]+?):?\*\*:?\s*$")
+_LIST_ITEM_RE = re.compile(r"^\s*(?:[-*•+]|\d{1,3}[.)])\s+(.+)$")
+_TABLE_SEPARATOR_RE = re.compile(r"^[\s|:\-]+$")
+
+
+class Segment(NamedTuple):
+    kind: str
+    start: int  # Span in the answer text (after any list marker; continuation lines included)
+    end: int
+    section: str | None  # Text of the nearest heading above (None before the first heading)
+
+
+class BrandStats(NamedTuple):
+    brand_id: str
+    rank: int
+    section: str | None
+    count: int
+    context: str
+
+
+def _is_table_row(line: str) -> bool:
+    if "|" not in line or _TABLE_SEPARATOR_RE.match(line):
+        return False
+    return sum(1 for cell in line.strip("|").split("|") if cell.strip()) >= 2
+
+
+def parse_answer(text: str) -> list[Segment]:
+    """Split an answer into headings, list items, table rows and paragraphs, in reading order"""
+    segments: list[Segment] = []
+    section = None
+    # List item or paragraph still open: following lines continue it until a blank line
+    open_kind = None
+    open_start = open_end = 0
+
+    def close():
+        nonlocal open_kind
+        if open_kind:
+            segments.append(Segment(open_kind, open_start, open_end, section))
+        open_kind = None
+
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        line_start, offset = offset, offset + len(line)
+        stripped = line.strip()
+        if not stripped:
+            close()
+            continue
+        line_end = line_start + len(line.rstrip())
+        first = stripped[0]
+
+        heading = (
+            (_HEADING_RE.match(line) if first == "#" else None)
+            or (_BOLD_HEADING_RE.match(line) if first == "*" else None)
+        )
+        if heading:
+            close()
+            section = heading.group(1).strip()
+            segments.append(Segment(HEADING, line_start, line_end, section))
+            continue
+
+        item = _LIST_ITEM_RE.match(line) if first in "-*•+" or first.isdigit() else None
+        if item:
+            close()
+            open_kind, open_start, open_end = LIST_ITEM, line_start + item.start(1), line_end
+            continue
+
+        if "|" in stripped:
+            if _TABLE_SEPARATOR_RE.match(stripped):
+                continue
+            if _is_table_row(stripped):
+                close()
+                segments.append(Segment(TABLE_ROW, line_start, line_end, section))
+                continue
+
+        if open_kind is None:
+            open_kind, open_start = PARAGRAPH, line_start
+        open_end = line_end
+
+    close()
+    return segments
+
+
+def brand_variations(brands) -> dict[str, list[str]]:
+    """Search terms of each Brand row: its comma-separated variations, or its name"""
+    return {
+        brand.id: [v.strip() for v in (brand.variations.split(",") if brand.variations else [brand.name])]
+        for brand in brands
+    }
+
+
+def matcher_version(variations_by_brand: Mapping[str, Iterable[str]]) -> str:
+    """
+    Fingerprint of everything parsed mentions depend on: the brands, their
+    variations and the sentiment lexicon. Stored on each prompt
+    (Prompt.matcher_version) so mentions parsed by another matcher are detectable.
+    """
+    payload = {
+        "brands": {brand_id: sorted(variations) for brand_id, variations in variations_by_brand.items()},
+        "lexicon": get_scorer().lexicon,
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:12]
+
+
+class BrandMatcher:
+    """One case-insensitive regex over the variations of every brand (longest variation wins)"""
+
+    def __init__(self, variations_by_brand: Mapping[str, Iterable[str]]):
+        variations_by_brand = {brand_id: list(variations) for brand_id, variations in variations_by_brand.items()}
+        self.brand_ids = list(variations_by_brand)
+        self.version = matcher_version(variations_by_brand)
+        self._brand_by_variation: dict[str, str] = {}
+        for brand_id, variations in variations_by_brand.items():
+            for variation in variations:
+                key = " ".join(variation.lower().split())
+                if key:
+                    self._brand_by_variation.setdefault(key, brand_id)
+
+        alternatives = sorted(self._brand_by_variation, key=len, reverse=True)
+        pattern = "|".join(r"\s+".join(re.escape(word) for word in v.split()) for v in alternatives)
+        # The leading character class lets the regex skip most positions without trying every alternative
+        first_chars = "".join(sorted({re.escape(v[0]) for v in alternatives}))
+        self._regex = re.compile(
+            rf"(?=[{first_chars}])(?<!\w)(?:{pattern})(?!\w)", re.IGNORECASE
+        ) if alternatives else None
+
+    @classmethod
+    def from_brands(cls, brands) -> "BrandMatcher":
+        """Matcher for Brand rows, using their comma-separated variations (or the name)"""
+        return cls(brand_variations(brands))
+
+    def finditer(self, text: str) -> Iterable[tuple[str, re.Match]]:
+        """(brand id, match) for every mention in a text"""
+        if self._regex is None:
+            return
+        for match in self._regex.finditer(text):
+            yield self._brand_by_variation[" ".join(match.group(0).lower().split())], match
+
+
+def _context(text: str, segment: Segment, match: re.Match) -> str:
+    start = max(segment.start, match.start() - CONTEXT_RADIUS)
+    end = min(segment.end, match.end() + CONTEXT_RADIUS)
+    return " ".join(text[start:end].split())
+
+
+def analyze_answer(text: str | None, matcher: BrandMatcher,
+                   mentions: Iterable[tuple[str, re.Match]] | None = None) -> dict[str, BrandStats]:
+    """
+    Rank, section, mention count and context of every brand mentioned in an answer.
+
+    mentions: matcher.finditer(text) results, when the caller already has them
+    """
+    if not text:
+        return {}
+    if mentions is None:
+        mentions = matcher.finditer(text)
+
+    segments = parse_answer(text)
+    starts = [segment.start for segment in segments]
+
+    # Rank tiers: leads a list item / table row, appears in one, appears in prose only
+    counts: dict[str, int] = {}
+    best: dict[str, tuple[tuple[int, int], Segment, re.Match]] = {}  # brand id -> (rank key, segment, match)
+    leaders: dict[int, str] = {}  # Segment index -> first brand mentioned in it
+    for brand_id, match in mentions:
+        index = bisect_right(starts, match.start()) - 1
+        if index < 0 or match.start() >= segments[index].end:
+            continue  # Outside any segment (e.g. a table separator line)
+        segment = segments[index]
+        counts[brand_id] = counts.get(brand_id, 0) + 1
+        leader = leaders.setdefault(index, brand_id)
+        if segment.kind in STRUCTURED_KINDS:
+            tier = 0 if brand_id == leader else 1
+        else:
+            tier = 2
+        key = (tier, match.start())
+        if brand_id not in best or key < best[brand_id][0]:
+            best[brand_id] = (key, segment, match)
+
+    ordered = sorted(best.items(), key=lambda item: item[1][0])
+    return {
+        brand_id: BrandStats(brand_id, rank, segment.section, counts[brand_id], _context(text, segment, match))
+        for rank, (brand_id, (_, segment, match)) in enumerate(ordered, 1)
+    }
+
+
+def brand_mention_rows(text: str | None, matcher: BrandMatcher) -> list[dict]:
+    """
+    Mention dicts (as accepted by ingest_prompt) for every brand of the matcher,
+    mentioned or not, with the sentiment of mentioned brands (see sentiment.py).
+    """
+    mentions = list(matcher.finditer(text)) if text else []
+    stats = analyze_answer(text, matcher, mentions)
+    sentiments = score_brand_sentiment(text, ((brand_id, match.start()) for brand_id, match in mentions))
+    rows = []
+    for brand_id in matcher.brand_ids:
+        brand_stats = stats.get(brand_id)
+        sentiment = sentiments.get(brand_id) if brand_stats else None
+        rows.append({
+            "brand_id": brand_id,
+            "mentioned": brand_stats is not None,
+            "position": brand_stats.rank if brand_stats else None,
+            "section": brand_stats.section if brand_stats else None,
+            "mention_count": brand_stats.count if brand_stats else 0,
+            "context": brand_stats.context if brand_stats else None,
+            "sentiment": sentiment.label if sentiment else None,
+            "sentiment_score": sentiment.score if sentiment else None,
+        })
+    return rows
@@ -0,0 +1,204 @@
+"""
+Rule-driven source type classification.
+
+Sources are classified once at ingest and the result is stored on
+Source.source_type. Rules are grouped by type in priority order (the first
+group with a match wins) and support three kinds of patterns:
+
+- path:    substring of the lowercased URL path (e.g. "/blog/")
+- suffix:  registrable domain suffix, matched label by label (e.g. "medium.com")
+- keyword: substring anywhere in the domain (e.g. "shopify")
+
+The default rules can be replaced with a JSON file (same structure as
+DEFAULT_RULES) pointed to by SOURCE_TYPE_RULES_FILE. After changing rules,
+run scripts/reclassify_sources.py to update stored classifications.
+"""
+
+import hashlib
+import json
+import os
+from functools import lru_cache
+from urllib.parse import urlparse
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from models import Source
+
+DEFAULT_TYPE = "other"
+
+DEFAULT_RULES = [
+    {"type": "blog", "path": ["/blog/"]},
+    {"type": "brand", "keyword": ["shopify", "wix", "woocommerce", "bigcommerce", "squarespace", "wordpress"]},
+    {"type": "community", "keyword": ["reddit", "quora", "stackexchange", "stackoverflow", "discourse"]},
+    {
+        "type": "news",
+        "keyword": ["forbes", "techcrunch", "entrepreneur", "businessinsider", "cnet", "zdnet", "pcmag", "theverge"],
+        "suffix": ["inc.com"],
+    },
+    {"type": "blog", "keyword": ["blog", "hashnode", "substack"], "suffix": ["medium.com", "dev.to"]},
+    {"type": "review", "keyword": ["capterra", "trustpilot", "trustradius", "getapp"], "suffix": ["g2.com"]},
+]
+
+
+class _SuffixTrie:
+    """Trie over reversed domain labels (com -> reddit -> ...) for suffix rules"""
+
+    def __init__(self):
+        self._root: dict = {}
+
+    def add(self, suffix: str, priority: int) -> None:
+        node = self._root
+        for label in reversed(suffix.lower().strip(".").split(".")):
+            node = node.setdefault(label, {})
+        node[None] = min(priority, node.get(None, priority))
+
+    def best(self, domain: str) -> int | None:
+        """Lowest priority among all rules whose suffix matches the domain"""
+        best = None
+        node = self._root
+        for label in reversed(domain.split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            if None in node and (best is None or node[None] < best):
+                best = node[None]
+        return best
+
+
+class _KeywordTrie:
+    """Character trie for substring rules, walked from every offset of the input"""
+
+    def __init__(self):
+        self._root: dict = {}
+
+    def add(self, keyword: str, priority: int) -> None:
+        node = self._root
+        for char in keyword.lower():
+            node = node.setdefault(char, {})
+        node[None] = min(priority, node.get(None, priority))
+
+    def best(self, text: str) -> int | None:
+        """Lowest priority among all keywords occurring anywhere in text"""
+        best = None
+        for start in range(len(text)):
+            node = self._root
+            for char in text[start:]:
+                node = node.get(char)
+                if node is None:
+                    break
+                if None in node and (best is None or node[None] < best):
+                    best = node[None]
+            if best == 0:
+                break
+        return best
+
+
+class SourceClassifier:
+    """Compiled rule set; classify() is pure and per-domain results are memoised"""
+
+    def __init__(self, rules: list[dict]):
+        self.rules = rules
+        self.version = hashlib.sha1(json.dumps(rules, sort_keys=True).encode()).hexdigest()[:12]
+        self._types = [rule["type"] for rule in rules]
+        self._paths: list[tuple[int, str]] = []
+        self._suffixes = _SuffixTrie()
+        self._keywords = _KeywordTrie()
+        self._domain_cache: dict[str, str] = {}
+
+        for priority, rule in enumerate(rules):
+            for path in rule.get("path", []):
+                self._paths.append((priority, path.lower()))
+            for suffix in rule.get("suffix", []):
+                self._suffixes.add(suffix, priority)
+            for keyword in rule.get("keyword", []):
+                self._keywords.add(keyword, priority)
+
+    def _domain_priority(self, domain: str) -> int | None:
+        candidates = [p for p in (self._suffixes.best(domain), self._keywords.best(domain)) if p is not None]
+        return min(candidates) if candidates else None
+
+    def classify_domain(self, domain: str) -> str:
+        """Classify by domain only (used for per-domain breakdowns)"""
+        domain = domain.lower()
+        cached = self._domain_cache.get(domain)
+        if cached is None:
+            priority = self._domain_priority(domain)
+            cached = self._types[priority] if priority is not None else DEFAULT_TYPE
+            self._domain_cache[domain] = cached
+        return cached
+
+    def classify(self, domain: str, url: str | None = None) -> str:
+        """Classify a source using its URL path and domain"""
+        domain = domain.lower()
+        priority = self._domain_priority(domain)
+
+        if url and self._paths:
+            path = urlparse(url).path.lower()
+            for path_priority, pattern in self._paths:
+                if priority is not None and path_priority >= priority:
+                    break
+                if pattern in path:
+                    priority = path_priority
+                    break
+
+        return self._types[priority] if priority is not None else DEFAULT_TYPE
+
+
+def load_rules() -> list[dict]:
+    """Load rules from SOURCE_TYPE_RULES_FILE if set, else the built-in defaults"""
+    rules_file = os.getenv("SOURCE_TYPE_RULES_FILE")
+    if rules_file:
+        with open(rules_file, encoding="utf-8") as f:
+            return json.load(f)
+    return DEFAULT_RULES
+
+
+@lru_cache(maxsize=1)
+def get_classifier() -> SourceClassifier:
+    """Process-wide classifier compiled from the configured rules"""
+    return SourceClassifier(load_rules())
+
+
+def classify_source(domain: str, url: str | None = None) -> str:
+    """Classify a source with the configured rules"""
+    return get_classifier().classify(domain, url)
+
+
+def reclassify_sources(session: Session, only_missing: bool = False, batch_size: int = 1000) -> tuple[int, int]:
+    """
+    Recompute stored source types in id-ordered batches, committing per batch.
+
+    Only rows whose classification actually changes are written. With
+    only_missing, rows that already have a type are skipped (used at startup
+    to backfill databases created before classification was stored).
+
+    Returns (rows scanned, rows updated).
+    """
+    classifier = get_classifier()
+    scanned = updated = 0
+    last_id = 0
+
+    while True:
+        stmt = select(Source.id, Source.domain, Source.url, Source.source_type).where(Source.id > last_id)
+        if only_missing:
+            stmt = stmt.where(Source.source_type.is_(None))
+        rows = session.exec(stmt.order_by(Source.id).limit(batch_size)).all()
+        if not rows:
+            break
+
+        changes = []
+        for source_id, domain, url, current in rows:
+            new_type = classifier.classify(domain, url)
+            if new_type != current:
+                changes.append({"id": source_id, "source_type": new_type})
+
+        if changes:
+            session.execute(update(Source), changes)
+            session.commit()
+
+        scanned += len(rows)
+        updated += len(changes)
+        last_id = rows[-1][0]
+
+    return scanned, updated
@@ -1,7 +1,9 @@
 import os
-from sqlmodel import SQLModel, Session, create_engine
 from pathlib import Path
 
+from sqlalchemy import inspect, text
+from sqlmodel import Session, SQLModel, create_engine
+
 # Support both SQLite (local dev) and PostgreSQL (production)
 DATABASE_URL = os.getenv("DATABASE_URL")
 
@@ -20,9 +22,60 @@ else:
     engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 
 
-def create_db_and_tables():
-    """Create all tables in the database"""
+def create_db_and_tables(allow_inline_responses: bool = False):
+    """
+    Create all tables (and the full-text search index) in the database.
+
+    Databases from before response blobs keep text in prompt.response_text,
+    which is never read; moving it drops the column, so that only happens when
+    migrate_response_blobs.py is run (the only caller allowing such a database).
+    """
+    from responses import has_inline_responses
+    from search import ensure_search_index
+
     SQLModel.metadata.create_all(engine)
+    add_missing_columns()
+    ensure_search_index(engine)
+    if not allow_inline_responses and has_inline_responses(engine):
+        raise RuntimeError(
+            "Response text is still in prompt.response_text, which this version does not read; "
+            "back up the database and run scripts/migrate_response_blobs.py"
+        )
+
+
+def add_missing_columns():
+    """
+    Add columns (and their indexes) that were added to models after the table was created.
+
+    create_all() never alters existing tables, so databases created by an older
+    version would otherwise fail on new nullable columns.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                ddl = f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {col_type}'
+                # Scalar model defaults become column defaults so existing rows get a value
+                if column.default is not None and column.default.is_scalar:
+                    ddl += f" DEFAULT {_sql_literal(column.default.arg)}"
+                conn.execute(text(ddl))
+            for index in sorted(table.indexes, key=lambda i: i.name):
+                index.create(conn, checkfirst=True)
+
+
+def _sql_literal(value) -> str:
+    """Render a simple Python default as a SQL literal"""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
 
 
 def get_session():
@@ -0,0 +1,171 @@
+"""
+Ingest path for scraped prompts.
+
+Every new prompt (seed data, imported scrape results) goes through
+ingest_prompt(), which stores the prompt, its brand mentions and cited
+sources, and keeps derived data (response blobs, source types, suggestion
+signals) current.
+"""
+
+from datetime import datetime
+from urllib.parse import urlparse
+
+from sqlmodel import Session, func, select
+
+import signals
+from answer_parser import BrandMatcher, brand_mention_rows
+from classification import classify_source
+from models import DEFAULT_PROJECT_ID, Brand, Prompt, PromptBrandMention, PromptSource, Source
+from responses import store_response
+
+
+def get_or_create_source(session: Session, url: str, domain: str, title: str | None = None,
+                         description: str | None = None, published_date: str | None = None) -> tuple[Source, bool]:
+    """Get existing source by URL or create (and classify) a new one. Returns (source, created)"""
+    existing = session.exec(select(Source).where(Source.url == url)).first()
+    if existing:
+        return existing, False
+
+    source = Source(
+        url=url,
+        domain=domain,
+        title=title,
+        description=description,
+        published_date=published_date,
+        source_type=classify_source(domain, url),
+    )
+    session.add(source)
+    session.flush()
+    return source, True
+
+
+def _cited_in_project(session: Session, project_id: str, source_id: int) -> bool:
+    return session.exec(
+        select(PromptSource.id)
+        .where(PromptSource.project_id == project_id, PromptSource.source_id == source_id)
+        .limit(1)
+    ).first() is not None
+
+
+def ingest_prompt(
+    session: Session,
+    query: str,
+    response_text: str | None,
+    sources: list[dict],
+    brand_mentions: list[dict] | None = None,
+    run_number: int = 1,
+    scraped_at: datetime | None = None,
+    project_id: str = DEFAULT_PROJECT_ID,
+) -> Prompt:
+    """
+    Store one scraped run for a project with its mentions and sources, then commit.
+
+    sources: dicts with url, domain and optional title/description/published_date,
+             in citation order
+    brand_mentions: dicts with brand_id, mentioned and optional position/sentiment/
+                    sentiment_score/context/section/mention_count; None to parse them
+                    from the response text for the project's brands
+    """
+    matcher_version = None
+    if brand_mentions is None:
+        brands = session.exec(select(Brand).where(Brand.project_id == project_id)).all()
+        matcher = BrandMatcher.from_brands(brands)
+        brand_mentions = brand_mention_rows(response_text, matcher)
+        matcher_version = matcher.version
+
+    prompt = Prompt(
+        project_id=project_id,
+        query=query,
+        run_number=run_number,
+        response_hash=store_response(session, response_text),
+        scraped_at=scraped_at or datetime.utcnow(),
+        matcher_version=matcher_version,
+    )
+    session.add(prompt)
+    session.flush()
+
+    mentioned_brand_ids = set()
+    for mention in brand_mentions:
+        session.add(PromptBrandMention(
+            prompt_id=prompt.id,
+            brand_id=mention["brand_id"],
+            project_id=project_id,
+            mentioned=mention["mentioned"],
+            position=mention.get("position"),
+            sentiment=mention.get("sentiment"),
+            sentiment_score=mention.get("sentiment_score"),
+            context=mention.get("context"),
+            section=mention.get("section"),
+            mention_count=mention.get("mention_count"),
+        ))
+        if mention["mentioned"]:
+            mentioned_brand_ids.add(mention["brand_id"])
+
+    already_cited = set()
+    cited_sources = []
+    new_sources = []
+    for idx, source_data in enumerate(sources, start=1):
+        source, created = get_or_create_source(
+            session,
+            url=source_data["url"],
+            domain=source_data["domain"],
+            title=source_data.get("title"),
+            description=source_data.get("description"),
+            published_date=source_data.get("published_date"),
+        )
+        if (
+            source.id not in already_cited
+            and (created or not _cited_in_project(session, project_id, source.id))
+        ):
+            new_sources.append(source)
+        already_cited.add(source.id)
+        session.add(PromptSource(
+            prompt_id=prompt.id,
+            source_id=source.id,
+            project_id=project_id,
+            citation_order=idx,
+        ))
+        cited_sources.append(source)
+
+    signals.record_prompt(session, prompt, mentioned_brand_ids, cited_sources, new_sources)
+
+    session.commit()
+    session.refresh(prompt)
+    return prompt
+
+
+def source_domain(url: str) -> str:
+    """Domain a cited URL is grouped under (host without "www.")"""
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def ingest_scrape_result(session: Session, result: dict, project_id: str = DEFAULT_PROJECT_ID) -> Prompt:
+    """
+    Store a scraper result (ScrapeResult as a dict) as the query's next run,
+    parsing mentions for the project's brands.
+    """
+    last_run = session.exec(
+        select(func.max(Prompt.run_number))
+        .where(Prompt.project_id == project_id, Prompt.query == result["query"])
+    ).one()
+    scraped_at = result.get("timestamp")
+    return ingest_prompt(
+        session,
+        query=result["query"],
+        response_text=result.get("response_text"),
+        sources=[
+            {
+                "url": source["url"],
+                "domain": source_domain(source["url"]),
+                "title": source.get("title"),
+                "description": source.get("description"),
+                "published_date": source.get("date"),
+            }
+            for source in result.get("sources", [])
+        ],
+        run_number=(last_run or 0) + 1,
+        # Stored timestamps are naive UTC
+        scraped_at=datetime.fromisoformat(scraped_at).replace(tzinfo=None) if scraped_at else None,
+        project_id=project_id,
+    )
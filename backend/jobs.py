@@ -0,0 +1,376 @@
+"""
+Durable job queue for work that should not run inside an API request.
+
+Jobs are rows of the job table (models.Job), so they survive restarts and
+any number of workers, on any number of machines sharing the database, can
+take them:
+
+- enqueue() adds a job: a handler kind, its JSON payload and a priority.
+  With a key, nothing is added while an unfinished job with the same key
+  exists.
+- claim() leases the next runnable job (queued, run_after passed; highest
+  priority first, then oldest) to one worker for LEASE_SECONDS. It is a
+  single UPDATE of the row picked by a subquery; on PostgreSQL the subquery
+  locks it FOR UPDATE SKIP LOCKED, so concurrent workers pass over each
+  other's rows instead of waiting, and on SQLite the statement holds the
+  database's write lock.
+- While a handler runs, its worker renews the lease every LEASE_SECONDS / 3.
+  A worker that dies stops renewing; requeue_expired() then returns the job
+  to the queue, or fails it once max_attempts are used.
+- A handler that raises is retried after RETRY_DELAY_SECONDS * 2 ** (attempts - 1)
+  until max_attempts, then the job is failed with the error.
+
+Handlers are registered by kind in HANDLERS and called with the payload's
+keys as arguments. worker.py runs workers as separate processes; the API
+runs JOB_WORKERS worker threads of its own for MAINTENANCE_KINDS (set it to
+0 when dedicated workers take those too). Mention re-syncs parse on a
+process pool, so only worker.py runs them.
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+from collections.abc import Callable, Iterable
+from contextlib import contextmanager
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from database import engine
+from models import DEFAULT_PROJECT_ID, Job
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+UNFINISHED = (QUEUED, RUNNING)
+
+LEASE_SECONDS = 300
+RETRY_DELAY_SECONDS = 30
+POLL_SECONDS = 2.0
+
+# Brand adds and edits run before scrapes and re-syncs: a user is waiting for them
+PRIORITY_BRAND = 10
+
+# Error messages are cut to this many characters
+ERROR_LIMIT = 2000
+
+# Kinds the API's worker threads run: quick database work (scrapes need a browser, scheduling the
+# scraper settings and re-syncs a process pool, so they run in worker.py)
+MAINTENANCE_KINDS = ("rescan_brand", "rematch")
+
+# Repository root, for the scraper package in src/
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+class RequeueError(Exception):
+    """Raised by a handler to put its job back in the queue, without using up an attempt, for another worker"""
+
+
+def enqueue(session: Session, kind: str, payload: dict | None = None, priority: int = 0,
+            key: str | None = None, max_attempts: int = 3, run_after: datetime | None = None) -> Job:
+    """Add a job and commit (or return the unfinished job with the same key)"""
+    existing = unfinished_job(session, key) if key else None
+    if existing:
+        return existing
+
+    job = Job(
+        kind=kind,
+        payload=json.dumps(payload or {}),
+        key=key,
+        priority=priority,
+        max_attempts=max_attempts,
+        run_after=run_after or datetime.utcnow(),
+    )
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    return job
+
+
+def unfinished_job(session: Session, key: str) -> Job | None:
+    return session.exec(select(Job).where(Job.key == key, Job.status.in_(UNFINISHED))).first()
+
+
+def claim(session: Session, worker_id: str, kinds: Iterable[str] | None = None) -> Job | None:
+    """Lease the next runnable job to worker_id (None when there is none)"""
+    now = datetime.utcnow()
+    next_job = (
+        select(Job.id)
+        .where(Job.status == QUEUED, Job.run_after <= now)
+        .order_by(Job.priority.desc(), Job.id)
+        .limit(1)
+        # Rendered on PostgreSQL only; SQLite has no row locks
+        .with_for_update(skip_locked=True)
+    )
+    if kinds is not None:
+        next_job = next_job.where(Job.kind.in_(list(kinds)))
+
+    job_id = session.execute(
+        update(Job)
+        .where(Job.id == next_job.scalar_subquery(), Job.status == QUEUED)
+        .values(
+            status=RUNNING,
+            attempts=Job.attempts + 1,
+            lease_owner=worker_id,
+            lease_expires_at=now + timedelta(seconds=LEASE_SECONDS),
+            started_at=now,
+        )
+        .returning(Job.id)
+    ).scalar()
+    session.commit()
+    return session.get(Job, job_id) if job_id else None
+
+
+def renew_lease(session: Session, job_id: int, worker_id: str) -> bool:
+    """Extend a running job's lease; False if the worker no longer holds it"""
+    renewed = session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == RUNNING, Job.lease_owner == worker_id)
+        .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=LEASE_SECONDS))
+    ).rowcount
+    session.commit()
+    return bool(renewed)
+
+
+def complete(session: Session, job: Job, worker_id: str) -> None:
+    session.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.status == RUNNING, Job.lease_owner == worker_id)
+        .values(status=DONE, error=None, lease_owner=None, lease_expires_at=None, finished_at=datetime.utcnow())
+    )
+    session.commit()
+
+
+def fail(session: Session, job: Job, worker_id: str, error: str, retry: bool = True) -> None:
+    """Queue a failed job again after a back-off, or fail it for good once its attempts are used"""
+    values = {"error": error[-ERROR_LIMIT:], "lease_owner": None, "lease_expires_at": None}
+    if retry and job.attempts < job.max_attempts:
+        values.update(
+            status=QUEUED,
+            run_after=datetime.utcnow() + timedelta(seconds=RETRY_DELAY_SECONDS * 2 ** (job.attempts - 1)),
+        )
+    else:
+        values.update(status=FAILED, finished_at=datetime.utcnow())
+    session.execute(
+        update(Job).where(Job.id == job.id, Job.status == RUNNING, Job.lease_owner == worker_id).values(**values)
+    )
+    session.commit()
+
+
+def requeue(session: Session, job: Job, worker_id: str, reason: str) -> None:
+    """Return a running job to the queue as if it had not been claimed"""
+    session.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.status == RUNNING, Job.lease_owner == worker_id)
+        .values(
+            status=QUEUED, attempts=Job.attempts - 1, run_after=datetime.utcnow(), error=reason[-ERROR_LIMIT:],
+            lease_owner=None, lease_expires_at=None,
+        )
+    )
+    session.commit()
+
+
+def requeue_expired(session: Session) -> int:
+    """Queue again (or fail, when out of attempts) jobs whose worker stopped renewing the lease"""
+    now = datetime.utcnow()
+    expired = (Job.status == RUNNING, Job.lease_expires_at < now)
+    requeued = session.execute(
+        update(Job)
+        .where(*expired, Job.attempts < Job.max_attempts)
+        .values(status=QUEUED, run_after=now, lease_owner=None, lease_expires_at=None, error="Lease expired")
+    ).rowcount
+    session.execute(
+        update(Job)
+        .where(*expired)
+        .values(status=FAILED, lease_owner=None, lease_expires_at=None, error="Lease expired", finished_at=now)
+    )
+    session.commit()
+    return requeued
+
+
+# --- Handlers ---
+
+def use_scraper_package() -> None:
+    """Make the scraper package (src/) importable"""
+    if str(ROOT_DIR / "src") not in sys.path:
+        sys.path.insert(0, str(ROOT_DIR / "src"))
+
+
+def _scrape(query: str, project_id: str = DEFAULT_PROJECT_ID, headless: bool = True,
+            take_screenshot: bool = False) -> None:
+    """
+    Scrape a query in Google AI Mode with this worker's browser session and
+    ingest the result as the query's next run. On a CAPTCHA the session is
+    quarantined and the job handed to another one (see scraper_sessions.py).
+    """
+    import scraper_sessions
+    from ingest import ingest_scrape_result
+
+    use_scraper_package()
+    from utils.exceptions import CaptchaError
+
+    scraper = scraper_sessions.get_scraper(headless)
+    recycles = scraper.browser_metrics()["recycles"]
+    try:
+        result = scraper.scrape(query, take_screenshot=take_screenshot)
+    except CaptchaError as exc:
+        row = scraper_sessions.record_scrape(captcha=True, recycled=scraper.browser_metrics()["recycles"] > recycles)
+        raise RequeueError(
+            f"{exc}; session {row.id} quarantined until {row.quarantined_until:%Y-%m-%d %H:%M:%S} "
+            f"({row.captchas}/{row.scrapes} scrapes hit a CAPTCHA)"
+        )
+    scraper_sessions.record_scrape(recycled=scraper.browser_metrics()["recycles"] > recycles)
+    if not result.success:
+        # The browser may be what failed: the next scrape starts a new one
+        scraper_sessions.close_scraper()
+        raise RuntimeError(f"Scrape failed: {result.error}")
+    with Session(engine) as session:
+        ingest_scrape_result(session, asdict(result), project_id)
+
+
+def _schedule_scrapes(project_id: str = DEFAULT_PROJECT_ID, runs_per_month: int = 2, headless: bool = True) -> None:
+    """Queue the project's missing scrapes for this month, then the next scheduling pass"""
+    from scheduler import SCHEDULE_INTERVAL, delay_bounds, schedule_recurring, schedule_scrapes
+
+    min_delay, max_delay = delay_bounds()
+    with Session(engine) as session:
+        result = schedule_scrapes(session, project_id, runs_per_month, min_delay, max_delay, headless=headless)
+        print(f"Scheduled {len(result.queued)} new scrape(s) for project '{project_id}', "
+              f"moved {result.moved}, cancelled {result.cancelled}")
+        schedule_recurring(session, project_id, runs_per_month, headless, datetime.utcnow() + SCHEDULE_INTERVAL)
+
+
+def _rescan_brand(project_id: str, brand_id: str, previous_version: str | None) -> None:
+    from mention_sync import rescan_brand
+
+    with Session(engine) as session:
+        rescan_brand(session, project_id, brand_id, previous_version)
+
+
+def _rematch(rematch_id: int) -> None:
+    from rematch import run_rematch
+
+    run_rematch(rematch_id)
+
+
+def _resync_mentions(project_id: str = DEFAULT_PROJECT_ID, workers: int | None = 1, restart: bool = False,
+                     only_stale: bool = False) -> None:
+    from mention_sync import resync_mentions
+
+    # A retried job resumes from the checkpoints of the interrupted attempt
+    resync_mentions(project_id, workers, restart, only_stale)
+
+
+HANDLERS: dict[str, Callable[..., None]] = {
+    "scrape": _scrape,
+    "schedule_scrapes": _schedule_scrapes,
+    "rescan_brand": _rescan_brand,
+    "rematch": _rematch,
+    "resync_mentions": _resync_mentions,
+}
+
+
+# --- Workers ---
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+@contextmanager
+def _lease_kept(job_id: int, worker_id: str):
+    """Renew the job's lease in a background thread while the block runs"""
+    stopped = threading.Event()
+
+    def renew():
+        with Session(engine) as session:
+            while not stopped.wait(LEASE_SECONDS / 3):
+                if not renew_lease(session, job_id, worker_id):
+                    print(f"[{worker_id}] Lost the lease of job {job_id}")
+                    return
+
+    thread = threading.Thread(target=renew, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def run_job(session: Session, job: Job, worker_id: str) -> bool:
+    """Run a claimed job's handler and record the outcome; True if it succeeded"""
+    handler = HANDLERS.get(job.kind)
+    if handler is None:
+        fail(session, job, worker_id, f"Unknown job kind '{job.kind}'", retry=False)
+        return False
+
+    print(f"[{worker_id}] Job {job.id} ({job.kind}), attempt {job.attempts}/{job.max_attempts}")
+    started = time.perf_counter()
+    try:
+        with _lease_kept(job.id, worker_id):
+            handler(**json.loads(job.payload))
+    except RequeueError as exc:
+        requeue(session, job, worker_id, str(exc))
+        print(f"[{worker_id}] Job {job.id} requeued: {exc}")
+        return False
+    except Exception:
+        error = traceback.format_exc()
+        fail(session, job, worker_id, error)
+        print(f"[{worker_id}] Job {job.id} failed:\n{error}")
+        return False
+    complete(session, job, worker_id)
+    print(f"[{worker_id}] Job {job.id} done in {time.perf_counter() - started:.1f}s")
+    return True
+
+
+def _paused(kind: str) -> bool:
+    """Whether this worker should not take jobs of a kind for now"""
+    if kind == "scrape":
+        import scraper_sessions
+
+        return scraper_sessions.quarantined()
+    return False
+
+
+def work(kinds: Iterable[str] | None = None, stop: threading.Event | None = None, burst: bool = False,
+         worker_id: str | None = None) -> int:
+    """
+    Claim and run jobs (of the given kinds, or all) until stop is set, or
+    with burst until none is runnable. Kinds this worker cannot run for now
+    (scrapes while its browser session is quarantined) are left to others.
+    Returns how many jobs ran.
+    """
+    worker_id = worker_id or worker_name()
+    stop = stop or threading.Event()
+    kinds = list(kinds or HANDLERS)
+    ran = 0
+    with Session(engine) as session:
+        while not stop.is_set():
+            job = claim(session, worker_id, [kind for kind in kinds if not _paused(kind)])
+            if job is None:
+                requeue_expired(session)
+                if burst:
+                    break
+                stop.wait(POLL_SECONDS)
+                continue
+            run_job(session, job, worker_id)
+            ran += 1
+    return ran
+
+
+def start_api_workers() -> threading.Event:
+    """Start the API's JOB_WORKERS (default 1) maintenance worker threads; set the event to stop them"""
+    stop = threading.Event()
+    for _ in range(int(os.getenv("JOB_WORKERS", "1"))):
+        threading.Thread(target=work, kwargs={"kinds": MAINTENANCE_KINDS, "stop": stop}, daemon=True).start()
+    return stop
@@ -1,38 +1,68 @@
 import os
-from fastapi import FastAPI, Depends, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import Session, select, func
-from datetime import datetime, timedelta
 from collections import Counter
-from itertools import groupby
+from datetime import datetime
+
+from fastapi import Depends, FastAPI, HTTPException, Query
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, func, select
 
+from answer_parser import brand_variations
+from classification import reclassify_sources
 from database import create_db_and_tables, get_session
-from models import Brand, Prompt, PromptBrandMention, Source, PromptSource
+from jobs import PRIORITY_BRAND, enqueue, start_api_workers
+from mention_sync import project_matcher, rescan_brand
+from models import DEFAULT_PROJECT_ID, Brand, Project, PromptBrandMention, PromptSource, Source
+from projects import ensure_default_project, get_project
+from prompt_index import (
+    PromptRow,
+    format_query_id,
+    group_by_query,
+    in_month,
+    load_prompt_index,
+    parse_query_id,
+)
+from rematch import fail_interrupted_rematches, latest_rematch, rematch_job_key, start_rematch
+from responses import load_responses
 from schemas import (
+    BrandCreate,
+    BrandDetailResponse,
+    BrandListResponse,
+    BrandMonthlyVisibility,
+    BrandPromptDetail,
+    BrandRematchResponse,
     BrandResponse,
-    PromptResponse,
-    PromptDetailResponse,
-    PromptBrandMentionResponse,
-    SourceResponse,
-    SourceInPromptResponse,
-    RunResponse,
+    BrandUpdate,
+    BrandUpdateResponse,
     DashboardMetricsResponse,
     MetricResponse,
-    DailyVisibilityResponse,
+    ProjectCreate,
+    ProjectResponse,
+    PromptBrandMentionResponse,
+    PromptDetailResponse,
+    PromptResponse,
+    RunResponse,
+    SearchResponse,
+    SourceInPromptResponse,
+    SourceResponse,
     SourcesAnalyticsResponse,
-    SourcesSummary,
-    DomainBreakdown,
-    SourceType,
-    TopSource,
     SuggestionsResponse,
-    Suggestion,
-    SuggestionExample,
-    BrandCreate,
-    BrandDetailResponse,
-    BrandListResponse,
-    BrandPromptDetail,
-    BrandMonthlyVisibility,
+    VisibilitySeriesResponse,
 )
+from scoring import MentionIndex, primary_brand_ids, visibility_for_position
+from search import search
+from sentiment import average_score
+from signals import rebuild_signals, signals_empty
+from similarity import (
+    backfill_signatures,
+    load_signatures,
+    near_duplicate_prompts,
+    previous_run_similarity,
+    query_drift,
+)
+from source_analytics import build_sources_analytics
+from sources import stream_sources_json
+from suggestions import build_suggestions
 
 app = FastAPI(title="AiSEO API", version="1.0.0")
 
@@ -51,11 +81,19 @@ app.add_middleware(
 def on_startup():
     create_db_and_tables()
     seed_brands()
+    backfill_derived_data()
+    app.state.stop_job_workers = start_api_workers()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    app.state.stop_job_workers.set()
 
 
 def seed_brands():
     """Seed initial brand data if not exists (handles concurrent workers)"""
     from sqlmodel import Session
+
     from database import engine
 
     brands_data = [
@@ -67,10 +105,16 @@ def seed_brands():
     ]
 
     with Session(engine) as session:
+        try:
+            ensure_default_project(session)
+        except Exception:
+            # Another worker created it first
+            session.rollback()
+
         for brand_data in brands_data:
             # Use merge to handle race condition with multiple workers
             # merge() will insert if not exists, or update if exists
-            brand = Brand(**brand_data)
+            brand = Brand(project_id=DEFAULT_PROJECT_ID, **brand_data)
             session.merge(brand)
         try:
             session.commit()
@@ -79,16 +123,26 @@ def seed_brands():
             session.rollback()
 
 
-def get_run_data(session: Session, prompt: Prompt, brands: list[Brand]) -> RunResponse:
-    """Build run response for a single prompt/run"""
-    mentions = session.exec(
-        select(PromptBrandMention).where(PromptBrandMention.prompt_id == prompt.id)
-    ).all()
+def backfill_derived_data():
+    """Backfill response signatures, source types and suggestion signals for databases created before they were stored"""
+    from database import engine
+
+    backfill_signatures(engine)
+    fail_interrupted_rematches(engine)
+    with Session(engine) as session:
+        reclassify_sources(session, only_missing=True)
+        for project_id in session.exec(select(Project.id)).all():
+            if signals_empty(session, project_id):
+                rebuild_signals(session, project_id)
+
 
-    brand_responses = []
+def brand_mention_responses(mentions: MentionIndex, prompt_id: int, brands: list[Brand]) -> list[PromptBrandMentionResponse]:
+    """Per-brand mention rows for one prompt (unmentioned brands included)"""
+    prompt_mentions = mentions.for_prompt(prompt_id)
+    responses = []
     for brand in brands:
-        mention = next((m for m in mentions if m.brand_id == brand.id), None)
-        brand_responses.append(
+        mention = prompt_mentions.get(brand.id)
+        responses.append(
             PromptBrandMentionResponse(
                 brandId=brand.id,
                 brandName=brand.name,
@@ -97,62 +151,60 @@ def get_run_data(session: Session, prompt: Prompt, brands: list[Brand]) -> RunRe
                 sentiment=mention.sentiment if mention and mention.sentiment else "neutral",
             )
         )
+    return responses
+
+
+def get_run_data(session: Session, prompt: PromptRow, brands: list[Brand], mentions: MentionIndex,
+                 primary_ids: set[str], response_text: str | None) -> RunResponse:
+    """Build run response for a single prompt/run"""
+    brand_responses = brand_mention_responses(mentions, prompt.id, brands)
 
     # Get sources
     prompt_sources = session.exec(
-        select(PromptSource).where(PromptSource.prompt_id == prompt.id)
+        select(PromptSource, Source)
+        .join(Source, Source.id == PromptSource.source_id)
+        .where(PromptSource.prompt_id == prompt.id)
+        .order_by(PromptSource.citation_order, PromptSource.id)
     ).all()
-    source_responses = []
-    for ps in prompt_sources:
-        source = session.get(Source, ps.source_id)
-        if source:
-            source_responses.append(
-                SourceInPromptResponse(
-                    domain=source.domain,
-                    url=source.url,
-                    title=source.title,
-                    description=source.description,
-                    publishedDate=source.published_date,
-                    citationOrder=ps.citation_order,
-                )
-            )
-    source_responses.sort(key=lambda x: x.citationOrder)
+    source_responses = [
+        SourceInPromptResponse(
+            domain=source.domain,
+            url=source.url,
+            title=source.title,
+            description=source.description,
+            publishedDate=source.published_date,
+            citationOrder=ps.citation_order,
+        )
+        for ps, source in prompt_sources
+    ]
 
     mentioned_brands = [b for b in brand_responses if b.mentioned]
 
-    # Calculate visibility based on Wix's position (primary brand)
-    wix_mention = next((b for b in brand_responses if b.brandId == "wix"), None)
-    if wix_mention and wix_mention.mentioned and wix_mention.position > 0:
-        # Position 1 = 100%, Position 2 = 80%, Position 3 = 60%, etc.
-        visibility = max(0, 100 - (wix_mention.position - 1) * 20)
-    else:
-        visibility = 0  # Not mentioned
-
-    # Use Wix's position (primary brand), not average of all brands
-    avg_position = wix_mention.position if wix_mention and wix_mention.mentioned else 0
+    # Visibility and position are based on the primary brand(s), not an average of all brands
+    primary_position = mentions.primary_position(prompt.id, primary_ids)
 
     return RunResponse(
         id=prompt.id,
-        runNumber=prompt.run_number if hasattr(prompt, 'run_number') else 1,
+        runNumber=prompt.run_number,
         scrapedAt=prompt.scraped_at.isoformat() if prompt.scraped_at else "",
-        visibility=visibility,
-        avgPosition=round(avg_position, 1),
+        visibility=visibility_for_position(primary_position),
+        avgPosition=round(primary_position, 1),
         totalMentions=len(mentioned_brands),
         brands=brand_responses,
-        responseText=prompt.response_text,
+        responseText=response_text,
         sources=source_responses,
     )
 
 
 @app.get("/api/brands", response_model=list[BrandResponse])
-def get_brands(session: Session = Depends(get_session)):
+def get_brands(project: Project = Depends(get_project), session: Session = Depends(get_session)):
     """Get all brands with computed metrics (January 2026 only, trend based on Jan vs Dec)"""
-    brands = session.exec(select(Brand)).all()
+    brands = session.exec(select(Brand).where(Brand.project_id == project.id)).all()
 
     # Get prompts by month
-    all_prompts = session.exec(select(Prompt)).all()
-    jan_prompts = [p for p in all_prompts if p.scraped_at and p.scraped_at.strftime("%Y-%m") == "2026-01"]
-    dec_prompts = [p for p in all_prompts if p.scraped_at and p.scraped_at.strftime("%Y-%m") == "2025-12"]
+    all_prompts = load_prompt_index(session, project.id)
+    jan_prompts = in_month(all_prompts, "2026-01")
+    dec_prompts = in_month(all_prompts, "2025-12")
 
     jan_queries = set(p.query for p in jan_prompts)
     dec_queries = set(p.query for p in dec_prompts)
@@ -165,13 +217,14 @@ def get_brands(session: Session = Depends(get_session)):
         jan_mentioned_queries = set()
         jan_positions = []
         jan_sentiments = []
+        jan_scores = []
 
         for prompt in jan_prompts:
             mention = session.exec(
                 select(PromptBrandMention).where(
                     PromptBrandMention.prompt_id == prompt.id,
                     PromptBrandMention.brand_id == brand.id,
-                    PromptBrandMention.mentioned == True,
+                    PromptBrandMention.mentioned.is_(True),
                 )
             ).first()
             if mention:
@@ -180,6 +233,7 @@ def get_brands(session: Session = Depends(get_session)):
                     jan_positions.append(mention.position)
                 if mention.sentiment:
                     jan_sentiments.append(mention.sentiment)
+                jan_scores.append(mention.sentiment_score)
 
         jan_visibility = (len(jan_mentioned_queries) / total_jan_queries * 100) if total_jan_queries > 0 else 0
         avg_position = sum(jan_positions) / len(jan_positions) if jan_positions else 0
@@ -194,7 +248,7 @@ def get_brands(session: Session = Depends(get_session)):
                 select(PromptBrandMention).where(
                     PromptBrandMention.prompt_id == prompt.id,
                     PromptBrandMention.brand_id == brand.id,
-                    PromptBrandMention.mentioned == True,
+                    PromptBrandMention.mentioned.is_(True),
                 )
             ).first()
             if mention:
@@ -219,6 +273,7 @@ def get_brands(session: Session = Depends(get_session)):
                 avgPosition=round(avg_position, 1),
                 trend=trend,
                 sentiment=most_common_sentiment,
+                sentimentScore=average_score(jan_scores),
             )
         )
 
@@ -228,10 +283,10 @@ def get_brands(session: Session = Depends(get_session)):
 
 
 @app.get("/api/brands/details", response_model=BrandListResponse)
-def get_brands_details(session: Session = Depends(get_session)):
+def get_brands_details(project: Project = Depends(get_project), session: Session = Depends(get_session)):
     """Get detailed brand analytics for brand management page"""
-    brands = session.exec(select(Brand)).all()
-    all_prompts = session.exec(select(Prompt)).all()
+    brands = session.exec(select(Brand).where(Brand.project_id == project.id)).all()
+    all_prompts = load_prompt_index(session, project.id)
 
     # Group prompts by month
     months_order = ["Sep 2025", "Oct 2025", "Nov 2025", "Dec 2025", "Jan 2026"]
@@ -245,10 +300,8 @@ def get_brands_details(session: Session = Depends(get_session)):
 
     prompts_by_month = {m: [] for m in months_order}
     for prompt in all_prompts:
-        if prompt.scraped_at:
-            month_key = prompt.scraped_at.strftime("%Y-%m")
-            if month_key in month_map:
-                prompts_by_month[month_map[month_key]].append(prompt)
+        if prompt.month in month_map:
+            prompts_by_month[month_map[prompt.month]].append(prompt)
 
     # January prompts for current stats
     jan_prompts = prompts_by_month.get("Jan 2026", [])
@@ -266,6 +319,7 @@ def get_brands_details(session: Session = Depends(get_session)):
         jan_mentioned_queries = set()
         jan_positions = []
         jan_sentiments = []
+        jan_scores = []
         top_prompts = []
 
         for prompt in jan_prompts:
@@ -273,7 +327,7 @@ def get_brands_details(session: Session = Depends(get_session)):
                 select(PromptBrandMention).where(
                     PromptBrandMention.prompt_id == prompt.id,
                     PromptBrandMention.brand_id == brand.id,
-                    PromptBrandMention.mentioned == True,
+                    PromptBrandMention.mentioned.is_(True),
                 )
             ).first()
             if mention:
@@ -282,6 +336,7 @@ def get_brands_details(session: Session = Depends(get_session)):
                     jan_positions.append(mention.position)
                 if mention.sentiment:
                     jan_sentiments.append(mention.sentiment)
+                jan_scores.append(mention.sentiment_score)
                 top_prompts.append(BrandPromptDetail(
                     query=prompt.query,
                     position=mention.position,
@@ -307,7 +362,7 @@ def get_brands_details(session: Session = Depends(get_session)):
                 select(PromptBrandMention).where(
                     PromptBrandMention.prompt_id == prompt.id,
                     PromptBrandMention.brand_id == brand.id,
-                    PromptBrandMention.mentioned == True,
+                    PromptBrandMention.mentioned.is_(True),
                 )
             ).first()
             if mention:
@@ -333,7 +388,7 @@ def get_brands_details(session: Session = Depends(get_session)):
                     select(PromptBrandMention).where(
                         PromptBrandMention.prompt_id == prompt.id,
                         PromptBrandMention.brand_id == brand.id,
-                        PromptBrandMention.mentioned == True,
+                        PromptBrandMention.mentioned.is_(True),
                     )
                 ).first()
                 if mention:
@@ -348,8 +403,9 @@ def get_brands_details(session: Session = Depends(get_session)):
         # Count total mentions across all time
         total_mentions = session.exec(
             select(func.count(PromptBrandMention.id)).where(
+                PromptBrandMention.project_id == project.id,
                 PromptBrandMention.brand_id == brand.id,
-                PromptBrandMention.mentioned == True,
+                PromptBrandMention.mentioned.is_(True),
             )
         ).one()
 
@@ -363,6 +419,7 @@ def get_brands_details(session: Session = Depends(get_session)):
             avgPosition=round(avg_position, 1),
             trend=trend,
             sentiment=most_common_sentiment,
+            sentimentScore=average_score(jan_scores),
             totalMentions=total_mentions,
             totalPrompts=len(jan_mentioned_queries),
             topPrompts=top_prompts,
@@ -375,19 +432,21 @@ def get_brands_details(session: Session = Depends(get_session)):
 
 
 @app.post("/api/brands", response_model=BrandDetailResponse)
-def create_brand(brand_data: BrandCreate, session: Session = Depends(get_session)):
-    """Create a new brand and sync mentions from existing prompts"""
-    import re
-
+def create_brand(brand_data: BrandCreate, project: Project = Depends(get_project),
+                 session: Session = Depends(get_session)):
+    """Create a new brand; a job then syncs its mentions from the project's existing prompts"""
     # Check if brand already exists
-    existing = session.get(Brand, brand_data.id)
+    existing = session.get(Brand, (brand_data.id, project.id))
     if existing:
         raise HTTPException(status_code=400, detail=f"Brand with ID '{brand_data.id}' already exists")
 
+    previous_version = project_matcher(session, project.id).version
+
     # Create the brand
     variations_str = ",".join(brand_data.variations) if brand_data.variations else brand_data.name
     new_brand = Brand(
         id=brand_data.id,
+        project_id=project.id,
         name=brand_data.name,
         type=brand_data.type,
         color=brand_data.color,
@@ -397,74 +456,28 @@ def create_brand(brand_data: BrandCreate, session: Session = Depends(get_session
     session.commit()
     session.refresh(new_brand)
 
-    # Sync mentions for all existing prompts
-    all_prompts = session.exec(select(Prompt)).all()
-    search_terms = brand_data.variations if brand_data.variations else [brand_data.name]
-
-    for prompt in all_prompts:
-        if not prompt.response_text:
-            continue
-
-        response_lower = prompt.response_text.lower()
-
-        # Check if any variation is mentioned
-        mentioned = False
-        position = None
-        context = None
-
-        for term in search_terms:
-            if term.lower() in response_lower:
-                mentioned = True
-                # Find position (simple: count newlines before first mention)
-                idx = response_lower.find(term.lower())
-                # Estimate position by checking for numbered lists or paragraph position
-                before_text = response_lower[:idx]
-                # Count how many other brands appear before
-                brands = session.exec(select(Brand)).all()
-                other_brands_before = 0
-                for b in brands:
-                    b_variations = b.variations.split(",") if b.variations else [b.name]
-                    for bv in b_variations:
-                        bv_idx = response_lower.find(bv.lower())
-                        if 0 <= bv_idx < idx:
-                            other_brands_before += 1
-                            break
-                position = other_brands_before + 1
-
-                # Extract context (50 chars before and after)
-                start = max(0, idx - 50)
-                end = min(len(prompt.response_text), idx + len(term) + 50)
-                context = prompt.response_text[start:end]
-                break
-
-        # Create mention record
-        mention = PromptBrandMention(
-            prompt_id=prompt.id,
-            brand_id=new_brand.id,
-            mentioned=mentioned,
-            position=position if mentioned else None,
-            sentiment="neutral",  # Default sentiment
-            context=context
-        )
-        session.add(mention)
-
-    session.commit()
+    # Parse the prompts whose response can mention the new brand, ranking it among all brands
+    enqueue(session, "rescan_brand", {
+        "project_id": project.id,
+        "brand_id": new_brand.id,
+        "previous_version": previous_version,
+    }, priority=PRIORITY_BRAND)
 
     # Return the brand details
-    return get_brand_detail(new_brand.id, session)
+    return get_brand_detail(new_brand.id, project.id, session)
 
 
-def get_brand_detail(brand_id: str, session: Session) -> BrandDetailResponse:
+def get_brand_detail(brand_id: str, project_id: str, session: Session) -> BrandDetailResponse:
     """Helper to get brand detail response"""
-    brand = session.get(Brand, brand_id)
+    brand = session.get(Brand, (brand_id, project_id))
     if not brand:
         raise HTTPException(status_code=404, detail="Brand not found")
 
-    all_prompts = session.exec(select(Prompt)).all()
+    all_prompts = load_prompt_index(session, project_id)
 
     # January prompts
-    jan_prompts = [p for p in all_prompts if p.scraped_at and p.scraped_at.strftime("%Y-%m") == "2026-01"]
-    dec_prompts = [p for p in all_prompts if p.scraped_at and p.scraped_at.strftime("%Y-%m") == "2025-12"]
+    jan_prompts = in_month(all_prompts, "2026-01")
+    dec_prompts = in_month(all_prompts, "2025-12")
     jan_queries = set(p.query for p in jan_prompts)
     dec_queries = set(p.query for p in dec_prompts)
 
@@ -475,6 +488,7 @@ def get_brand_detail(brand_id: str, session: Session) -> BrandDetailResponse:
     jan_mentioned_queries = set()
     jan_positions = []
     jan_sentiments = []
+    jan_scores = []
     top_prompts = []
 
     for prompt in jan_prompts:
@@ -482,7 +496,7 @@ def get_brand_detail(brand_id: str, session: Session) -> BrandDetailResponse:
             select(PromptBrandMention).where(
                 PromptBrandMention.prompt_id == prompt.id,
                 PromptBrandMention.brand_id == brand.id,
-                PromptBrandMention.mentioned == True,
+                PromptBrandMention.mentioned.is_(True),
             )
         ).first()
         if mention:
@@ -491,6 +505,7 @@ def get_brand_detail(brand_id: str, session: Session) -> BrandDetailResponse:
                 jan_positions.append(mention.position)
             if mention.sentiment:
                 jan_sentiments.append(mention.sentiment)
+            jan_scores.append(mention.sentiment_score)
             top_prompts.append(BrandPromptDetail(
                 query=prompt.query,
                 position=mention.position,
@@ -514,7 +529,7 @@ def get_brand_detail(brand_id: str, session: Session) -> BrandDetailResponse:
             select(PromptBrandMention).where(
                 PromptBrandMention.prompt_id == prompt.id,
                 PromptBrandMention.brand_id == brand.id,
-                PromptBrandMention.mentioned == True,
+                PromptBrandMention.mentioned.is_(True),
             )
         ).first()
         if mention:
@@ -540,10 +555,8 @@ def get_brand_detail(brand_id: str, session: Session) -> BrandDetailResponse:
 
     prompts_by_month = {m: [] for m in months_order}
     for prompt in all_prompts:
-        if prompt.scraped_at:
-            month_key = prompt.scraped_at.strftime("%Y-%m")
-            if month_key in month_map:
-                prompts_by_month[month_map[month_key]].append(prompt)
+        if prompt.month in month_map:
+            prompts_by_month[month_map[prompt.month]].append(prompt)
 
     visibility_by_month = []
     for month_name in months_order:
@@ -556,7 +569,7 @@ def get_brand_detail(brand_id: str, session: Session) -> BrandDetailResponse:
                 select(PromptBrandMention).where(
                     PromptBrandMention.prompt_id == prompt.id,
                     PromptBrandMention.brand_id == brand.id,
-                    PromptBrandMention.mentioned == True,
+                    PromptBrandMention.mentioned.is_(True),
                 )
             ).first()
             if mention:
@@ -570,8 +583,9 @@ def get_brand_detail(brand_id: str, session: Session) -> BrandDetailResponse:
 
     total_mentions = session.exec(
         select(func.count(PromptBrandMention.id)).where(
+            PromptBrandMention.project_id == brand.project_id,
             PromptBrandMention.brand_id == brand.id,
-            PromptBrandMention.mentioned == True,
+            PromptBrandMention.mentioned.is_(True),
         )
     ).one()
 
@@ -585,6 +599,7 @@ def get_brand_detail(brand_id: str, session: Session) -> BrandDetailResponse:
         avgPosition=round(avg_position, 1),
         trend=trend,
         sentiment=most_common_sentiment,
+        sentimentScore=average_score(jan_scores),
         totalMentions=total_mentions,
         totalPrompts=len(jan_mentioned_queries),
         topPrompts=top_prompts,
@@ -592,10 +607,80 @@ def get_brand_detail(brand_id: str, session: Session) -> BrandDetailResponse:
     )
 
 
+def rematch_response(rematch) -> BrandRematchResponse:
+    return BrandRematchResponse(
+        id=rematch.id,
+        status=rematch.status,
+        name=rematch.name,
+        variations=[v.strip() for v in rematch.variations.split(",") if v.strip()],
+        parsed=rematch.parsed,
+        total=rematch.total,
+        error=rematch.error,
+    )
+
+
+@app.patch("/api/brands/{brand_id}", response_model=BrandUpdateResponse)
+def update_brand(brand_id: str, brand_data: BrandUpdate, project: Project = Depends(get_project), session: Session = Depends(get_session)):
+    """
+    Update a brand. Type and color apply at once; a new name or variations are
+    re-matched against the project's prompts by a job and applied,
+    together with the new mentions, once that is complete.
+    """
+    brand = session.get(Brand, (brand_id, project.id))
+    if not brand:
+        raise HTTPException(status_code=404, detail="Brand not found")
+
+    type_changed = brand_data.type is not None and brand_data.type != brand.type
+    if brand_data.type is not None:
+        brand.type = brand_data.type
+    if brand_data.color is not None:
+        brand.color = brand_data.color
+    session.add(brand)
+    session.commit()
+    if type_changed:
+        # Primary vs competitor coverage is part of the signals
+        rebuild_signals(session, project.id)
+
+    name = brand_data.name if brand_data.name is not None else brand.name
+    if brand_data.variations is not None:
+        variations_str = ",".join(v.strip() for v in brand_data.variations if v.strip()) or name
+    else:
+        variations_str = brand.variations or ""
+
+    rematch = None
+    edited = Brand(id=brand.id, name=name, variations=variations_str)
+    if brand_variations([edited]) != brand_variations([brand]):
+        rematch = start_rematch(session, brand, name, variations_str)
+        enqueue(session, "rematch", {"rematch_id": rematch.id}, priority=PRIORITY_BRAND,
+                key=rematch_job_key(rematch.id))
+    elif name != brand.name or variations_str != (brand.variations or ""):
+        # Same search terms (e.g. a renamed brand with explicit variations): nothing to re-match
+        brand.name = name
+        brand.variations = variations_str
+        session.add(brand)
+        session.commit()
+
+    return BrandUpdateResponse(
+        brand=get_brand_detail(brand_id, project.id, session),
+        rematch=rematch_response(rematch) if rematch else None,
+    )
+
+
+@app.get("/api/brands/{brand_id}/rematch", response_model=BrandRematchResponse)
+def get_brand_rematch(brand_id: str, project: Project = Depends(get_project),
+                      session: Session = Depends(get_session)):
+    """Progress of the latest re-match of a brand"""
+    rematch = latest_rematch(session, project.id, brand_id)
+    if not rematch:
+        raise HTTPException(status_code=404, detail="No re-match for this brand")
+    return rematch_response(rematch)
+
+
 @app.delete("/api/brands/{brand_id}")
-def delete_brand(brand_id: str, session: Session = Depends(get_session)):
+def delete_brand(brand_id: str, project: Project = Depends(get_project),
+                 session: Session = Depends(get_session)):
     """Delete a brand and all its mentions"""
-    brand = session.get(Brand, brand_id)
+    brand = session.get(Brand, (brand_id, project.id))
     if not brand:
         raise HTTPException(status_code=404, detail="Brand not found")
 
@@ -603,12 +688,8 @@ def delete_brand(brand_id: str, session: Session = Depends(get_session)):
     if brand.type == "primary":
         raise HTTPException(status_code=400, detail="Cannot delete primary brand")
 
-    # Delete all mentions for this brand
-    mentions = session.exec(
-        select(PromptBrandMention).where(PromptBrandMention.brand_id == brand_id)
-    ).all()
-    for mention in mentions:
-        session.delete(mention)
+    # Delete all mentions for this brand, re-ranking the other brands where it was mentioned
+    rescan_brand(session, project.id, brand_id, project_matcher(session, project.id).version, removed=True)
 
     # Delete the brand
     session.delete(brand)
@@ -618,87 +699,46 @@ def delete_brand(brand_id: str, session: Session = Depends(get_session)):
 
 
 @app.get("/api/prompts", response_model=list[PromptResponse])
-def get_prompts(session: Session = Depends(get_session)):
+def get_prompts(project: Project = Depends(get_project), session: Session = Depends(get_session)):
     """Get all unique queries with aggregated stats across runs"""
-    all_prompts = session.exec(select(Prompt).order_by(Prompt.query, Prompt.run_number)).all()
-    brands = session.exec(select(Brand)).all()
+    all_prompts = load_prompt_index(session, project.id, by_query=True)
+    brands = session.exec(select(Brand).where(Brand.project_id == project.id)).all()
+    brand_ids = {b.id for b in brands}
+    primary_ids = primary_brand_ids(session, project.id)
+    mentions = MentionIndex.load(session, project.id)
 
     # Group prompts by query
-    grouped = {}
-    for prompt in all_prompts:
-        if prompt.query not in grouped:
-            grouped[prompt.query] = []
-        grouped[prompt.query].append(prompt)
+    grouped = group_by_query(all_prompts)
 
     result = []
     for idx, (query, prompts_list) in enumerate(grouped.items(), 1):
-        # Use the latest run for brand data display
-        latest_prompt = max(prompts_list, key=lambda p: p.run_number if hasattr(p, 'run_number') else 1)
-
         # Calculate aggregated stats across all runs
         all_visibilities = []
         all_positions = []
         all_mentions_count = []
+        # A brand is "mentioned" for the query if it is mentioned in ANY run
+        all_mentioned_brand_ids = set()
 
         for prompt in prompts_list:
-            mentions = session.exec(
-                select(PromptBrandMention).where(PromptBrandMention.prompt_id == prompt.id)
-            ).all()
-
-            brand_responses = []
-            for brand in brands:
-                mention = next((m for m in mentions if m.brand_id == brand.id), None)
-                brand_responses.append(
-                    PromptBrandMentionResponse(
-                        brandId=brand.id,
-                        brandName=brand.name,
-                        position=mention.position if mention and mention.mentioned else 0,
-                        mentioned=mention.mentioned if mention else False,
-                        sentiment=mention.sentiment if mention and mention.sentiment else "neutral",
-                    )
-                )
-
-            mentioned_brands = [b for b in brand_responses if b.mentioned]
+            mentioned_ids = mentions.mentioned_brand_ids(prompt.id)
+            primary_position = mentions.primary_position(prompt.id, primary_ids)
 
-            # Calculate visibility based on Wix's position (primary brand)
-            wix_mention = next((b for b in brand_responses if b.brandId == "wix"), None)
-            if wix_mention and wix_mention.mentioned and wix_mention.position > 0:
-                visibility = max(0, 100 - (wix_mention.position - 1) * 20)
-            else:
-                visibility = 0
+            all_visibilities.append(visibility_for_position(primary_position))
+            if primary_position > 0:
+                all_positions.append(primary_position)
+            all_mentions_count.append(len(mentioned_ids & brand_ids))
+            all_mentioned_brand_ids |= mentioned_ids
 
-            # Use Wix's position (primary brand), not average of all brands
-            wix_position = wix_mention.position if wix_mention and wix_mention.mentioned else 0
-
-            all_visibilities.append(visibility)
-            if wix_position > 0:
-                all_positions.append(wix_position)
-            all_mentions_count.append(len(mentioned_brands))
-
-        # Aggregate mentioned brands across ALL runs (not just latest)
-        all_mentioned_brand_ids = set()
-        for prompt in prompts_list:
-            mentions = session.exec(
-                select(PromptBrandMention).where(
-                    PromptBrandMention.prompt_id == prompt.id,
-                    PromptBrandMention.mentioned == True
-                )
-            ).all()
-            for m in mentions:
-                all_mentioned_brand_ids.add(m.brand_id)
-
-        # Build aggregated brand responses (brand is "mentioned" if mentioned in ANY run)
-        aggregated_brand_responses = []
-        for brand in brands:
-            aggregated_brand_responses.append(
-                PromptBrandMentionResponse(
-                    brandId=brand.id,
-                    brandName=brand.name,
-                    position=0,  # Position varies by run, use 0 for aggregated view
-                    mentioned=brand.id in all_mentioned_brand_ids,
-                    sentiment="neutral",  # Aggregated sentiment
-                )
+        aggregated_brand_responses = [
+            PromptBrandMentionResponse(
+                brandId=brand.id,
+                brandName=brand.name,
+                position=0,  # Position varies by run, use 0 for aggregated view
+                mentioned=brand.id in all_mentioned_brand_ids,
+                sentiment="neutral",  # Aggregated sentiment
             )
+            for brand in brands
+        ]
 
         # Calculate averages
         avg_visibility = sum(all_visibilities) / len(all_visibilities) if all_visibilities else 0
@@ -707,7 +747,7 @@ def get_prompts(session: Session = Depends(get_session)):
 
         result.append(
             PromptResponse(
-                id=f"query-{idx}",
+                id=format_query_id(idx),
                 query=query,
                 visibility=round(avg_visibility, 1),
                 avgPosition=round(avg_pos, 1),
@@ -721,23 +761,20 @@ def get_prompts(session: Session = Depends(get_session)):
 
 
 @app.get("/api/prompts/{query_id}", response_model=PromptDetailResponse)
-def get_prompt_detail(query_id: str, session: Session = Depends(get_session)):
+def get_prompt_detail(query_id: str, project: Project = Depends(get_project),
+                      session: Session = Depends(get_session)):
     """Get detailed prompt info with all runs"""
     # Extract index from query_id (e.g., "query-1" -> 1)
     try:
-        idx = int(query_id.replace("query-", "").replace("prompt-", ""))
+        idx = parse_query_id(query_id)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid query ID format")
 
-    all_prompts = session.exec(select(Prompt).order_by(Prompt.query, Prompt.run_number)).all()
-    brands = session.exec(select(Brand)).all()
+    all_prompts = load_prompt_index(session, project.id, by_query=True)
+    brands = session.exec(select(Brand).where(Brand.project_id == project.id)).all()
 
     # Group prompts by query
-    grouped = {}
-    for prompt in all_prompts:
-        if prompt.query not in grouped:
-            grouped[prompt.query] = []
-        grouped[prompt.query].append(prompt)
+    grouped = group_by_query(all_prompts)
 
     # Get the query by index
     queries = list(grouped.keys())
@@ -746,11 +783,24 @@ def get_prompt_detail(query_id: str, session: Session = Depends(get_session)):
 
     query = queries[idx - 1]
     prompts_list = grouped[query]
+    primary_ids = primary_brand_ids(session, project.id)
+    mentions = MentionIndex.load(session, project.id, [p.id for p in prompts_list])
+    responses = load_responses(session, (p.response_hash for p in prompts_list))
+
+    # Run-to-run similarity of the responses (MinHash signatures, LSH lookup for near-duplicates)
+    signatures = load_signatures(session, (p.response_hash for p in prompts_list))
+    duplicates = near_duplicate_prompts(session, project.id, signatures)
+    sorted_prompts = sorted(prompts_list, key=lambda p: p.run_number)
+    similar_to_previous = previous_run_similarity(sorted_prompts, signatures)
+    stability, drift = query_drift(prompts_list, signatures)
 
     # Build runs
     runs = []
-    for prompt in sorted(prompts_list, key=lambda p: p.run_number if hasattr(p, 'run_number') else 1):
-        runs.append(get_run_data(session, prompt, brands))
+    for prompt in sorted_prompts:
+        run = get_run_data(session, prompt, brands, mentions, primary_ids, responses.get(prompt.response_hash))
+        run.similarToPrevious = similar_to_previous[prompt.id]
+        run.nearDuplicateRunIds = [pid for pid in duplicates.get(prompt.response_hash, []) if pid != prompt.id]
+        runs.append(run)
 
     # Use latest run for aggregate display
     latest_run = runs[-1] if runs else None
@@ -769,130 +819,62 @@ def get_prompt_detail(query_id: str, session: Session = Depends(get_session)):
         totalRuns=len(runs),
         brands=latest_run.brands if latest_run else [],
         runs=runs,
+        stability=stability,
+        drift=drift,
     )
 
 
 @app.get("/api/sources", response_model=list[SourceResponse])
-def get_sources(session: Session = Depends(get_session)):
-    """Get all sources with usage metrics"""
-    # Count unique queries (not runs)
-    all_prompts = session.exec(select(Prompt)).all()
-    unique_queries = set(p.query for p in all_prompts)
-    total_queries = len(unique_queries)
-
-    sources = session.exec(select(Source)).all()
-
-    result = []
-    for source in sources:
-        prompt_links = session.exec(
-            select(PromptSource).where(PromptSource.source_id == source.id)
-        ).all()
-
-        # Count unique queries citing this source
-        citing_queries = set()
-        for pl in prompt_links:
-            prompt = session.get(Prompt, pl.prompt_id)
-            if prompt:
-                citing_queries.add(prompt.query)
-
-        usage = (len(citing_queries) / total_queries * 100) if total_queries > 0 else 0
-        avg_citations = (
-            sum(pl.citation_order for pl in prompt_links) / len(prompt_links)
-            if prompt_links
-            else 0
-        )
-
-        result.append(
-            SourceResponse(
-                domain=source.domain,
-                usage=round(usage, 1),
-                avgCitations=round(avg_citations, 1),
-            )
-        )
+def get_sources(project: Project = Depends(get_project)):
+    """Get all sources cited in the project with usage metrics (streamed, computed in one grouped query)"""
+    from database import engine
 
-    # Sort by usage descending
-    result.sort(key=lambda x: x.usage, reverse=True)
-    return result
+    return StreamingResponse(stream_sources_json(engine, project.id), media_type="application/json")
 
 
 @app.get("/api/metrics", response_model=DashboardMetricsResponse)
-def get_metrics(session: Session = Depends(get_session)):
+def get_metrics(project: Project = Depends(get_project), session: Session = Depends(get_session)):
     """Get dashboard KPIs with month-over-month changes (Jan vs Dec)"""
-    all_prompts = session.exec(select(Prompt)).all()
+    all_prompts = load_prompt_index(session, project.id)
     unique_queries = set(p.query for p in all_prompts)
     total_queries = len(unique_queries)
 
     # Separate January and December prompts
-    jan_prompts = [p for p in all_prompts if p.scraped_at and p.scraped_at.strftime("%Y-%m") == "2026-01"]
-    dec_prompts = [p for p in all_prompts if p.scraped_at and p.scraped_at.strftime("%Y-%m") == "2025-12"]
-
-    jan_queries = set(p.query for p in jan_prompts)
-    dec_queries = set(p.query for p in dec_prompts)
+    jan_prompts = in_month(all_prompts, "2026-01")
+    dec_prompts = in_month(all_prompts, "2025-12")
 
     # Calculate sources: count total source citations across all runs
-    # Sources this month (January 2026)
-    jan_source_count = 0
-    for prompt in jan_prompts:
-        prompt_sources = session.exec(
-            select(PromptSource).where(PromptSource.prompt_id == prompt.id)
-        ).all()
-        jan_source_count += len(prompt_sources)
-
-    # Sources last month (December 2025) for change calculation
-    dec_source_count = 0
-    for prompt in dec_prompts:
-        prompt_sources = session.exec(
-            select(PromptSource).where(PromptSource.prompt_id == prompt.id)
-        ).all()
-        dec_source_count += len(prompt_sources)
-
-    # Total sources across all months
-    total_source_count = 0
-    for prompt in all_prompts:
-        prompt_sources = session.exec(
-            select(PromptSource).where(PromptSource.prompt_id == prompt.id)
-        ).all()
-        total_source_count += len(prompt_sources)
+    citations_per_prompt = dict(session.exec(
+        select(PromptSource.prompt_id, func.count(PromptSource.id))
+        .where(PromptSource.project_id == project.id)
+        .group_by(PromptSource.prompt_id)
+    ).all())
+    jan_source_count = sum(citations_per_prompt.get(p.id, 0) for p in jan_prompts)
+    dec_source_count = sum(citations_per_prompt.get(p.id, 0) for p in dec_prompts)
+    total_source_count = sum(citations_per_prompt.values())
 
     sources_change = jan_source_count - dec_source_count
 
-    # Calculate Wix visibility for January
-    jan_wix_queries = set()
-    jan_wix_positions = []
-    for prompt in jan_prompts:
-        mention = session.exec(
-            select(PromptBrandMention).where(
-                PromptBrandMention.prompt_id == prompt.id,
-                PromptBrandMention.brand_id == "wix",
-                PromptBrandMention.mentioned == True,
-            )
-        ).first()
-        if mention:
-            jan_wix_queries.add(prompt.query)
-            if mention.position:
-                jan_wix_positions.append(mention.position)
-
-    jan_visibility = (len(jan_wix_queries) / len(jan_queries) * 100) if jan_queries else 0
-    jan_avg_position = sum(jan_wix_positions) / len(jan_wix_positions) if jan_wix_positions else 0
-
-    # Calculate Wix visibility for December
-    dec_wix_queries = set()
-    dec_wix_positions = []
-    for prompt in dec_prompts:
-        mention = session.exec(
-            select(PromptBrandMention).where(
-                PromptBrandMention.prompt_id == prompt.id,
-                PromptBrandMention.brand_id == "wix",
-                PromptBrandMention.mentioned == True,
-            )
-        ).first()
-        if mention:
-            dec_wix_queries.add(prompt.query)
-            if mention.position:
-                dec_wix_positions.append(mention.position)
-
-    dec_visibility = (len(dec_wix_queries) / len(dec_queries) * 100) if dec_queries else 0
-    dec_avg_position = sum(dec_wix_positions) / len(dec_wix_positions) if dec_wix_positions else 0
+    # Primary brand visibility and position per month
+    primary_ids = primary_brand_ids(session, project.id)
+    mentions = MentionIndex.load(session, project.id, mentioned_only=True)
+
+    def primary_stats(prompts: list[PromptRow]) -> tuple[float, float]:
+        queries = set(p.query for p in prompts)
+        visible_queries = set()
+        positions = []
+        for prompt in prompts:
+            if mentions.primary_mentioned(prompt.id, primary_ids):
+                visible_queries.add(prompt.query)
+                position = mentions.primary_position(prompt.id, primary_ids)
+                if position:
+                    positions.append(position)
+        visibility = (len(visible_queries) / len(queries) * 100) if queries else 0
+        avg_position = sum(positions) / len(positions) if positions else 0
+        return visibility, avg_position
+
+    jan_visibility, jan_avg_position = primary_stats(jan_prompts)
+    dec_visibility, dec_avg_position = primary_stats(dec_prompts)
 
     # Calculate changes (Jan vs Dec)
     visibility_change = jan_visibility - dec_visibility
@@ -907,324 +889,86 @@ def get_metrics(session: Session = Depends(get_session)):
     )
 
 
-@app.get("/api/visibility", response_model=list[DailyVisibilityResponse])
-def get_visibility_data(session: Session = Depends(get_session)):
-    """Get monthly visibility data for charts (Sep 2025 - Jan 2026)"""
-    brands = session.exec(select(Brand)).all()
-    all_prompts = session.exec(select(Prompt)).all()
+@app.get("/api/visibility", response_model=VisibilitySeriesResponse)
+def get_visibility_data(project: Project = Depends(get_project), session: Session = Depends(get_session)):
+    """Get monthly visibility series per brand for charts (Sep 2025 - Jan 2026)"""
+    brands = session.exec(select(Brand).where(Brand.project_id == project.id)).all()
+    all_prompts = load_prompt_index(session, project.id)
+    mentions = MentionIndex.load(session, project.id, mentioned_only=True)
 
-    # Group prompts by month
-    months = {
-        "Sep 2025": [],
-        "Oct 2025": [],
-        "Nov 2025": [],
-        "Dec 2025": [],
-        "Jan 2026": [],
+    month_map = {
+        "2025-09": "Sep 2025",
+        "2025-10": "Oct 2025",
+        "2025-11": "Nov 2025",
+        "2025-12": "Dec 2025",
+        "2026-01": "Jan 2026",
     }
 
+    # Distinct queries per month, and per (month, brand) the queries mentioning the brand
+    month_queries = {month: set() for month in month_map}
+    mentioned_queries = {}
     for prompt in all_prompts:
-        if prompt.scraped_at:
-            month_str = prompt.scraped_at.strftime("%Y-%m")
-            if month_str == "2025-09":
-                months["Sep 2025"].append(prompt)
-            elif month_str == "2025-10":
-                months["Oct 2025"].append(prompt)
-            elif month_str == "2025-11":
-                months["Nov 2025"].append(prompt)
-            elif month_str == "2025-12":
-                months["Dec 2025"].append(prompt)
-            elif month_str == "2026-01":
-                months["Jan 2026"].append(prompt)
-
-    result = []
-    for month_name in ["Sep 2025", "Oct 2025", "Nov 2025", "Dec 2025", "Jan 2026"]:
-        month_prompts = months[month_name]
-        unique_queries = set(p.query for p in month_prompts)
-        total_queries = len(unique_queries)
-
-        brand_visibility = {}
-        for brand in brands:
-            # Get mentions for prompts in this month
-            mentioned_queries = set()
-            for prompt in month_prompts:
-                mention = session.exec(
-                    select(PromptBrandMention).where(
-                        PromptBrandMention.prompt_id == prompt.id,
-                        PromptBrandMention.brand_id == brand.id,
-                        PromptBrandMention.mentioned == True,
-                    )
-                ).first()
-                if mention:
-                    mentioned_queries.add(prompt.query)
+        month = prompt.month
+        if month not in month_queries:
+            continue
+        month_queries[month].add(prompt.query)
+        for brand_id in mentions.mentioned_brand_ids(prompt.id):
+            mentioned_queries.setdefault((month, brand_id), set()).add(prompt.query)
 
-            brand_visibility[brand.id] = (
-                (len(mentioned_queries) / total_queries * 100) if total_queries > 0 else 0
-            )
+    series = {}
+    for brand in brands:
+        series[brand.id] = [
+            round(len(mentioned_queries.get((month, brand.id), ())) / len(queries) * 100, 1) if queries else 0
+            for month, queries in month_queries.items()
+        ]
 
-        result.append(DailyVisibilityResponse(
-            date=month_name,
-            shopify=round(brand_visibility.get("shopify", 0), 1),
-            woocommerce=round(brand_visibility.get("woocommerce", 0), 1),
-            bigcommerce=round(brand_visibility.get("bigcommerce", 0), 1),
-            wix=round(brand_visibility.get("wix", 0), 1),
-            squarespace=round(brand_visibility.get("squarespace", 0), 1),
-        ))
-
-    return result
+    return VisibilitySeriesResponse(dates=list(month_map.values()), series=series)
 
 
 @app.get("/api/sources/analytics", response_model=SourcesAnalyticsResponse)
-def get_sources_analytics(session: Session = Depends(get_session)):
+def get_sources_analytics(project: Project = Depends(get_project), session: Session = Depends(get_session)):
     """Get detailed analytics for citation sources"""
-    sources = session.exec(select(Source)).all()
-    all_prompts = session.exec(select(Prompt)).all()
-
-    # Classify domains by type
-    def classify_domain(domain: str) -> str:
-        domain_lower = domain.lower()
-        # Brand/official sites
-        if any(brand in domain_lower for brand in ['shopify', 'wix', 'woocommerce', 'bigcommerce', 'squarespace', 'wordpress']):
-            return 'brand'
-        # Community/forums
-        if any(community in domain_lower for community in ['reddit', 'quora', 'stackexchange', 'stackoverflow', 'discourse']):
-            return 'community'
-        # News/media
-        if any(news in domain_lower for news in ['forbes', 'techcrunch', 'entrepreneur', 'inc.com', 'businessinsider', 'cnet', 'zdnet', 'pcmag', 'theverge']):
-            return 'news'
-        # Blogs (common blog patterns)
-        if any(blog in domain_lower for blog in ['blog', 'medium.com', 'dev.to', 'hashnode', 'substack']):
-            return 'blog'
-        # Review sites
-        if any(review in domain_lower for review in ['g2.com', 'capterra', 'trustpilot', 'trustradius', 'getapp']):
-            return 'review'
-        # Default: check for common blog patterns in URL structure
-        return 'other'
-
-    # Build domain citation counts
-    domain_citations = Counter()
-    source_citations = {}  # source_id -> list of prompt queries
-
-    for source in sources:
-        prompt_links = session.exec(
-            select(PromptSource).where(PromptSource.source_id == source.id)
-        ).all()
-
-        # Count total citations (across all runs)
-        domain_citations[source.domain] += len(prompt_links)
-
-        # Get unique prompts citing this source
-        prompt_queries = []
-        for pl in prompt_links:
-            prompt = session.get(Prompt, pl.prompt_id)
-            if prompt and prompt.query not in prompt_queries:
-                prompt_queries.append(prompt.query)
-        source_citations[source.id] = prompt_queries
-
-    total_citations = sum(domain_citations.values())
-    total_sources = len(sources)
-    total_domains = len(set(s.domain for s in sources))
-
-    # Build domain breakdown (top 20)
-    domain_breakdown = []
-    for domain, citations in domain_citations.most_common(20):
-        domain_breakdown.append(DomainBreakdown(
-            domain=domain,
-            citations=citations,
-            percentage=round(citations / total_citations * 100, 1) if total_citations > 0 else 0,
-            type=classify_domain(domain)
-        ))
+    return build_sources_analytics(session, project.id)
 
-    # Build source types breakdown
-    type_counts = Counter()
-    for source in sources:
-        source_type = classify_domain(source.domain)
-        # Refine classification: if URL contains /blog/ it's likely a blog post
-        if source.url and '/blog/' in source.url.lower():
-            source_type = 'blog'
-        type_counts[source_type] += 1
-
-    source_types = []
-    for stype, count in type_counts.most_common():
-        source_types.append(SourceType(
-            type=stype,
-            count=count,
-            percentage=round(count / total_sources * 100, 1) if total_sources > 0 else 0
-        ))
 
-    # Build top sources list (top 50 by citation count)
-    sources_with_citations = []
-    for source in sources:
-        prompt_links = session.exec(
-            select(PromptSource).where(PromptSource.source_id == source.id)
-        ).all()
-        sources_with_citations.append((source, len(prompt_links)))
+@app.get("/api/suggestions", response_model=SuggestionsResponse)
+def get_suggestions(project: Project = Depends(get_project), session: Session = Depends(get_session)):
+    """Get AI SEO improvement suggestions from precomputed opportunity signals"""
+    return build_suggestions(session, project.id)
 
-    sources_with_citations.sort(key=lambda x: x[1], reverse=True)
 
-    top_sources = []
-    for source, citation_count in sources_with_citations[:50]:
-        top_sources.append(TopSource(
-            id=source.id,
-            domain=source.domain,
-            url=source.url,
-            title=source.title,
-            citations=citation_count,
-            prompts=source_citations.get(source.id, [])[:5]  # Limit to 5 prompts
-        ))
+@app.get("/api/search", response_model=SearchResponse)
+def search_content(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to search for"),
+    limit: int = Query(20, ge=1, le=100),
+    project: Project = Depends(get_project),
+    session: Session = Depends(get_session),
+):
+    """Full-text search over queries, AI responses and cited sources, best matches first"""
+    return search(session, project.id, q, limit)
 
-    return SourcesAnalyticsResponse(
-        summary=SourcesSummary(
-            totalSources=total_sources,
-            totalDomains=total_domains,
-            totalCitations=total_citations,
-            avgCitationsPerSource=round(total_citations / total_sources, 1) if total_sources > 0 else 0
-        ),
-        domainBreakdown=domain_breakdown,
-        sourceTypes=source_types,
-        topSources=top_sources
-    )
 
+def project_response(project: Project) -> ProjectResponse:
+    return ProjectResponse(id=project.id, name=project.name, createdAt=project.created_at.isoformat())
 
-@app.get("/api/suggestions", response_model=SuggestionsResponse)
-def get_suggestions(session: Session = Depends(get_session)):
-    """Get AI SEO improvement suggestions based on source data analysis"""
-    sources = session.exec(select(Source)).all()
-    all_prompts = session.exec(select(Prompt)).all()
-
-    # Calculate source type percentages
-    total_sources = len(sources)
-
-    def classify_domain(domain: str, url: str = "") -> str:
-        domain_lower = domain.lower()
-        url_lower = url.lower() if url else ""
-
-        if '/blog/' in url_lower:
-            return 'blog'
-        if any(brand in domain_lower for brand in ['shopify', 'wix', 'woocommerce', 'bigcommerce', 'squarespace']):
-            return 'brand'
-        if any(community in domain_lower for community in ['reddit', 'quora']):
-            return 'community'
-        if any(news in domain_lower for news in ['forbes', 'techcrunch', 'entrepreneur', 'inc.com', 'businessinsider']):
-            return 'news'
-        if any(review in domain_lower for review in ['g2.com', 'capterra', 'trustpilot']):
-            return 'review'
-        return 'other'
-
-    type_counts = Counter()
-    for source in sources:
-        type_counts[classify_domain(source.domain, source.url)] += 1
-
-    blog_pct = round(type_counts.get('blog', 0) / total_sources * 100) if total_sources > 0 else 0
-    community_pct = round(type_counts.get('community', 0) / total_sources * 100) if total_sources > 0 else 0
-    news_pct = round(type_counts.get('news', 0) / total_sources * 100) if total_sources > 0 else 0
-    review_pct = round(type_counts.get('review', 0) / total_sources * 100) if total_sources > 0 else 0
-
-    # Get sample sources for examples
-    blog_sources = [s for s in sources if classify_domain(s.domain, s.url) == 'blog'][:3]
-    community_sources = [s for s in sources if classify_domain(s.domain, s.url) == 'community'][:3]
-    news_sources = [s for s in sources if classify_domain(s.domain, s.url) == 'news'][:3]
-
-    # Get comparison prompts
-    comparison_prompts = [p.query for p in all_prompts if any(word in p.query.lower() for word in ['vs', 'versus', 'compare', 'best', 'top'])]
-    unique_comparison = list(set(comparison_prompts))[:5]
-    comparison_pct = round(len(set(comparison_prompts)) / len(set(p.query for p in all_prompts)) * 100) if all_prompts else 0
-
-    # Calculate Wix visibility score for overall AI SEO score
-    jan_prompts = [p for p in all_prompts if p.scraped_at and p.scraped_at.strftime("%Y-%m") == "2026-01"]
-    jan_queries = set(p.query for p in jan_prompts)
 
-    wix_mentioned = 0
-    for query in jan_queries:
-        query_prompts = [p for p in jan_prompts if p.query == query]
-        for prompt in query_prompts:
-            mention = session.exec(
-                select(PromptBrandMention).where(
-                    PromptBrandMention.prompt_id == prompt.id,
-                    PromptBrandMention.brand_id == "wix",
-                    PromptBrandMention.mentioned == True,
-                )
-            ).first()
-            if mention:
-                wix_mentioned += 1
-                break
-
-    visibility_score = round(wix_mentioned / len(jan_queries) * 100) if jan_queries else 0
-
-    # Overall AI SEO score (weighted average)
-    ai_seo_score = min(100, round(visibility_score * 0.9 + 10))  # Base 10 + visibility contribution
-
-    suggestions = [
-        Suggestion(
-            id=1,
-            priority="high",
-            category="content",
-            title="Create More Blog Content",
-            description=f"{blog_pct}% of AI citation sources are blog posts. Publishing regular, in-depth blog content about ecommerce topics significantly increases your chances of being cited by AI systems. Focus on comprehensive guides and tutorials.",
-            stat=f"{blog_pct}%",
-            statLabel="of sources are blogs",
-            action="Start a blog with ecommerce guides, tutorials, and industry insights",
-            examples=[
-                SuggestionExample(type="source", domain=s.domain, title=s.title) for s in blog_sources
-            ] + [
-                SuggestionExample(type="prompt", query=q) for q in unique_comparison[:2]
-            ]
-        ),
-        Suggestion(
-            id=2,
-            priority="medium",
-            category="community",
-            title="Engage on Reddit & Forums",
-            description=f"{community_pct}% of AI citations come from community discussions on Reddit and forums. Participating authentically in relevant subreddits like r/ecommerce, r/shopify, and r/smallbusiness can boost your visibility.",
-            stat=f"{community_pct}%",
-            statLabel="of sources are community sites",
-            action="Join r/ecommerce, r/entrepreneur, and relevant subreddit communities",
-            examples=[
-                SuggestionExample(type="source", domain=s.domain, title=s.title) for s in community_sources
-            ]
-        ),
-        Suggestion(
-            id=3,
-            priority="high",
-            category="authority",
-            title="Get Featured in Industry Publications",
-            description=f"News and industry publications account for {news_pct}% of AI citations. PR efforts, guest posts, and getting featured on authority sites like Forbes, TechCrunch, and Entrepreneur improve AI visibility significantly.",
-            stat=f"{news_pct}%",
-            statLabel="are news/industry sites",
-            action="Pitch stories to ecommerce and tech publications, pursue guest posting opportunities",
-            examples=[
-                SuggestionExample(type="source", domain=s.domain, title=s.title) for s in news_sources
-            ]
-        ),
-        Suggestion(
-            id=4,
-            priority="medium",
-            category="technical",
-            title="Optimize for Comparison Queries",
-            description=f"{comparison_pct}% of tracked prompts are comparison queries (e.g., 'best platform', 'X vs Y'). Creating dedicated comparison pages and landing pages optimized for these queries can improve visibility.",
-            stat=f"{comparison_pct}%",
-            statLabel="of queries compare platforms",
-            action="Build comparison landing pages and feature comparison content",
-            examples=[
-                SuggestionExample(type="prompt", query=q) for q in unique_comparison[:3]
-            ]
-        ),
-        Suggestion(
-            id=5,
-            priority="low",
-            category="content",
-            title="Collect Reviews on G2 & Capterra",
-            description=f"Review platforms account for {review_pct}% of sources. Having strong presence on review sites like G2, Capterra, and Trustpilot provides social proof that AI systems reference.",
-            stat=f"{review_pct}%",
-            statLabel="are review platforms",
-            action="Encourage customers to leave reviews on G2, Capterra, and Trustpilot",
-            examples=[]
-        ),
-    ]
+@app.get("/api/projects", response_model=list[ProjectResponse])
+def get_projects(session: Session = Depends(get_session)):
+    """List all projects (client workspaces)"""
+    return [project_response(p) for p in session.exec(select(Project).order_by(Project.created_at, Project.id)).all()]
 
-    return SuggestionsResponse(
-        score=ai_seo_score,
-        suggestions=suggestions
-    )
+
+@app.post("/api/projects", response_model=ProjectResponse)
+def create_project(project_data: ProjectCreate, session: Session = Depends(get_session)):
+    """Create an empty project; add brands to it with POST /api/brands?project=<id>"""
+    if session.get(Project, project_data.id):
+        raise HTTPException(status_code=400, detail=f"Project with ID '{project_data.id}' already exists")
+
+    project = Project(id=project_data.id, name=project_data.name)
+    session.add(project)
+    session.commit()
+    session.refresh(project)
+    return project_response(project)
 
 
 @app.get("/api/health")
@@ -0,0 +1,308 @@
+"""
+Recomputing stored brand mentions.
+
+Mentions are parsed once, at ingest, and every prompt records the version of
+the brand matcher they were parsed with (Prompt.matcher_version, a
+fingerprint of the project's brands, their variations and the sentiment
+lexicon). Two ways keep them current:
+
+- rescan_brand(): after a brand is added, edited or removed, only prompts
+  whose response can contain it are parsed again. Candidates are the prompts
+  it is currently mentioned in plus those the full-text index finds for its
+  variations; no other prompt can change (a brand's rank only moves when a
+  brand appears in the same answer), so those are just moved to the new
+  matcher version. Prompts whose mentions were supplied rather than parsed
+  (no matcher version: historical or ingested positions) are never re-ranked;
+  only the changed brand's own row is parsed into them, or removed.
+- resync_mentions(): a parallel, resumable re-parse of a whole project, or of
+  its stale prompts only (parsed with another matcher version; supplied
+  mentions are never stale). Prompts are partitioned into ranges of CHUNK_SIZE
+  consecutive ids; a process pool parses each range
+  (answer_parser.brand_mention_rows) and the parent writes every finished
+  range in its own transaction, recording a MentionSyncCheckpoint. Writes
+  stay in one process because SQLite allows a single writer; parsing is the
+  expensive part. An interrupted run resumes with the ranges that have no
+  checkpoint for the same matcher version; checkpoints are cleared when a
+  run completes.
+"""
+
+import multiprocessing
+import os
+import time
+from collections.abc import Callable, Iterable
+from datetime import datetime
+
+from sqlalchemy import and_, delete, insert, literal, or_, update
+from sqlmodel import Session, func, select
+
+from answer_parser import BrandMatcher, brand_mention_rows, brand_variations
+from database import engine
+from models import Brand, MentionSyncCheckpoint, Prompt, PromptBrandMention
+from responses import load_responses
+from search import matching_response_hashes
+from signals import rebuild_signals
+
+CHUNK_SIZE = 1000
+PROGRESS_EVERY = 10  # Chunks between progress lines
+
+MENTION_COLUMNS = (
+    "brand_id", "mentioned", "position", "sentiment", "sentiment_score", "context", "section", "mention_count",
+)
+
+# Matcher of the current worker process (set by _init_worker)
+_matcher: BrandMatcher | None = None
+
+
+def project_matcher(session: Session, project_id: str, exclude: str | None = None) -> BrandMatcher:
+    """Matcher over the project's current brands (but exclude)"""
+    brands = session.exec(select(Brand).where(Brand.project_id == project_id)).all()
+    return BrandMatcher.from_brands(brand for brand in brands if brand.id != exclude)
+
+
+def parse_mentions(session: Session, project_id: str, prompts: Iterable[tuple[int, str | None]],
+                   matcher: BrandMatcher) -> tuple[list[int], list[dict]]:
+    """
+    Mention rows (PromptBrandMention columns) for (prompt id, response hash)
+    pairs, as (ids of the prompts parsed, rows). Prompts without a stored
+    response are skipped: only the parsed ids may have their mentions replaced.
+    """
+    prompts = list(prompts)
+    responses = load_responses(session, (digest for _, digest in prompts))
+    parsed = []
+    rows = []
+    for prompt_id, digest in prompts:
+        response_text = responses.get(digest)
+        if not response_text:
+            continue
+        parsed.append(prompt_id)
+        for row in brand_mention_rows(response_text, matcher):
+            rows.append({
+                "prompt_id": prompt_id,
+                "project_id": project_id,
+                **{column: row[column] for column in MENTION_COLUMNS},
+            })
+    return parsed, rows
+
+
+def replace_brand_mentions(conn, brand_id: str, prompt_ids: list[int], rows: list[dict]) -> None:
+    """Replace only brand_id's mentions of the given prompts, keeping the other brands' rows (caller commits)"""
+    if not prompt_ids:
+        return
+    conn.execute(delete(PromptBrandMention).where(
+        PromptBrandMention.prompt_id.in_(prompt_ids), PromptBrandMention.brand_id == brand_id,
+    ))
+    if rows:
+        conn.execute(insert(PromptBrandMention.__table__), rows)
+
+
+def replace_mentions(conn, prompt_ids: list[int], rows: list[dict], version: str) -> None:
+    """Replace the mentions of the given prompts and stamp them with the matcher version (caller commits)"""
+    if not prompt_ids:
+        return
+    # Prompt ids already belong to one project, and filtering on project_id would steer the
+    # planner to the (project_id, brand_id) index and a scan of the whole project
+    conn.execute(delete(PromptBrandMention).where(PromptBrandMention.prompt_id.in_(prompt_ids)))
+    if rows:
+        conn.execute(insert(PromptBrandMention.__table__), rows)
+    conn.execute(update(Prompt).where(Prompt.id.in_(prompt_ids)).values(matcher_version=version))
+
+
+# --- Single-brand rescans ---
+
+def brand_candidates(session: Session, project_id: str, brand_id: str, variations: list[str],
+                     last_prompt_id: int | None = None, supplied: bool = False) -> list[tuple[int, str | None]]:
+    """
+    (id, response hash) of the prompts whose mentions can change when brand_id
+    gets these variations (none when it is removed): those it is mentioned in
+    now, plus those whose response contains one of the variations.
+
+    Only parsed prompts are returned, or with supplied, only those whose
+    mentions were supplied (no matcher version), which must not be re-ranked.
+    """
+    parsed = Prompt.matcher_version.is_(None) if supplied else Prompt.matcher_version.is_not(None)
+    prompt_query = select(Prompt.id, Prompt.response_hash).where(Prompt.project_id == project_id, parsed)
+    if last_prompt_id is not None:
+        prompt_query = prompt_query.where(Prompt.id <= last_prompt_id)
+
+    hashes = matching_response_hashes(session, variations) if variations else set()
+    if hashes is None:
+        return session.exec(prompt_query.order_by(Prompt.id)).all()
+
+    mentioned = select(PromptBrandMention.prompt_id).where(
+        PromptBrandMention.project_id == project_id,
+        PromptBrandMention.brand_id == brand_id,
+        PromptBrandMention.mentioned.is_(True),
+    )
+    condition = Prompt.id.in_(mentioned)
+    if hashes:
+        condition = or_(condition, Prompt.response_hash.in_(hashes))
+    return session.exec(prompt_query.where(condition).order_by(Prompt.id)).all()
+
+
+def rescan_brand(session: Session, project_id: str, brand_id: str, previous_version: str | None,
+                 removed: bool = False) -> int:
+    """
+    Update mentions after brand_id was added or edited, or before it is
+    removed (the caller then deletes the Brand row), and commit.
+
+    previous_version is the project's matcher version before the change;
+    prompts that were current under it and cannot contain the brand are moved
+    to the new version without being parsed. Returns how many prompts were parsed.
+    """
+    matcher = project_matcher(session, project_id, exclude=brand_id if removed else None)
+    brand = None if removed else session.get(Brand, (brand_id, project_id))
+    variations = brand_variations([brand])[brand_id] if brand else []
+    prompts = brand_candidates(session, project_id, brand_id, variations)
+    # Supplied mentions only get the brand's own row (removal deletes it below)
+    supplied = brand_candidates(session, project_id, brand_id, variations, supplied=True) if brand else []
+
+    conn = session.connection()
+    if previous_version:
+        conn.execute(
+            update(Prompt)
+            .where(Prompt.project_id == project_id, Prompt.matcher_version == previous_version)
+            .values(matcher_version=matcher.version)
+        )
+    for offset in range(0, len(prompts), CHUNK_SIZE):
+        parsed_ids, rows = parse_mentions(session, project_id, prompts[offset:offset + CHUNK_SIZE], matcher)
+        replace_mentions(conn, parsed_ids, rows, matcher.version)
+    for offset in range(0, len(supplied), CHUNK_SIZE):
+        parsed_ids, rows = parse_mentions(session, project_id, supplied[offset:offset + CHUNK_SIZE], matcher)
+        replace_brand_mentions(conn, brand_id, parsed_ids, [row for row in rows if row["brand_id"] == brand_id])
+
+    if brand:
+        # Every other prompt of the project gets a not-mentioned row for a newly added brand
+        parsed_ids = select(PromptBrandMention.prompt_id).where(PromptBrandMention.brand_id == brand_id)
+        conn.execute(insert(PromptBrandMention.__table__).from_select(
+            ["prompt_id", "brand_id", "project_id", "mentioned", "mention_count"],
+            select(Prompt.id, literal(brand_id), literal(project_id), literal(False), literal(0)).where(
+                Prompt.project_id == project_id,
+                Prompt.id.not_in(parsed_ids.where(PromptBrandMention.project_id == project_id)),
+            ),
+        ))
+    else:
+        conn.execute(delete(PromptBrandMention).where(
+            PromptBrandMention.project_id == project_id, PromptBrandMention.brand_id == brand_id,
+        ))
+    session.commit()
+
+    # Mentions changed, so suggestion signals must be recomputed
+    rebuild_signals(session, project_id)
+    return len(prompts) + len(supplied)
+
+
+# --- Whole-project re-sync ---
+
+def _init_worker(variations: dict[str, list[str]]) -> None:
+    global _matcher
+    # Connections inherited from the parent must not be shared with it
+    engine.dispose(close=False)
+    _matcher = BrandMatcher(variations)
+
+
+def _stale(version: str):
+    # Supplied mentions (no matcher version) are only re-parsed by a full re-sync
+    return and_(Prompt.matcher_version.is_not(None), Prompt.matcher_version != version)
+
+
+def compute_range(project_id: str, start: int, only_stale: bool) -> tuple[int, list[int], list[dict]]:
+    """
+    Mention rows for the project's prompts with ids in [start, start + CHUNK_SIZE).
+
+    Runs in a worker; returns (range start, prompt ids parsed, rows).
+    """
+    with Session(engine) as session:
+        query = select(Prompt.id, Prompt.response_hash).where(
+            Prompt.project_id == project_id,
+            Prompt.id >= start,
+            Prompt.id < start + CHUNK_SIZE,
+        )
+        if only_stale:
+            query = query.where(_stale(_matcher.version))
+        parsed_ids, rows = parse_mentions(session, project_id, session.exec(query).all(), _matcher)
+    return start, parsed_ids, rows
+
+
+def _compute_range_args(args: tuple[str, int, bool]) -> tuple[int, list[int], list[dict]]:
+    return compute_range(*args)
+
+
+def write_range(project_id: str, start: int, prompt_ids: list[int], rows: list[dict], version: str) -> None:
+    """Replace the mentions of one id range and checkpoint it, in one transaction"""
+    with engine.begin() as conn:
+        replace_mentions(conn, prompt_ids, rows, version)
+        conn.execute(insert(MentionSyncCheckpoint.__table__), [{
+            "project_id": project_id,
+            "range_start": start,
+            "version": version,
+            "completed_at": datetime.utcnow(),
+        }])
+
+
+def pending_ranges(session: Session, project_id: str, version: str, only_stale: bool = False) -> list[int]:
+    """Start ids of the project's prompt ranges without a checkpoint for this version"""
+    query = select(func.distinct(Prompt.id // CHUNK_SIZE)).where(Prompt.project_id == project_id)
+    if only_stale:
+        query = query.where(_stale(version))
+    starts = session.exec(query).all()
+    done = set(session.exec(
+        select(MentionSyncCheckpoint.range_start).where(
+            MentionSyncCheckpoint.project_id == project_id,
+            MentionSyncCheckpoint.version == version,
+        )
+    ).all())
+    return sorted(s * CHUNK_SIZE for s in starts if s * CHUNK_SIZE not in done)
+
+
+def clear_checkpoints(session: Session, project_id: str) -> None:
+    session.exec(delete(MentionSyncCheckpoint).where(MentionSyncCheckpoint.project_id == project_id))
+    session.commit()
+
+
+def resync_mentions(project_id: str, workers: int | None = None, restart: bool = False, only_stale: bool = False,
+                    progress: Callable[[str], None] = print) -> tuple[int, int]:
+    """
+    Re-parse the prompts of a project (all, or only_stale ones parsed with
+    another matcher version than the current one) and rewrite their mentions, resuming an
+    interrupted run unless restart is set. Returns (prompts parsed, mention rows written).
+    """
+    workers = workers or os.cpu_count() or 1
+
+    with Session(engine) as session:
+        variations = brand_variations(session.exec(select(Brand).where(Brand.project_id == project_id)).all())
+        version = BrandMatcher(variations).version
+        if restart:
+            clear_checkpoints(session, project_id)
+        ranges = pending_ranges(session, project_id, version, only_stale)
+
+    progress(f"{len(ranges)} ranges of {CHUNK_SIZE} prompt ids to parse with {workers} worker(s) (version {version})")
+    parsed = written = 0
+    started = time.perf_counter()
+
+    def record(done: int, result: tuple[int, list[int], list[dict]]) -> None:
+        nonlocal parsed, written
+        start, prompt_ids, rows = result
+        write_range(project_id, start, prompt_ids, rows, version)
+        parsed += len(prompt_ids)
+        written += len(rows)
+        if done % PROGRESS_EVERY == 0 or done == len(ranges):
+            rate = parsed / (time.perf_counter() - started)
+            progress(f"  {done}/{len(ranges)} ranges, {parsed} prompts ({rate:.0f} prompts/s)")
+
+    tasks = [(project_id, start, only_stale) for start in ranges]
+    if workers == 1:
+        _init_worker(variations)
+        for done, task in enumerate(tasks, 1):
+            record(done, compute_range(*task))
+    else:
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(variations,)) as pool:
+            for done, result in enumerate(pool.imap_unordered(_compute_range_args, tasks), 1):
+                record(done, result)
+
+    with Session(engine) as session:
+        clear_checkpoints(session, project_id)
+        if ranges:
+            # Mentions changed, so suggestion signals must be recomputed
+            rebuild_signals(session, project_id)
+
+    return parsed, written
@@ -1,11 +1,23 @@
-from sqlmodel import SQLModel, Field, Relationship
-from typing import Optional
 from datetime import datetime
 
+from sqlalchemy import BigInteger, Column, ForeignKeyConstraint, Index, UniqueConstraint
+from sqlmodel import Field, Relationship, SQLModel
+
+DEFAULT_PROJECT_ID = "default"
+
+
+class Project(SQLModel, table=True):
+    """A client workspace; brands, prompts and citations are scoped to one project"""
+    id: str = Field(primary_key=True)  # e.g., 'default', 'acme'
+    name: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
 
 class Brand(SQLModel, table=True):
     """Brand being tracked (e.g., Shopify, WooCommerce)"""
+    # Brand ids are unique per project, so several projects can track 'shopify'
     id: str = Field(primary_key=True)  # e.g., 'shopify'
+    project_id: str = Field(default=DEFAULT_PROJECT_ID, primary_key=True, foreign_key="project.id")
     name: str
     type: str = "competitor"  # 'primary' or 'competitor'
     color: str
@@ -17,26 +29,64 @@ class Brand(SQLModel, table=True):
 
 class Prompt(SQLModel, table=True):
     """A single scrape/run of a query to Google AI Mode"""
+    __table_args__ = (
+        Index("ix_prompt_project_query", "project_id", "query"),
+        Index("ix_prompt_project_scraped_at", "project_id", "scraped_at"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
+    project_id: str = Field(default=DEFAULT_PROJECT_ID, foreign_key="project.id")
     query: str  # Not unique - multiple runs of same query allowed
     run_number: int = 1  # Which run/pass this is (1, 2, 3, etc.)
-    response_text: str | None = None
+    # sha256 of the AI response body stored in ResponseBlob (see responses.py)
+    response_hash: str | None = Field(default=None, foreign_key="responseblob.hash", index=True)
     scraped_at: datetime = Field(default_factory=datetime.utcnow)
+    # Version of the brand matcher its mentions were parsed with (answer_parser.matcher_version);
+    # NULL if they were supplied rather than parsed. Differs from the current version when stale
+    matcher_version: str | None = None
 
     # Relationships
     brand_mentions: list["PromptBrandMention"] = Relationship(back_populates="prompt")
     sources: list["PromptSource"] = Relationship(back_populates="prompt")
 
 
+class ResponseBlob(SQLModel, table=True):
+    """Compressed AI response body, stored once per distinct text"""
+    id: int | None = Field(default=None, primary_key=True)
+    hash: str = Field(unique=True)  # sha256 of the UTF-8 text
+    codec: str  # 'zstd' or 'zlib'
+    size: int  # Uncompressed size in bytes
+    data: bytes
+    minhash: bytes | None = None  # Packed MinHash signature (see similarity.py)
+
+
+class ResponseBand(SQLModel, table=True):
+    """LSH bucket of one band of a response's MinHash signature"""
+    __table_args__ = {"sqlite_with_rowid": False}  # The key is the whole row
+
+    # Hash of the band number and the band's signature values; lookups are by bucket
+    bucket: int = Field(sa_column=Column(BigInteger, primary_key=True))
+    blob_id: int = Field(primary_key=True, foreign_key="responseblob.id")
+
+
 class PromptBrandMention(SQLModel, table=True):
     """Records which brands are mentioned in which prompts"""
+    __table_args__ = (
+        ForeignKeyConstraint(["brand_id", "project_id"], ["brand.id", "brand.project_id"]),
+        Index("ix_promptbrandmention_project_brand", "project_id", "brand_id"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
-    prompt_id: int = Field(foreign_key="prompt.id")
-    brand_id: str = Field(foreign_key="brand.id")
+    prompt_id: int = Field(foreign_key="prompt.id", index=True)
+    brand_id: str
+    project_id: str = DEFAULT_PROJECT_ID  # Same as the prompt's project
     mentioned: bool = False
     position: int | None = None  # 1=first, 2=second, etc. NULL if not mentioned
     sentiment: str | None = None  # 'positive', 'neutral', 'negative'
+    sentiment_score: float | None = None  # -1 (negative) to 1 (positive), see sentiment.py
     context: str | None = None  # Excerpt where brand is mentioned
+    section: str | None = None  # Heading of the answer section it is ranked in (see answer_parser.py)
+    mention_count: int | None = None  # Times the brand is mentioned in the answer
 
     # Relationships
     prompt: Prompt = Relationship(back_populates="brand_mentions")
@@ -44,13 +94,14 @@ class PromptBrandMention(SQLModel, table=True):
 
 
 class Source(SQLModel, table=True):
-    """A source website cited by Google AI Mode"""
+    """A source website cited by Google AI Mode (shared across projects, unique by URL)"""
     id: int | None = Field(default=None, primary_key=True)
     domain: str  # e.g., "shopify.com"
     url: str = Field(unique=True)
     title: str | None = None
     description: str | None = None  # Snippet from Google
     published_date: str | None = None  # e.g., "24 Oct 2025"
+    source_type: str | None = Field(default=None, index=True)  # 'brand', 'blog', 'community', ... (see classification.py)
 
     # Relationships
     prompt_links: list["PromptSource"] = Relationship(back_populates="source")
@@ -58,11 +109,126 @@ class Source(SQLModel, table=True):
 
 class PromptSource(SQLModel, table=True):
     """Links prompts to their cited sources"""
+    __table_args__ = (
+        Index("ix_promptsource_project_source", "project_id", "source_id"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
-    prompt_id: int = Field(foreign_key="prompt.id")
+    prompt_id: int = Field(foreign_key="prompt.id", index=True)
     source_id: int = Field(foreign_key="source.id")
+    project_id: str = Field(default=DEFAULT_PROJECT_ID, foreign_key="project.id")  # Same as the prompt's project
     citation_order: int  # Order of appearance in sources list
 
     # Relationships
     prompt: Prompt = Relationship(back_populates="sources")
     source: Source = Relationship(back_populates="prompt_links")
+
+
+class QuerySignal(SQLModel, table=True):
+    """Per-query, per-month brand coverage (precomputed for suggestions)"""
+    __table_args__ = (UniqueConstraint("project_id", "query", "month"),)
+
+    id: int | None = Field(default=None, primary_key=True)
+    project_id: str = Field(default=DEFAULT_PROJECT_ID, index=True)
+    query: str
+    month: str  # "YYYY-MM" of scraped_at
+    runs: int = 0
+    primary_runs: int = 0  # Runs mentioning a primary brand
+    competitor_runs: int = 0  # Runs mentioning at least one competitor
+    is_comparison: bool = False  # Query compares/ranks platforms ("best", "vs", ...)
+
+
+class DomainSignal(SQLModel, table=True):
+    """Citation counts per domain split by whether the primary brand was mentioned"""
+    project_id: str = Field(default=DEFAULT_PROJECT_ID, primary_key=True)
+    domain: str = Field(primary_key=True)
+    citations: int = 0
+    primary_citations: int = 0  # Citations in runs mentioning a primary brand
+    competitor_only_citations: int = 0  # Citations in runs mentioning only competitors
+
+
+class SourceTypeSignal(SQLModel, table=True):
+    """Source and citation counts per source type"""
+    project_id: str = Field(default=DEFAULT_PROJECT_ID, primary_key=True)
+    source_type: str = Field(primary_key=True)
+    sources: int = 0  # Distinct sources cited by the project
+    citations: int = 0
+    primary_citations: int = 0
+
+
+class MentionSyncCheckpoint(SQLModel, table=True):
+    """Prompt-id range whose mentions an unfinished re-sync already rewrote (see mention_sync.py)"""
+    project_id: str = Field(primary_key=True)
+    range_start: int = Field(primary_key=True)  # First prompt id of the range
+    version: str  # Fingerprint of the brands and lexicon the range was parsed with
+    completed_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class BrandRematch(SQLModel, table=True):
+    """A brand edit whose mentions are being re-matched in the background (see rematch.py)"""
+    id: int | None = Field(default=None, primary_key=True)
+    project_id: str = Field(index=True)
+    brand_id: str
+    # New name and variations, applied to the brand when the re-matched mentions are swapped in
+    name: str
+    variations: str
+    previous_version: str  # Project matcher version the re-match started from
+    last_prompt_id: int  # Prompts ingested after it are re-parsed at swap time
+    status: str = "running"  # 'running', 'done', 'superseded', 'failed'
+    parsed: int = 0
+    total: int = 0
+    error: str | None = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: datetime | None = None
+
+
+class StagedMention(SQLModel, table=True):
+    """Mention row parsed by a running BrandRematch, swapped into PromptBrandMention (see rematch.py)"""
+    id: int | None = Field(default=None, primary_key=True)
+    rematch_id: int = Field(foreign_key="brandrematch.id", index=True)
+    prompt_id: int
+    brand_id: str
+    project_id: str
+    mentioned: bool = False
+    position: int | None = None
+    sentiment: str | None = None
+    sentiment_score: float | None = None
+    context: str | None = None
+    section: str | None = None
+    mention_count: int | None = None
+
+
+class Job(SQLModel, table=True):
+    """Unit of background work in the job queue (see jobs.py)"""
+    __table_args__ = (
+        Index("ix_job_status_priority", "status", "priority", "id"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    kind: str  # Handler name, e.g. 'scrape', 'resync_mentions'
+    payload: str = "{}"  # JSON arguments of the handler
+    # Deduplication key: no second unfinished job with the same key is enqueued
+    key: str | None = Field(default=None, index=True)
+    priority: int = 0  # Higher runs first
+    status: str = "queued"  # 'queued', 'running', 'done', 'failed', 'cancelled'
+    attempts: int = 0
+    max_attempts: int = 3
+    run_after: datetime = Field(default_factory=datetime.utcnow)  # Not claimed before (retry back-off)
+    lease_owner: str | None = None  # Worker holding the job while running
+    lease_expires_at: datetime | None = None  # A job whose lease runs out is retried
+    error: str | None = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+
+class ScraperSession(SQLModel, table=True):
+    """Browser session of a scrape worker, with its CAPTCHA counts and quarantine (see scraper_sessions.py)"""
+    id: str = Field(primary_key=True)  # Host and worker slot, e.g. 'scraper-1:0'
+    scrapes: int = 0  # Scrape attempts, CAPTCHAs included
+    captchas: int = 0
+    consecutive_captchas: int = 0  # Since the last scrape without one; sets the cool-down
+    quarantined_until: datetime | None = None  # Claims no scrape jobs before
+    last_captcha_at: datetime | None = None
+    recycles: int = 0  # Browser restarts for its query count or memory (GoogleAIScraper.recycle_if_needed)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
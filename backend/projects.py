@@ -0,0 +1,30 @@
+"""
+Project (workspace) scoping.
+
+Every data endpoint takes an optional ?project=<id> query parameter (default
+"default") and only reads rows belonging to that project.
+"""
+
+from fastapi import Depends, HTTPException, Query
+from sqlmodel import Session
+
+from database import get_session
+from models import DEFAULT_PROJECT_ID, Project
+
+
+def get_project(
+    project: str = Query(DEFAULT_PROJECT_ID, description="Project (workspace) id"),
+    session: Session = Depends(get_session),
+) -> Project:
+    """FastAPI dependency resolving the requested project"""
+    existing = session.get(Project, project)
+    if not existing:
+        raise HTTPException(status_code=404, detail=f"Project '{project}' not found")
+    return existing
+
+
+def ensure_default_project(session: Session) -> None:
+    """Create the default project used by single-workspace deployments"""
+    if not session.get(Project, DEFAULT_PROJECT_ID):
+        session.add(Project(id=DEFAULT_PROJECT_ID, name="Default"))
+        session.commit()
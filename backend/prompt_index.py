@@ -0,0 +1,69 @@
+"""
+Lightweight prompt index.
+
+Most endpoints only need to know which prompts exist: their query, run
+number and scrape date. PromptRow holds just those columns (plus the
+response hash, for the few callers that then load the body), fetched with a
+single column select, so no ORM instances or identity-map entries are built
+for scans over every prompt of a project.
+
+Queries are addressed in the API as "query-N", N being the 1-based position
+of the query in alphabetical order.
+"""
+
+from collections.abc import Iterable
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlmodel import Session, select
+
+from models import Prompt
+
+QUERY_ID_PREFIX = "query-"
+
+
+class PromptRow(NamedTuple):
+    id: int
+    query: str
+    run_number: int
+    scraped_at: datetime | None
+    response_hash: str | None
+
+    @property
+    def month(self) -> str | None:
+        """Scrape month as YYYY-MM"""
+        return self.scraped_at.strftime("%Y-%m") if self.scraped_at else None
+
+
+def load_prompt_index(session: Session, project_id: str, by_query: bool = False) -> list[PromptRow]:
+    """The project's prompts in id order, or sorted by query then run number"""
+    order = (Prompt.query, Prompt.run_number) if by_query else (Prompt.id,)
+    rows = session.exec(
+        select(Prompt.id, Prompt.query, Prompt.run_number, Prompt.scraped_at, Prompt.response_hash)
+        .where(Prompt.project_id == project_id)
+        .order_by(*order)
+    )
+    return [PromptRow(*row) for row in rows]
+
+
+def in_month(prompts: Iterable[PromptRow], month: str) -> list[PromptRow]:
+    """Prompts scraped in a YYYY-MM month"""
+    return [p for p in prompts if p.month == month]
+
+
+def group_by_query(prompts: Iterable[PromptRow]) -> dict[str, list[PromptRow]]:
+    """Runs per query, keeping the order in which queries first appear"""
+    grouped: dict[str, list[PromptRow]] = {}
+    for prompt in prompts:
+        grouped.setdefault(prompt.query, []).append(prompt)
+    return grouped
+
+
+def format_query_id(position: int) -> str:
+    """API id of the query at a 1-based position"""
+    return f"{QUERY_ID_PREFIX}{position}"
+
+
+def parse_query_id(query_id: str) -> int:
+    """1-based position from an API query id ("query-3", or legacy "prompt-3"); ValueError if malformed"""
+    return int(query_id.replace(QUERY_ID_PREFIX, "").replace("prompt-", ""))
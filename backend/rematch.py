@@ -0,0 +1,262 @@
+"""
+Online re-matching of a brand's mentions after its name or variations change.
+
+PATCH /api/brands/{id} records a BrandRematch, queues a job for it (see
+jobs.py) and returns at once; run_rematch() then does the work:
+
+1. The prompts whose mentions can change (mention_sync.brand_candidates)
+   are parsed with the new variations in chunks of CHUNK_SIZE prompts, each
+   chunk written to StagedMention in its own short transaction. Prompts whose
+   mentions were supplied (no matcher version) are not re-ranked: only the
+   edited brand's own row is staged for them. Readers keep seeing the old
+   PromptBrandMention rows meanwhile.
+2. The swap is a single transaction: runs ingested since the re-match
+   started are parsed too, the brand gets its new name and variations, the
+   candidates' mentions (the brand's row only, for supplied ones) are
+   replaced by the staged rows and matcher versions are moved on. Readers
+   see either the old mentions or the new ones.
+
+A newer edit of the same brand supersedes a running re-match (it stops at
+its next chunk). If another brand of the project is added, edited or removed
+meanwhile, the staged rows are discarded and parsing starts over. On any
+error the old mentions and variations stay in place and the re-match is
+marked failed; a job interrupted mid-way is retried from the start.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import delete, insert, or_, update
+from sqlmodel import Session, func, select
+
+from answer_parser import BrandMatcher, brand_variations
+from database import engine
+from jobs import unfinished_job
+from mention_sync import (
+    CHUNK_SIZE,
+    MENTION_COLUMNS,
+    brand_candidates,
+    parse_mentions,
+    project_matcher,
+)
+from models import Brand, BrandRematch, Prompt, PromptBrandMention, StagedMention
+from signals import rebuild_signals
+
+RUNNING = "running"
+DONE = "done"
+SUPERSEDED = "superseded"
+FAILED = "failed"
+
+_STAGED_COLUMNS = ("prompt_id", "project_id") + MENTION_COLUMNS
+
+
+def _last_prompt_id(session: Session, project_id: str) -> int:
+    return session.exec(select(func.max(Prompt.id)).where(Prompt.project_id == project_id)).one() or 0
+
+
+def _discard(session: Session, rematch: BrandRematch) -> None:
+    session.exec(delete(StagedMention).where(StagedMention.rematch_id == rematch.id))
+
+
+def _finish(session: Session, rematch: BrandRematch, status: str, error: str | None = None) -> None:
+    _discard(session, rematch)
+    rematch.status = status
+    rematch.error = error
+    rematch.finished_at = datetime.utcnow()
+    session.add(rematch)
+    session.commit()
+
+
+def start_rematch(session: Session, brand: Brand, name: str, variations: str) -> BrandRematch:
+    """Record an edit of a brand's name/variations, superseding any running one; run_rematch() applies it"""
+    running = session.exec(
+        select(BrandRematch).where(
+            BrandRematch.project_id == brand.project_id,
+            BrandRematch.brand_id == brand.id,
+            BrandRematch.status == RUNNING,
+        )
+    ).all()
+    for previous in running:
+        _discard(session, previous)
+        previous.status = SUPERSEDED
+        previous.finished_at = datetime.utcnow()
+        session.add(previous)
+
+    rematch = BrandRematch(
+        project_id=brand.project_id,
+        brand_id=brand.id,
+        name=name,
+        variations=variations,
+        previous_version=project_matcher(session, brand.project_id).version,
+        last_prompt_id=_last_prompt_id(session, brand.project_id),
+    )
+    session.add(rematch)
+    session.commit()
+    session.refresh(rematch)
+    return rematch
+
+
+def latest_rematch(session: Session, project_id: str, brand_id: str) -> BrandRematch | None:
+    return session.exec(
+        select(BrandRematch)
+        .where(BrandRematch.project_id == project_id, BrandRematch.brand_id == brand_id)
+        .order_by(BrandRematch.id.desc())
+        .limit(1)
+    ).first()
+
+
+def _edited_matcher(session: Session, rematch: BrandRematch) -> BrandMatcher | None:
+    """Matcher over the project's brands with the edited brand's new variations (None if it was deleted)"""
+    brands = session.exec(select(Brand).where(Brand.project_id == rematch.project_id)).all()
+    variations = brand_variations(brands)
+    if rematch.brand_id not in variations:
+        return None
+    variations.update(brand_variations([Brand(id=rematch.brand_id, name=rematch.name, variations=rematch.variations)]))
+    return BrandMatcher(variations)
+
+
+def _candidates(session: Session, rematch: BrandRematch, last_prompt_id: int | None = None,
+                supplied: bool = False) -> list[tuple[int, str | None]]:
+    """Parsed (or supplied) prompts whose mentions of the edited brand can change"""
+    variations = brand_variations([Brand(id=rematch.brand_id, name=rematch.name, variations=rematch.variations)])
+    return brand_candidates(
+        session, rematch.project_id, rematch.brand_id, variations[rematch.brand_id], last_prompt_id, supplied,
+    )
+
+
+def _stage(session: Session, rematch: BrandRematch, rows: list[dict], supplied: bool = False) -> None:
+    """Stage parsed mention rows; of prompts with supplied mentions, only the edited brand's"""
+    if supplied:
+        rows = [row for row in rows if row["brand_id"] == rematch.brand_id]
+    if rows:
+        session.execute(insert(StagedMention.__table__), [{"rematch_id": rematch.id, **row} for row in rows])
+
+
+def _swap(session: Session, rematch: BrandRematch, matcher: BrandMatcher) -> None:
+    """Apply the edit and swap the staged mentions in, in one transaction"""
+    brand = session.get(Brand, (rematch.brand_id, rematch.project_id))
+    brand.name = rematch.name
+    brand.variations = rematch.variations
+    session.add(brand)
+    # Write first, so runs ingested from here on wait for the swap and use the new variations
+    session.flush()
+
+    late = session.exec(
+        select(Prompt.id, Prompt.response_hash).where(
+            Prompt.project_id == rematch.project_id,
+            Prompt.id > rematch.last_prompt_id,
+            Prompt.matcher_version.is_not(None),
+        )
+    ).all()
+    _, rows = parse_mentions(session, rematch.project_id, late, matcher)
+    _stage(session, rematch, rows)
+    late_supplied = [
+        (prompt_id, digest) for prompt_id, digest in _candidates(session, rematch, supplied=True)
+        if prompt_id > rematch.last_prompt_id
+    ]
+    _, rows = parse_mentions(session, rematch.project_id, late_supplied, matcher)
+    _stage(session, rematch, rows, supplied=True)
+
+    conn = session.connection()
+    # Runs current under the old matcher that cannot contain the brand keep their mentions
+    conn.execute(
+        update(Prompt)
+        .where(Prompt.project_id == rematch.project_id, Prompt.matcher_version == rematch.previous_version)
+        .values(matcher_version=matcher.version)
+    )
+    staged_prompts = select(StagedMention.prompt_id).where(StagedMention.rematch_id == rematch.id)
+    parsed_prompts = select(Prompt.id).where(Prompt.id.in_(staged_prompts), Prompt.matcher_version.is_not(None))
+    # Supplied mentions only have the brand's own row replaced
+    conn.execute(delete(PromptBrandMention).where(
+        PromptBrandMention.prompt_id.in_(staged_prompts),
+        or_(PromptBrandMention.prompt_id.in_(parsed_prompts), PromptBrandMention.brand_id == rematch.brand_id),
+    ))
+    conn.execute(insert(PromptBrandMention.__table__).from_select(
+        _STAGED_COLUMNS,
+        select(*(getattr(StagedMention, column) for column in _STAGED_COLUMNS))
+        .where(StagedMention.rematch_id == rematch.id),
+    ))
+    conn.execute(
+        update(Prompt)
+        .where(Prompt.id.in_(staged_prompts), Prompt.matcher_version.is_not(None))
+        .values(matcher_version=matcher.version)
+    )
+    _finish(session, rematch, DONE)
+
+
+def _run_once(session: Session, rematch: BrandRematch) -> bool:
+    """Stage the candidates' mentions and swap them in; False if the project's brands changed meanwhile"""
+    matcher = _edited_matcher(session, rematch)
+    if matcher is None:
+        _finish(session, rematch, FAILED, "Brand was deleted")
+        return True
+
+    chunks = []
+    for supplied in (False, True):
+        prompts = _candidates(session, rematch, rematch.last_prompt_id, supplied)
+        chunks += [(prompts[offset:offset + CHUNK_SIZE], supplied) for offset in range(0, len(prompts), CHUNK_SIZE)]
+    rematch.total = sum(len(chunk) for chunk, _ in chunks)
+    rematch.parsed = 0
+    session.add(rematch)
+    session.commit()
+
+    for chunk, supplied in chunks:
+        _, rows = parse_mentions(session, rematch.project_id, chunk, matcher)
+        session.refresh(rematch)
+        if rematch.status != RUNNING:
+            # Superseded by a newer edit
+            _discard(session, rematch)
+            session.commit()
+            return True
+        _stage(session, rematch, rows, supplied)
+        rematch.parsed += len(chunk)
+        session.add(rematch)
+        session.commit()
+
+    session.refresh(rematch)
+    if rematch.status != RUNNING:
+        _discard(session, rematch)
+        session.commit()
+        return True
+
+    current_version = project_matcher(session, rematch.project_id).version
+    if current_version != rematch.previous_version:
+        # Another brand was added, edited or removed: the staged rows ranked the wrong brand set
+        _discard(session, rematch)
+        rematch.previous_version = current_version
+        rematch.last_prompt_id = _last_prompt_id(session, rematch.project_id)
+        session.add(rematch)
+        session.commit()
+        return False
+
+    _swap(session, rematch, matcher)
+    # Mentions changed, so suggestion signals must be recomputed
+    rebuild_signals(session, rematch.project_id)
+    return True
+
+
+def run_rematch(rematch_id: int) -> None:
+    """Job handler: re-match the brand of a BrandRematch and swap the result in"""
+    with Session(engine) as session:
+        rematch = session.get(BrandRematch, rematch_id)
+        try:
+            # A retried job starts over
+            _discard(session, rematch)
+            session.commit()
+            while rematch.status == RUNNING and not _run_once(session, rematch):
+                pass
+        except Exception as exc:
+            session.rollback()
+            _finish(session, session.get(BrandRematch, rematch_id), FAILED, str(exc))
+            raise
+
+
+def rematch_job_key(rematch_id: int) -> str:
+    return f"rematch:{rematch_id}"
+
+
+def fail_interrupted_rematches(engine) -> None:
+    """Mark running re-matches whose job is gone (failed for good) as failed; their old mentions are still in place"""
+    with Session(engine) as session:
+        for rematch in session.exec(select(BrandRematch).where(BrandRematch.status == RUNNING)).all():
+            if unfinished_job(session, rematch_job_key(rematch.id)) is None:
+                _finish(session, rematch, FAILED, "Interrupted by a restart")
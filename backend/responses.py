@@ -0,0 +1,132 @@
+"""
+Content-addressed storage for AI response bodies.
+
+Response text is stored once per distinct body in ResponseBlob, compressed,
+and prompts only keep its sha256 (Prompt.response_hash). Runs that return the
+same answer share one row, and prompt scans never read text.
+
+Compression uses zstd when the zstandard package is installed and falls back
+to zlib otherwise; the codec is recorded per blob so both can be read back.
+"""
+
+import hashlib
+import zlib
+from collections.abc import Iterable
+
+from sqlalchemy import inspect, text
+from sqlmodel import Session, select
+
+from models import ResponseBlob
+
+try:
+    import zstandard
+except ImportError:  # Optional: zlib is used instead
+    zstandard = None
+
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 9
+MIGRATION_BATCH_SIZE = 500
+
+
+def response_hash(response_text: str) -> str:
+    return hashlib.sha256(response_text.encode("utf-8")).hexdigest()
+
+
+def compress(response_text: str) -> tuple[str, bytes]:
+    """(codec, compressed bytes)"""
+    raw = response_text.encode("utf-8")
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return "zlib", zlib.compress(raw, ZLIB_LEVEL)
+
+
+def decompress(codec: str, data: bytes) -> str:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Response stored with zstd but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    if codec == "zlib":
+        return zlib.decompress(data).decode("utf-8")
+    raise ValueError(f"Unknown response codec: {codec}")
+
+
+def store_response(session: Session, response_text: str | None) -> str | None:
+    """
+    Store a response body (once) and return its hash for Prompt.response_hash.
+
+    New bodies are added to the full-text and similarity indexes; the caller commits.
+    """
+    from search import index_response
+    from similarity import index_similarity
+
+    if response_text is None:
+        return None
+
+    digest = response_hash(response_text)
+    exists = session.exec(select(ResponseBlob.id).where(ResponseBlob.hash == digest)).first()
+    if exists is None:
+        codec, data = compress(response_text)
+        blob = ResponseBlob(hash=digest, codec=codec, size=len(response_text.encode("utf-8")), data=data)
+        session.add(blob)
+        session.flush()
+        index_response(session, blob.id, response_text)
+        index_similarity(session, blob, response_text)
+    return digest
+
+
+def load_responses(session: Session, hashes: Iterable[str | None]) -> dict[str, str]:
+    """Decompressed bodies for the given hashes (each distinct body is read once)"""
+    wanted = {h for h in hashes if h}
+    if not wanted:
+        return {}
+    rows = session.exec(
+        select(ResponseBlob.hash, ResponseBlob.codec, ResponseBlob.data).where(ResponseBlob.hash.in_(wanted))
+    )
+    return {digest: decompress(codec, data) for digest, codec, data in rows}
+
+
+def load_response(session: Session, digest: str | None) -> str | None:
+    return load_responses(session, [digest]).get(digest)
+
+
+def has_inline_responses(engine) -> bool:
+    """Whether the database still keeps response text in the legacy prompt.response_text column"""
+    return "response_text" in {col["name"] for col in inspect(engine).get_columns("prompt")}
+
+
+def migrate_inline_responses(engine) -> int:
+    """
+    Move text from the legacy prompt.response_text column into blobs, then drop it.
+
+    Irreversible, so only scripts/migrate_response_blobs.py runs it.
+    Returns the number of prompts migrated (0 when there is nothing to do).
+    """
+    from search import ensure_search_index
+
+    if not has_inline_responses(engine):
+        return 0
+
+    migrated = 0
+    with Session(engine) as session:
+        while True:
+            rows = session.execute(text(
+                "SELECT id, response_text FROM prompt "
+                "WHERE response_text IS NOT NULL AND response_hash IS NULL "
+                "ORDER BY id LIMIT :limit"
+            ), {"limit": MIGRATION_BATCH_SIZE}).all()
+            if not rows:
+                break
+            for prompt_id, response_text in rows:
+                session.execute(
+                    text("UPDATE prompt SET response_hash = :hash WHERE id = :id"),
+                    {"hash": store_response(session, response_text), "id": prompt_id},
+                )
+            session.commit()
+            migrated += len(rows)
+
+    with engine.begin() as conn:
+        # The Postgres search column is generated from response_text and goes with it
+        cascade = " CASCADE" if engine.dialect.name == "postgresql" else ""
+        conn.execute(text(f"ALTER TABLE prompt DROP COLUMN response_text{cascade}"))
+    ensure_search_index(engine)
+    return migrated
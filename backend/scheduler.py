@@ -0,0 +1,205 @@
+"""
+Scheduling of recurring scrapes.
+
+Each tracked query (every query a project has runs for) should get a target
+number of runs per month. schedule_scrapes() counts, per query, the runs
+already ingested this month and the scrape jobs still unfinished for it,
+queues only the missing runs as 'scrape' jobs (see jobs.py), cancels queued
+ones that runs ingested meanwhile made unnecessary, and spreads
+their run_after times, together with those of the month's jobs still
+queued, over the rest of the month:
+
+- The missing runs are ordered round-robin (every query's first missing run,
+  then every second one, ...), so each query's runs are spread over the
+  month too.
+- They get evenly spaced slots, each pushed back by a random jitter; slots
+  are never closer than the scraper's minimum delay between queries, and the
+  jitter never exceeds the span between its minimum and maximum delay
+  (ScraperSettings.min_delay_seconds / max_delay_seconds). Missing runs that
+  do not fit in the window at the minimum delay are left for the next pass.
+
+Workers only claim a job once its run_after has passed, so queued scrapes
+are spread over the month instead of run in one burst. The 'schedule_scrapes'
+job kind plans a project and queues its own next pass (SCHEDULE_INTERVAL later).
+"""
+
+import json
+import random
+from collections.abc import Iterable, Mapping
+from datetime import datetime, timedelta
+from itertools import count
+from typing import NamedTuple
+
+from sqlmodel import Session, func, select
+
+from jobs import CANCELLED, QUEUED, UNFINISHED, enqueue, use_scraper_package
+from models import Job, Prompt
+
+SCHEDULE_INTERVAL = timedelta(days=1)
+
+
+class ScheduledRun(NamedTuple):
+    query: str
+    run: int  # Run of the query in the month (1 = first)
+    run_after: datetime
+
+
+def month_bounds(month: str) -> tuple[datetime, datetime]:
+    """[start, end) of a YYYY-MM month"""
+    start = datetime.strptime(month, "%Y-%m")
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+def spread_runs(missing: Mapping[str, Iterable[int]], start: datetime, end: datetime,
+                min_delay: float, max_delay: float, seed: int | None = None) -> list[ScheduledRun]:
+    """
+    Slots in [start, end) for the missing runs of each query, at least
+    min_delay seconds apart (runs that do not fit are left out).
+    """
+    runs_by_query = {query: sorted(runs) for query, runs in missing.items()}
+    ordered = [
+        (query, runs[index])
+        for index in range(max((len(runs) for runs in runs_by_query.values()), default=0))
+        for query, runs in runs_by_query.items()
+        if index < len(runs)
+    ]
+    window = (end - start).total_seconds()
+    if not ordered or window <= 0:
+        return []
+
+    fit = len(ordered) if min_delay <= 0 else min(len(ordered), int(window // min_delay))
+    interval = window / fit if fit else 0
+    jitter = max(0.0, min(interval - min_delay, max_delay - min_delay))
+    rng = random.Random(seed)
+    return [
+        ScheduledRun(query, run, start + timedelta(seconds=slot * interval + rng.uniform(0, jitter)))
+        for slot, (query, run) in enumerate(ordered[:fit])
+    ]
+
+
+def delay_bounds() -> tuple[int, int]:
+    """The scraper's (min, max) delay between queries in seconds (ScraperSettings, SCRAPER_* env vars)"""
+    use_scraper_package()
+    from config.settings import ScraperSettings
+
+    scraper_settings = ScraperSettings()
+    return scraper_settings.min_delay_seconds, scraper_settings.max_delay_seconds
+
+
+def tracked_queries(session: Session, project_id: str) -> list[str]:
+    return session.exec(
+        select(Prompt.query).where(Prompt.project_id == project_id).distinct().order_by(Prompt.query)
+    ).all()
+
+
+def scrape_job_key(project_id: str, month: str, run: int, query: str) -> str:
+    return f"scrape:{project_id}:{month}:{run}:{query}"
+
+
+class ScheduleResult(NamedTuple):
+    queued: list[Job]  # New scrape jobs
+    moved: int  # Queued scrape jobs given a new slot
+    cancelled: int  # Queued scrape jobs no longer needed (the month's runs were ingested otherwise)
+    left_out: int  # Runs (missing or queued) without a slot: they do not fit in the month
+
+
+def unfinished_scrapes(session: Session, project_id: str, month: str) -> dict[tuple[str, int], Job]:
+    """The month's scheduled scrape jobs not finished yet, by (query, run)"""
+    prefix = f"scrape:{project_id}:{month}:"
+    jobs = session.exec(
+        select(Job).where(Job.kind == "scrape", Job.status.in_(UNFINISHED), Job.key.startswith(prefix))
+    ).all()
+    result = {}
+    for job in jobs:
+        run, query = job.key[len(prefix):].split(":", 1)
+        result[query, int(run)] = job
+    return result
+
+
+def ingested_runs(session: Session, project_id: str, month: str) -> dict[str, int]:
+    """Runs of each query scraped in the month"""
+    start, end = month_bounds(month)
+    return dict(session.exec(
+        select(Prompt.query, func.count(Prompt.id))
+        .where(Prompt.project_id == project_id, Prompt.scraped_at >= start, Prompt.scraped_at < end)
+        .group_by(Prompt.query)
+    ).all())
+
+
+def schedule_scrapes(session: Session, project_id: str, runs_per_month: int, min_delay: float, max_delay: float,
+                     month: str | None = None, now: datetime | None = None, headless: bool = True,
+                     priority: int = 0) -> ScheduleResult:
+    """
+    Queue the runs the project's tracked queries still miss this month (or
+    another YYYY-MM month) and spread them, together with the month's
+    scrapes still queued, over what is left of it.
+    """
+    now = now or datetime.utcnow()
+    month = month or now.strftime("%Y-%m")
+    start, end = month_bounds(month)
+
+    unfinished = unfinished_scrapes(session, project_id, month)
+    ingested = ingested_runs(session, project_id, month)
+    # Queued jobs are re-spread with the new runs, so no two slots end up closer than min_delay
+    queued = {key: job for key, job in unfinished.items() if job.status == QUEUED}
+    runs: dict[str, list[int]] = {}
+    cancelled = 0
+    for query in tracked_queries(session, project_id):
+        scheduled = sorted(run for q, run in unfinished if q == query)
+        missing = runs_per_month - ingested.get(query, 0) - len(scheduled)
+        # Surplus jobs (runs were ingested by other scrapes) are dropped, latest first
+        for run in reversed(scheduled):
+            if missing >= 0:
+                break
+            if (query, run) in queued:
+                job = queued.pop((query, run))
+                job.status = CANCELLED
+                job.finished_at = now
+                session.add(job)
+                scheduled.remove(run)
+                cancelled += 1
+                missing += 1
+        # New runs take the lowest numbers no job of the query uses
+        free = (run for run in count(1) if run not in scheduled)
+        query_runs = [run for run in scheduled if (query, run) in queued]
+        query_runs += [next(free) for _ in range(max(missing, 0))]
+        if query_runs:
+            runs[query] = query_runs
+    planned = spread_runs(runs, max(start, now), end, min_delay, max_delay)
+
+    new_jobs = []
+    moved = 0
+    for run in planned:
+        job = queued.get((run.query, run.run))
+        if job:
+            job.run_after = run.run_after
+            session.add(job)
+            moved += 1
+        else:
+            new_jobs.append(Job(
+                kind="scrape",
+                payload=json.dumps({"query": run.query, "project_id": project_id, "headless": headless}),
+                key=scrape_job_key(project_id, month, run.run, run.query),
+                priority=priority,
+                run_after=run.run_after,
+            ))
+    session.add_all(new_jobs)
+    session.commit()
+    left_out = sum(len(query_runs) for query_runs in runs.values()) - len(planned)
+    return ScheduleResult(new_jobs, moved, cancelled, left_out)
+
+
+def schedule_job_key(project_id: str, day: datetime) -> str:
+    return f"schedule_scrapes:{project_id}:{day:%Y-%m-%d}"
+
+
+def schedule_recurring(session: Session, project_id: str, runs_per_month: int, headless: bool = True,
+                       run_after: datetime | None = None) -> Job:
+    """Queue a 'schedule_scrapes' pass for the project (one per day)"""
+    run_after = run_after or datetime.utcnow()
+    return enqueue(
+        session, "schedule_scrapes",
+        {"project_id": project_id, "runs_per_month": runs_per_month, "headless": headless},
+        key=schedule_job_key(project_id, run_after), run_after=run_after,
+    )
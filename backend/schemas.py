@@ -1,6 +1,5 @@
+
 from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
 
 
 class BrandResponse(BaseModel):
@@ -13,6 +12,7 @@ class BrandResponse(BaseModel):
     avgPosition: float  # Average position when mentioned
     trend: str  # 'up', 'down', 'stable'
     sentiment: str  # Most common sentiment
+    sentimentScore: float | None = None  # Mean sentiment score, -1 (negative) to 1 (positive)
 
 
 class PromptBrandMentionResponse(BaseModel):
@@ -45,6 +45,8 @@ class RunResponse(BaseModel):
     brands: list[PromptBrandMentionResponse]
     responseText: str | None
     sources: list[SourceInPromptResponse]
+    similarToPrevious: float | None = None  # % response similarity to the previous run
+    nearDuplicateRunIds: list[int] = []  # Other runs in the project with a near-identical response
 
 
 class PromptResponse(BaseModel):
@@ -58,9 +60,19 @@ class PromptResponse(BaseModel):
     brands: list[PromptBrandMentionResponse]  # Aggregated from latest run
 
 
+class MonthlyDriftResponse(BaseModel):
+    """Response similarity of a query's runs within a month and against the previous month"""
+    month: str  # e.g., "Jan 2026"
+    runs: int
+    stability: float | None  # % similarity between the month's runs (None with a single run)
+    drift: float | None  # % change from the previous month's responses (None for the first month)
+
+
 class PromptDetailResponse(PromptResponse):
     """Detailed prompt with all runs"""
     runs: list[RunResponse]
+    stability: float | None = None  # % similarity between runs of the same month
+    drift: list[MonthlyDriftResponse] = []
 
 
 class SourceResponse(BaseModel):
@@ -85,14 +97,10 @@ class DashboardMetricsResponse(BaseModel):
     avgPosition: MetricResponse
 
 
-class DailyVisibilityResponse(BaseModel):
-    """Daily visibility data for charts"""
-    date: str
-    shopify: float | None = None
-    woocommerce: float | None = None
-    bigcommerce: float | None = None
-    wix: float | None = None
-    squarespace: float | None = None
+class VisibilitySeriesResponse(BaseModel):
+    """Visibility over time for charts: one series per brand, aligned with dates"""
+    dates: list[str]
+    series: dict[str, list[float]]  # brand id -> visibility % per date
 
 
 # Sources Analytics schemas
@@ -175,6 +183,25 @@ class BrandCreate(BaseModel):
     variations: list[str] = []  # Search terms: ["Adobe Commerce", "Magento"]
 
 
+class BrandUpdate(BaseModel):
+    """Partial brand update; a new name or variations apply once mentions are re-matched"""
+    name: str | None = None
+    type: str | None = None
+    color: str | None = None
+    variations: list[str] | None = None
+
+
+class BrandRematchResponse(BaseModel):
+    """Progress of re-matching a brand's mentions after an edit"""
+    id: int
+    status: str  # 'running', 'done', 'superseded', 'failed'
+    name: str
+    variations: list[str]
+    parsed: int  # Prompts parsed so far
+    total: int  # Prompts that can mention the brand
+    error: str | None = None
+
+
 class BrandPromptDetail(BaseModel):
     """Prompt detail for brand analytics"""
     query: str
@@ -200,12 +227,61 @@ class BrandDetailResponse(BaseModel):
     avgPosition: float
     trend: str
     sentiment: str
+    sentimentScore: float | None = None
     totalMentions: int
     totalPrompts: int
     topPrompts: list[BrandPromptDetail]
     visibilityByMonth: list[BrandMonthlyVisibility]
 
 
+class BrandUpdateResponse(BaseModel):
+    """Brand as currently served (old name/variations until the re-match is done) and the re-match"""
+    brand: BrandDetailResponse
+    rematch: BrandRematchResponse | None = None
+
+
 class BrandListResponse(BaseModel):
     """List of all brands with details"""
     brands: list[BrandDetailResponse]
+
+
+# Project schemas
+class ProjectCreate(BaseModel):
+    """Create a new project (client workspace)"""
+    id: str  # lowercase, no spaces (e.g., "acme")
+    name: str
+
+
+class ProjectResponse(BaseModel):
+    """Project summary"""
+    id: str
+    name: str
+    createdAt: str
+
+
+# Search schemas
+class PromptSearchHit(BaseModel):
+    """A run whose query or response text matches the search"""
+    id: int  # Prompt (run) id
+    query: str
+    runNumber: int
+    scrapedAt: str
+    snippet: str  # Escaped HTML excerpt, matched terms wrapped in <mark></mark>
+    score: float  # Higher is more relevant
+
+
+class SourceSearchHit(BaseModel):
+    """A cited source whose title, description or domain matches the search"""
+    id: int
+    domain: str
+    url: str
+    title: str | None
+    snippet: str
+    score: float
+
+
+class SearchResponse(BaseModel):
+    """Full-text search results, best matches first"""
+    query: str
+    prompts: list[PromptSearchHit]
+    sources: list[SourceSearchHit]
@@ -0,0 +1,89 @@
+"""
+Brand visibility scoring.
+
+Primary brands are the brands with Brand.type == "primary" (there may be
+several). Mentions are loaded once per request into a MentionIndex keyed by
+prompt id and brand id, so scoring a prompt is a dictionary lookup rather
+than a query or a scan over its mentions.
+"""
+
+from collections.abc import Iterable
+from typing import NamedTuple
+
+from sqlmodel import Session, select
+
+from models import Brand, PromptBrandMention
+
+# Position 1 = 100%, position 2 = 80%, position 3 = 60%, ...
+POSITION_PENALTY = 20
+
+
+class MentionRow(NamedTuple):
+    mentioned: bool
+    position: int | None
+    sentiment: str | None
+
+
+def primary_brand_ids(session: Session, project_id: str) -> set[str]:
+    """Ids of all brands configured as primary in a project"""
+    return set(session.exec(
+        select(Brand.id).where(Brand.project_id == project_id, Brand.type == "primary")
+    ).all())
+
+
+def visibility_for_position(position: int) -> float:
+    """Visibility score of a single run given the primary brand's position (0 = not mentioned)"""
+    if position <= 0:
+        return 0
+    return max(0, 100 - (position - 1) * POSITION_PENALTY)
+
+
+class MentionIndex:
+    """Brand mentions keyed by prompt id, then brand id"""
+
+    def __init__(self, rows: Iterable[tuple[int, str, bool, int | None, str | None]]):
+        self._by_prompt: dict[int, dict[str, MentionRow]] = {}
+        for prompt_id, brand_id, mentioned, position, sentiment in rows:
+            self._by_prompt.setdefault(prompt_id, {})[brand_id] = MentionRow(mentioned, position, sentiment)
+
+    @classmethod
+    def load(cls, session: Session, project_id: str, prompt_ids: Iterable[int] | None = None,
+             mentioned_only: bool = False) -> "MentionIndex":
+        """Load mentions for the given prompts (or all of the project's prompts) in one query"""
+        stmt = select(
+            PromptBrandMention.prompt_id,
+            PromptBrandMention.brand_id,
+            PromptBrandMention.mentioned,
+            PromptBrandMention.position,
+            PromptBrandMention.sentiment,
+        ).where(PromptBrandMention.project_id == project_id)
+        if prompt_ids is not None:
+            stmt = stmt.where(PromptBrandMention.prompt_id.in_(list(prompt_ids)))
+        if mentioned_only:
+            stmt = stmt.where(PromptBrandMention.mentioned.is_(True))
+        return cls(session.exec(stmt))
+
+    def for_prompt(self, prompt_id: int) -> dict[str, MentionRow]:
+        return self._by_prompt.get(prompt_id, {})
+
+    def get(self, prompt_id: int, brand_id: str) -> MentionRow | None:
+        return self._by_prompt.get(prompt_id, {}).get(brand_id)
+
+    def mentioned_brand_ids(self, prompt_id: int) -> set[str]:
+        return {brand_id for brand_id, m in self.for_prompt(prompt_id).items() if m.mentioned}
+
+    def primary_mentioned(self, prompt_id: int, primary_ids: set[str]) -> bool:
+        return not self.mentioned_brand_ids(prompt_id).isdisjoint(primary_ids)
+
+    def primary_position(self, prompt_id: int, primary_ids: set[str]) -> int:
+        """Best (lowest) position of any mentioned primary brand, or 0 if none is mentioned"""
+        mentions = self.for_prompt(prompt_id)
+        positions = [
+            mentions[brand_id].position or 0
+            for brand_id in primary_ids
+            if brand_id in mentions and mentions[brand_id].mentioned
+        ]
+        ranked = [p for p in positions if p > 0]
+        if ranked:
+            return min(ranked)
+        return 0
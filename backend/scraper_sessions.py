@@ -0,0 +1,149 @@
+"""
+Browser sessions of scrape workers and their CAPTCHA quarantine.
+
+A scrape worker keeps one GoogleAIScraper (its browser session) open across
+scrape jobs. The session is identified by the host and the worker's slot, so
+it keeps its counts and quarantine across restarts (ScraperSession).
+
+When Google shows a CAPTCHA the scraper raises CaptchaError at once. The
+session is then quarantined: its browser is closed and the worker claims no
+scrape jobs for CAPTCHA_COOLDOWN_SECONDS * 2 ** (consecutive CAPTCHAs - 1),
+at most MAX_COOLDOWN_SECONDS, while the query goes back to the queue for
+another session (jobs.RequeueError, which does not use up an attempt). A scrape
+without CAPTCHA resets the back-off. Scrape and CAPTCHA counts give each
+session's CAPTCHA rate (scripts/captcha_report.py).
+
+Each slot scrapes with its own persistent browser profile (worker-<slot>, see
+GoogleAIScraper), so cookies such as Google's consent survive browser
+restarts, and two workers never share a profile. The scraper restarts its
+browser after BROWSER_MAX_QUERIES_PER_BROWSER queries or past
+BROWSER_MAX_MEMORY_MB; the session counts these recycles too.
+"""
+
+import socket
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from database import engine
+from jobs import use_scraper_package
+from models import ScraperSession
+
+CAPTCHA_COOLDOWN_SECONDS = 300
+MAX_COOLDOWN_SECONDS = 6 * 3600
+
+# Session of this process (set by the worker) and its open scraper
+_slot = 0
+_session_id = f"{socket.gethostname()}:0"
+_scraper = None
+_quarantined_until: datetime | None = None
+_quarantine_loaded = False
+
+
+def use_slot(slot: int) -> None:
+    """Identify this process's session by the worker slot it runs in"""
+    global _slot, _session_id, _quarantine_loaded
+    _slot = slot
+    _session_id = f"{socket.gethostname()}:{slot}"
+    _quarantine_loaded = False
+
+
+def session_id() -> str:
+    return _session_id
+
+
+def profile_name() -> str:
+    """Browser profile of this process's slot"""
+    return f"worker-{_slot}"
+
+
+def get_scraper(headless: bool = True):
+    """This process's scraper, started on first use (or after being closed)"""
+    global _scraper
+    if _scraper is not None and _scraper.headless != headless:
+        close_scraper()
+    if _scraper is None:
+        use_scraper_package()
+        from scrapers.google_ai_scraper import GoogleAIScraper
+
+        scraper = GoogleAIScraper(headless=headless, profile=profile_name())
+        scraper.__enter__()
+        _scraper = scraper
+    return _scraper
+
+
+def close_scraper() -> None:
+    global _scraper
+    if _scraper is not None:
+        scraper, _scraper = _scraper, None
+        try:
+            scraper.__exit__(None, None, None)
+        except Exception as exc:
+            print(f"Closing the browser failed: {exc}")
+
+
+def cooldown(consecutive_captchas: int) -> timedelta:
+    return timedelta(seconds=min(CAPTCHA_COOLDOWN_SECONDS * 2 ** (consecutive_captchas - 1), MAX_COOLDOWN_SECONDS))
+
+
+def quarantined() -> bool:
+    """Whether this process's session is cooling down after a CAPTCHA"""
+    global _quarantined_until, _quarantine_loaded
+    if not _quarantine_loaded:
+        with Session(engine) as session:
+            row = session.get(ScraperSession, _session_id)
+        _quarantined_until = row.quarantined_until if row else None
+        _quarantine_loaded = True
+    return _quarantined_until is not None and _quarantined_until > datetime.utcnow()
+
+
+def _row(session: Session) -> ScraperSession:
+    row = session.get(ScraperSession, _session_id)
+    if row is None:
+        row = ScraperSession(id=_session_id)
+        session.add(row)
+        session.flush()
+    return row
+
+
+def record_scrape(captcha: bool = False, recycled: bool = False) -> ScraperSession:
+    """
+    Count a scrape attempt of this process's session (and whether its browser
+    was recycled first); a CAPTCHA quarantines it and closes its browser
+    """
+    global _quarantined_until, _quarantine_loaded
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        row = _row(session)
+        values = {"scrapes": ScraperSession.scrapes + 1}
+        if recycled:
+            values.update(recycles=ScraperSession.recycles + 1)
+        if captcha:
+            consecutive = row.consecutive_captchas + 1
+            values.update(
+                captchas=ScraperSession.captchas + 1,
+                consecutive_captchas=consecutive,
+                quarantined_until=now + cooldown(consecutive),
+                last_captcha_at=now,
+            )
+        else:
+            values.update(consecutive_captchas=0)
+        session.execute(update(ScraperSession).where(ScraperSession.id == _session_id).values(**values))
+        session.commit()
+        session.refresh(row)
+
+    _quarantined_until = row.quarantined_until if captcha else None
+    _quarantine_loaded = True
+    if captcha:
+        close_scraper()
+    return row
+
+
+def captcha_rate(row: ScraperSession) -> float | None:
+    """Share of the session's scrape attempts that hit a CAPTCHA"""
+    return row.captchas / row.scrapes if row.scrapes else None
+
+
+def list_sessions(session: Session) -> list[ScraperSession]:
+    return session.exec(select(ScraperSession).order_by(ScraperSession.id)).all()
@@ -0,0 +1,107 @@
+"""
+Throughput of the structured answer parser over the stored response corpus.
+
+Parses every stored response of a project (default: "default") with
+answer_parser.analyze_answer for all of the project's brands, and compares
+with the previous approach of one regex search per brand variation. Also
+reports how many stored positions the parser's ranking agrees with, and
+times sentiment scoring (sentiment.py) against the previous per-brand
+keyword scan.
+
+Usage: python scripts/benchmark_answer_parser.py [PROJECT_ID]
+"""
+
+import re
+import sys
+import time
+
+from sqlmodel import Session, select
+
+from answer_parser import BrandMatcher, analyze_answer, brand_mention_rows, brand_variations
+from database import create_db_and_tables, engine
+from models import DEFAULT_PROJECT_ID, Brand, PromptBrandMention
+from prompt_index import load_prompt_index
+from responses import load_responses
+from sentiment import DEFAULT_LEXICON
+
+REPEATS = 5
+
+
+def first_offset_ranks(text: str, variations_by_brand: dict[str, list[str]]) -> dict[str, int]:
+    """Previous heuristic: one search per variation, brands ranked by first offset"""
+    first = {}
+    for brand_id, variations in variations_by_brand.items():
+        offsets = [
+            match.start()
+            for variation in variations
+            if (match := re.search(r'\b' + re.escape(variation) + r'\b', text, re.IGNORECASE))
+        ]
+        if offsets:
+            first[brand_id] = min(offsets)
+    return {brand_id: rank for rank, brand_id in enumerate(sorted(first, key=first.get), 1)}
+
+
+def keyword_sentiments(text: str, variations_by_brand: dict[str, list[str]]) -> dict[str, str]:
+    """Previous heuristic: per brand, re-split the text and substring-search every lexicon word"""
+    result = {}
+    for brand_id, variations in variations_by_brand.items():
+        sentences = [
+            sentence.lower() for sentence in re.split(r'[.!?\n]', text)
+            if any(variation.lower() in sentence.lower() for variation in variations)
+        ]
+        positive = sum(word in sentence for sentence in sentences for word in DEFAULT_LEXICON["positive"])
+        negative = sum(word in sentence for sentence in sentences for word in DEFAULT_LEXICON["negative"])
+        result[brand_id] = 'positive' if positive > negative else 'negative' if negative > positive else 'neutral'
+    return result
+
+
+def timed(label: str, texts: list[str], parse) -> None:
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        for text in texts:
+            parse(text)
+    elapsed = (time.perf_counter() - started) / REPEATS
+    megabytes = sum(len(text.encode("utf-8")) for text in texts) / 1024 / 1024
+    print(f"  {label:<24} {len(texts) / elapsed:8.0f} responses/s  {megabytes / elapsed:6.1f} MiB/s")
+
+
+def main():
+    project_id = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PROJECT_ID
+    create_db_and_tables()
+
+    with Session(engine) as session:
+        brands = session.exec(select(Brand).where(Brand.project_id == project_id)).all()
+        prompts = load_prompt_index(session, project_id)
+        responses = load_responses(session, (p.response_hash for p in prompts))
+        stored = {
+            (m.prompt_id, m.brand_id): m.position
+            for m in session.exec(
+                select(PromptBrandMention).where(PromptBrandMention.project_id == project_id)
+            ).all()
+        }
+
+    matcher = BrandMatcher.from_brands(brands)
+    variations_by_brand = brand_variations(brands)
+    texts = [responses[p.response_hash] for p in prompts if p.response_hash in responses]
+
+    print(f"{len(texts)} responses, {len(brands)} brands, averaged over {REPEATS} passes:")
+    timed("analyze_answer", texts, lambda text: analyze_answer(text, matcher))
+    timed("per-variation search", texts, lambda text: first_offset_ranks(text, variations_by_brand))
+    timed("brand_mention_rows", texts, lambda text: brand_mention_rows(text, matcher))
+    timed("ranks + keyword scan", texts, lambda text: (
+        first_offset_ranks(text, variations_by_brand), keyword_sentiments(text, variations_by_brand)
+    ))
+
+    agree = total = 0
+    for prompt in prompts:
+        stats = analyze_answer(responses.get(prompt.response_hash), matcher)
+        for brand in brands:
+            total += 1
+            rank = stats[brand.id].rank if brand.id in stats else None
+            agree += rank == stored.get((prompt.id, brand.id))
+    if total:
+        print(f"\nParser ranking matches {agree}/{total} stored positions ({agree / total * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Compare memory and time of loading a project's prompts in four shapes:
+
+- legacy rows: every column of the prompt table as it was before response
+  blobs (response text inline), read with a raw SELECT from a legacy_prompt
+  table holding the same synthetic prompts plus response text
+- prompt rows: the same raw SELECT on today's prompt table (response_hash
+  instead of the text)
+- select(Prompt): today's ORM objects
+- load_prompt_index: the lightweight prompt index (prompt_index.PromptRow)
+
+The first two isolate what moving the text column out of prompt saves on a
+full scan; the last two what the column projection saves over ORM objects.
+
+Runs against a throwaway SQLite database filled with synthetic prompts, so it
+never touches the real data.
+
+Usage: python scripts/benchmark_prompt_index.py [PROMPTS]   (default 100000)
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, text
+from sqlmodel import Session, SQLModel, select
+
+from models import DEFAULT_PROJECT_ID, Project, Prompt
+from prompt_index import load_prompt_index
+
+DEFAULT_PROMPTS = 100_000
+RUNS_PER_QUERY = 5
+INSERT_BATCH_SIZE = 10_000
+
+# Pre-blob layout of the prompt table; text sized like the sample answers (~1.2 KB)
+LEGACY_TABLE = """
+    CREATE TABLE legacy_prompt (
+        id INTEGER PRIMARY KEY, project_id VARCHAR NOT NULL, query VARCHAR NOT NULL,
+        run_number INTEGER NOT NULL, response_text VARCHAR, scraped_at DATETIME NOT NULL
+    )
+"""
+LEGACY_COLUMNS = "id, project_id, query, run_number, response_text, scraped_at"
+PROMPT_COLUMNS = "id, project_id, query, run_number, response_hash, scraped_at"
+RESPONSE_TEXT = (
+    "Run {i}: Shopify remains the overall market leader for its balance of ease of use and advanced features, "
+    "while WooCommerce is the top choice for those requiring complete customization. "
+) * 6
+
+
+def fill(engine, count: int) -> None:
+    """
+    Insert synthetic prompts (RUNS_PER_QUERY runs per query, spread over five
+    months) into prompt, and the same prompts with response text into legacy_prompt
+    """
+    start = datetime(2025, 9, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(Project.__table__), [{"id": DEFAULT_PROJECT_ID, "name": "Default", "created_at": start}])
+        conn.execute(text(LEGACY_TABLE))
+        for offset in range(0, count, INSERT_BATCH_SIZE):
+            rows = [
+                {
+                    "project_id": DEFAULT_PROJECT_ID,
+                    "query": f"How do I choose an ecommerce platform, variant {i // RUNS_PER_QUERY}?",
+                    "run_number": i % RUNS_PER_QUERY + 1,
+                    "response_hash": f"{i:064x}",
+                    "scraped_at": start + timedelta(minutes=i),
+                }
+                for i in range(offset, min(offset + INSERT_BATCH_SIZE, count))
+            ]
+            conn.execute(insert(Prompt.__table__), rows)
+            conn.execute(
+                text(f"INSERT INTO legacy_prompt ({LEGACY_COLUMNS}) "
+                     f"VALUES (:id, :project_id, :query, :run_number, :response_text, :scraped_at)"),
+                [
+                    {**row, "id": offset + n + 1, "response_text": RESPONSE_TEXT.format(i=offset + n)}
+                    for n, row in enumerate(rows)
+                ],
+            )
+
+
+def measure(label: str, load) -> None:
+    """Time one load, then trace the peak memory of another (tracing slows allocation down)"""
+    started = time.perf_counter()
+    load()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    rows = load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<20} {len(rows):>8} rows  peak {peak / 1024 / 1024:8.1f} MiB  {elapsed * 1000:8.0f} ms")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PROMPTS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'benchmark.db')}")
+        SQLModel.metadata.create_all(engine)
+        fill(engine, count)
+
+        print(f"Loading {count} prompts:")
+        # A fresh session per load, as each request gets one
+        def load_raw(table: str, columns: str):
+            with Session(engine) as session:
+                return session.execute(text(
+                    f"SELECT {columns} FROM {table} WHERE project_id = :project_id ORDER BY id"
+                ), {"project_id": DEFAULT_PROJECT_ID}).all()
+
+        def load_orm():
+            with Session(engine) as session:
+                return session.exec(
+                    select(Prompt).where(Prompt.project_id == DEFAULT_PROJECT_ID).order_by(Prompt.id)
+                ).all()
+
+        def load_index():
+            with Session(engine) as session:
+                return load_prompt_index(session, DEFAULT_PROJECT_ID)
+
+        measure("legacy rows", lambda: load_raw("legacy_prompt", LEGACY_COLUMNS))
+        measure("prompt rows", lambda: load_raw("prompt", PROMPT_COLUMNS))
+        measure("select(Prompt)", load_orm)
+        measure("load_prompt_index", load_index)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+CAPTCHA rates of the scrape workers' browser sessions.
+
+Lists every session (host and worker slot, see scraper_sessions.py) with its
+scrape attempts, CAPTCHAs, CAPTCHA rate, browser recycles (restarts for query
+count or memory) and, while it cools down, when its quarantine ends.
+
+Usage: python scripts/captcha_report.py
+"""
+
+from datetime import datetime
+
+from sqlmodel import Session
+
+from database import create_db_and_tables, engine
+from scraper_sessions import captcha_rate, list_sessions
+
+
+def print_report():
+    create_db_and_tables()
+
+    with Session(engine) as session:
+        rows = list_sessions(session)
+    if not rows:
+        print("No scrape sessions yet")
+        return
+
+    now = datetime.utcnow()
+    print(f"{'Session':<30} {'Scrapes':>8} {'CAPTCHAs':>9} {'Rate':>7} {'Recycles':>9}  Quarantined until (UTC)")
+    for row in rows:
+        rate = captcha_rate(row)
+        until = row.quarantined_until if row.quarantined_until and row.quarantined_until > now else None
+        print(
+            f"{row.id:<30} {row.scrapes:>8} {row.captchas:>9} "
+            f"{f'{rate:.1%}' if rate is not None else '-':>7} {row.recycles:>9}  "
+            f"{f'{until:%Y-%m-%d %H:%M}' if until else '-'}"
+        )
+
+    scrapes = sum(row.scrapes for row in rows)
+    captchas = sum(row.captchas for row in rows)
+    print(f"\nTotal: {captchas} CAPTCHA(s) in {scrapes} scrape(s)" + (f" ({captchas / scrapes:.1%})" if scrapes else ""))
+    print(f"Browser recycles: {sum(row.recycles for row in rows)}")
+
+
+if __name__ == "__main__":
+    print_report()
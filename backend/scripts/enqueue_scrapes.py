@@ -0,0 +1,68 @@
+"""
+Queue Google AI Mode scrapes for worker.py.
+
+Each query becomes a 'scrape' job; the worker that runs it scrapes the query
+and ingests the result as the query's next run (ingest.ingest_scrape_result).
+Without queries, every query the project already tracks is queued. Each job
+is the query's next run of the month and is keyed like the scheduler's
+(scheduler.scrape_job_key), so a run that already has an unfinished job is
+not queued twice; a scheduled one still waiting for its slot is moved up to now.
+
+Usage: python scripts/enqueue_scrapes.py [QUERY ...] [--project=ID] [--priority=N] [--visible]
+"""
+
+import sys
+from datetime import datetime
+
+from sqlmodel import Session
+
+from database import create_db_and_tables, engine
+from jobs import QUEUED, enqueue
+from models import DEFAULT_PROJECT_ID
+from scheduler import ingested_runs, scrape_job_key, tracked_queries
+
+
+def parse_args(argv: list[str]) -> tuple[list[str], str, int, bool]:
+    """(queries, project id, priority, headless)"""
+    queries = []
+    project_id = DEFAULT_PROJECT_ID
+    priority = 0
+    headless = True
+    for arg in argv:
+        if arg.startswith("--project="):
+            project_id = arg.split("=", 1)[1]
+        elif arg.startswith("--priority="):
+            priority = int(arg.split("=", 1)[1])
+        elif arg == "--visible":
+            headless = False
+        else:
+            queries.append(arg)
+    return queries, project_id, priority, headless
+
+
+def enqueue_scrapes(queries: list[str], project_id: str = DEFAULT_PROJECT_ID, priority: int = 0,
+                    headless: bool = True):
+    """Queue a scrape job per query (all tracked queries when none are given)"""
+    create_db_and_tables()
+
+    now = datetime.utcnow()
+    month = now.strftime("%Y-%m")
+    with Session(engine) as session:
+        if not queries:
+            queries = tracked_queries(session, project_id)
+        ingested = ingested_runs(session, project_id, month)
+        for query in queries:
+            run = ingested.get(query, 0) + 1
+            job = enqueue(
+                session, "scrape", {"query": query, "project_id": project_id, "headless": headless},
+                priority=priority, key=scrape_job_key(project_id, month, run, query),
+            )
+            if job.status == QUEUED and job.run_after > now:
+                job.run_after = now
+                session.add(job)
+                session.commit()
+            print(f"Job {job.id} ({job.status}, run {run} of {month}): {query}")
+
+
+if __name__ == "__main__":
+    enqueue_scrapes(*parse_args(sys.argv[1:]))
@@ -4,9 +4,12 @@ Ensures positions are unique and data is realistic.
 """
 
 import random
+
 from sqlmodel import Session, select
+
 from database import engine
-from models import Prompt, PromptBrandMention, Brand
+from models import DEFAULT_PROJECT_ID, Prompt, PromptBrandMention
+from signals import rebuild_signals
 
 random.seed(42)
 
@@ -16,7 +19,7 @@ SENTIMENTS = ['positive', 'neutral', 'negative']
 
 def get_january_mentions(session: Session, query: str) -> dict:
     """Get January brand mention data for a query."""
-    jan_prompts = [p for p in session.exec(select(Prompt)).all()
+    jan_prompts = [p for p in session.exec(select(Prompt).where(Prompt.project_id == DEFAULT_PROJECT_ID)).all()
                    if p.scraped_at and p.scraped_at.strftime('%Y-%m') == '2026-01' and p.query == query]
 
     if not jan_prompts:
@@ -89,7 +92,6 @@ def generate_varied_mentions(jan_data: dict, month: str, run: int) -> list[dict]
 
     # Build result
     result = []
-    position_counter = 1
 
     for brand in BRANDS:
         if brand in mentioned_brands:
@@ -124,7 +126,7 @@ def fix_brand_mentions():
     """Fix all Nov/Dec brand mentions."""
 
     with Session(engine) as session:
-        all_prompts = session.exec(select(Prompt)).all()
+        all_prompts = session.exec(select(Prompt).where(Prompt.project_id == DEFAULT_PROJECT_ID)).all()
 
         nov_prompts = [p for p in all_prompts if p.scraped_at and p.scraped_at.strftime('%Y-%m') == '2025-11']
         dec_prompts = [p for p in all_prompts if p.scraped_at and p.scraped_at.strftime('%Y-%m') == '2025-12']
@@ -155,6 +157,7 @@ def fix_brand_mentions():
                 mention = PromptBrandMention(
                     prompt_id=prompt.id,
                     brand_id=m_data['brand_id'],
+                    project_id=prompt.project_id,
                     mentioned=m_data['mentioned'],
                     position=m_data['position'],
                     sentiment=m_data['sentiment']
@@ -185,6 +188,7 @@ def fix_brand_mentions():
                 mention = PromptBrandMention(
                     prompt_id=prompt.id,
                     brand_id=m_data['brand_id'],
+                    project_id=prompt.project_id,
                     mentioned=m_data['mentioned'],
                     position=m_data['position'],
                     sentiment=m_data['sentiment']
@@ -196,6 +200,9 @@ def fix_brand_mentions():
         session.commit()
         print(f"\nFixed {fixed_count} prompts")
 
+        # Mentions changed, so suggestion signals must be recomputed
+        rebuild_signals(session, DEFAULT_PROJECT_ID)
+
         # Verify
         print("\n--- Verification ---")
         sample_nov = nov_prompts[0] if nov_prompts else None
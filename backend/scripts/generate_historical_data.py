@@ -7,10 +7,16 @@ with specific visibility targets per brand to match expected trends.
 Deterministic approach: specify exact number of queries to mention per brand/month.
 """
 
-import sqlite3
 import random
+import sqlite3
 from datetime import datetime
 
+from sqlmodel import Session
+
+from database import engine
+from models import DEFAULT_PROJECT_ID
+from signals import rebuild_signals
+
 # Set seed for position/sentiment randomness only
 random.seed(42)
 
@@ -42,9 +48,9 @@ def get_january_data():
 
     # Get only January prompts
     cursor.execute("""
-        SELECT id, query, run_number, response_text, scraped_at
+        SELECT id, query, run_number, response_hash, scraped_at
         FROM prompt
-        WHERE scraped_at LIKE '2026-01%'
+        WHERE scraped_at LIKE '2026-01%' AND project_id = 'default'
         ORDER BY query, run_number
     """)
     prompts = cursor.fetchall()
@@ -52,14 +58,14 @@ def get_january_data():
     # Group by query
     queries = {}
     for p in prompts:
-        prompt_id, query, run_number, response_text, scraped_at = p
+        prompt_id, query, run_number, response_hash, scraped_at = p
         if query not in queries:
             queries[query] = []
         queries[query].append({
             'id': prompt_id,
             'query': query,
             'run_number': run_number,
-            'response_text': response_text,
+            'response_hash': response_hash,
             'scraped_at': scraped_at
         })
 
@@ -142,9 +148,9 @@ def insert_historical_runs(queries: dict):
 
             # Insert prompt
             cursor.execute("""
-                INSERT INTO prompt (id, query, run_number, response_text, scraped_at)
-                VALUES (?, ?, ?, ?, ?)
-            """, (new_prompt_id, query, run_number, jan_run1['response_text'], scraped_at.isoformat()))
+                INSERT INTO prompt (id, project_id, query, run_number, response_hash, scraped_at)
+                VALUES (?, 'default', ?, ?, ?, ?)
+            """, (new_prompt_id, query, run_number, jan_run1['response_hash'], scraped_at.isoformat()))
 
             # Generate brand mentions deterministically
             for brand_id in ['wix', 'shopify', 'woocommerce', 'bigcommerce', 'squarespace']:
@@ -157,8 +163,8 @@ def insert_historical_runs(queries: dict):
                 )
 
                 cursor.execute("""
-                    INSERT INTO promptbrandmention (prompt_id, brand_id, mentioned, position, sentiment, context)
-                    VALUES (?, ?, ?, ?, ?, ?)
+                    INSERT INTO promptbrandmention (prompt_id, brand_id, project_id, mentioned, position, sentiment, context)
+                    VALUES (?, ?, 'default', ?, ?, ?, ?)
                 """, (new_prompt_id, brand_id, mentioned, position, sentiment, None))
 
             new_prompt_id += 1
@@ -168,6 +174,13 @@ def insert_historical_runs(queries: dict):
     print(f"Inserted {(new_prompt_id - max_id - 1)} new prompts (4 runs × {len(queries)} queries)")
 
 
+def refresh_signals():
+    """Runs and mentions were written directly, so suggestion signals must be recomputed"""
+    with Session(engine) as session:
+        rebuild_signals(session, DEFAULT_PROJECT_ID)
+    print("Rebuilt suggestion signals")
+
+
 def verify_data():
     """Verify the data looks correct"""
     conn = get_connection()
@@ -240,6 +253,7 @@ if __name__ == "__main__":
 
     # Insert historical runs
     insert_historical_runs(queries)
+    refresh_signals()
 
     # Verify
     verify_data()
@@ -0,0 +1,94 @@
+"""
+Migrate a database created before projects existed.
+
+New project_id columns are added automatically at startup (defaulting to the
+"default" project), but primary keys and foreign keys of existing tables are
+not. This script:
+- rebuilds the brand table with its (id, project_id) primary key
+- rebuilds promptbrandmention with its (brand_id, project_id) foreign key
+- recreates the signal tables (per-project keys) and rebuilds their contents
+
+Safe to run more than once.
+"""
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateTable
+from sqlmodel import Session, select
+
+from classification import reclassify_sources
+from database import create_db_and_tables, engine
+from models import Brand, DomainSignal, Project, PromptBrandMention, QuerySignal, SourceTypeSignal
+from projects import ensure_default_project
+from signals import rebuild_signals
+
+SIGNAL_TABLES = [QuerySignal.__table__, DomainSignal.__table__, SourceTypeSignal.__table__]
+
+
+def brand_needs_migration() -> bool:
+    pk = inspect(engine).get_pk_constraint(Brand.__tablename__)
+    return "project_id" not in (pk.get("constrained_columns") or [])
+
+
+def rebuild_sqlite_table(conn, table) -> None:
+    """Recreate a table with the current model definition, keeping its rows (SQLite cannot ALTER keys)"""
+    new_name = f"{table.name}__new"
+    columns = ", ".join(f'"{c.name}"' for c in table.columns)
+    create_sql = str(CreateTable(table).compile(dialect=engine.dialect))
+    create_sql = create_sql.replace(f"CREATE TABLE {table.name} ", f'CREATE TABLE "{new_name}" ', 1)
+
+    conn.execute(text(create_sql))
+    conn.execute(text(f'INSERT INTO "{new_name}" ({columns}) SELECT {columns} FROM "{table.name}"'))
+    conn.execute(text(f'DROP TABLE "{table.name}"'))
+    conn.execute(text(f'ALTER TABLE "{new_name}" RENAME TO "{table.name}"'))
+    for index in table.indexes:
+        index.create(conn)
+
+
+def migrate_keys() -> None:
+    if not brand_needs_migration():
+        print("Brand keys already migrated")
+        return
+
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            conn.execute(text("PRAGMA foreign_keys=OFF"))
+            rebuild_sqlite_table(conn, Brand.__table__)
+            rebuild_sqlite_table(conn, PromptBrandMention.__table__)
+        else:
+            conn.execute(text("ALTER TABLE promptbrandmention DROP CONSTRAINT IF EXISTS promptbrandmention_brand_id_fkey"))
+            conn.execute(text("ALTER TABLE brand DROP CONSTRAINT IF EXISTS brand_pkey"))
+            conn.execute(text("ALTER TABLE brand ADD PRIMARY KEY (id, project_id)"))
+            conn.execute(text(
+                "ALTER TABLE brand ADD CONSTRAINT brand_project_id_fkey "
+                "FOREIGN KEY (project_id) REFERENCES project (id)"
+            ))
+            conn.execute(text(
+                "ALTER TABLE promptbrandmention ADD CONSTRAINT promptbrandmention_brand_id_project_id_fkey "
+                "FOREIGN KEY (brand_id, project_id) REFERENCES brand (id, project_id)"
+            ))
+    print("Migrated brand and mention keys")
+
+
+def main():
+    create_db_and_tables()
+
+    with Session(engine) as session:
+        ensure_default_project(session)
+
+    migrate_keys()
+
+    # Signal tables are derived data: recreate them with per-project keys and rebuild
+    with engine.begin() as conn:
+        for table in SIGNAL_TABLES:
+            table.drop(conn, checkfirst=True)
+            table.create(conn)
+
+    with Session(engine) as session:
+        reclassify_sources(session, only_missing=True)
+        for project_id in session.exec(select(Project.id)).all():
+            rebuild_signals(session, project_id)
+            print(f"Rebuilt signals for project '{project_id}'")
+
+
+if __name__ == "__main__":
+    main()
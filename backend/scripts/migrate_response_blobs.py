@@ -0,0 +1,69 @@
+"""
+Move response text out of the prompt table into compressed, deduplicated blobs.
+
+The migration drops prompt.response_text, so neither the API nor the other
+scripts run it: they refuse to start while the column exists. This script migrates,
+reclaims the freed space (VACUUM) and reports database size and prompt scan
+time before and after. Back up the database first.
+"""
+
+import os
+import time
+
+from sqlalchemy import text
+
+from database import create_db_and_tables, engine
+from responses import migrate_inline_responses, zstandard
+
+SCAN_REPEATS = 20
+
+
+def database_size() -> int:
+    """Database size in bytes"""
+    if engine.dialect.name == "sqlite":
+        return os.path.getsize(engine.url.database)
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT pg_database_size(current_database())")).scalar()
+
+
+def prompt_scan_ms() -> float:
+    """Average time to read every prompt row with all its columns"""
+    with engine.connect() as conn:
+        conn.execute(text("SELECT * FROM prompt")).fetchall()  # Warm the cache
+        start = time.perf_counter()
+        for _ in range(SCAN_REPEATS):
+            conn.execute(text("SELECT * FROM prompt")).fetchall()
+        return (time.perf_counter() - start) / SCAN_REPEATS * 1000
+
+
+def reclaim_space() -> None:
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM" if engine.dialect.name == "sqlite" else "VACUUM FULL prompt"))
+
+
+def main():
+    print(f"Codec: {'zstd' if zstandard is not None else 'zlib (install zstandard for zstd)'}")
+
+    before_size, before_scan = database_size(), prompt_scan_ms()
+
+    create_db_and_tables(allow_inline_responses=True)
+    migrated = migrate_inline_responses(engine)
+    reclaim_space()
+
+    after_size, after_scan = database_size(), prompt_scan_ms()
+
+    with engine.connect() as conn:
+        prompts, blobs, raw, stored = conn.execute(text(
+            "SELECT (SELECT count(*) FROM prompt), count(*), coalesce(sum(size), 0), "
+            "coalesce(sum(length(data)), 0) FROM responseblob"
+        )).one()
+
+    print(f"Migrated {migrated} prompts")
+    print(f"Responses: {prompts} prompts -> {blobs} distinct blobs, "
+          f"{raw / 1024:.0f} KiB text -> {stored / 1024:.0f} KiB compressed")
+    print(f"Database size: {before_size / 1024:.0f} KiB -> {after_size / 1024:.0f} KiB")
+    print(f"Prompt full scan: {before_scan:.2f} ms -> {after_scan:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
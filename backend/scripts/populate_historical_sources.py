@@ -8,10 +8,12 @@ This script:
 """
 
 import random
-import re
+
 from sqlmodel import Session, select
+
 from database import engine
-from models import Prompt, PromptSource, Source
+from models import DEFAULT_PROJECT_ID, Prompt, PromptSource
+from responses import load_response, store_response
 
 # Set seed for reproducibility
 random.seed(42)
@@ -67,8 +69,8 @@ def populate_historical_sources():
     """Main function to populate Nov/Dec with varied sources."""
 
     with Session(engine) as session:
-        # Get all prompts
-        all_prompts = session.exec(select(Prompt)).all()
+        # Get all default-project prompts
+        all_prompts = session.exec(select(Prompt).where(Prompt.project_id == DEFAULT_PROJECT_ID)).all()
 
         # Group by month
         jan_prompts = [p for p in all_prompts if p.scraped_at and p.scraped_at.strftime("%Y-%m") == "2026-01"]
@@ -123,14 +125,16 @@ def populate_historical_sources():
                     new_ps = PromptSource(
                         prompt_id=nov_prompt.id,
                         source_id=source_id,
+                        project_id=nov_prompt.project_id,
                         citation_order=idx
                     )
                     session.add(new_ps)
                     nov_sources_added += 1
 
             # Modify response_text
-            if nov_prompt.response_text:
-                nov_prompt.response_text = vary_response_text(nov_prompt.response_text, "nov")
+            nov_text = load_response(session, nov_prompt.response_hash)
+            if nov_text:
+                nov_prompt.response_hash = store_response(session, vary_response_text(nov_text, "nov"))
                 nov_responses_modified += 1
 
         # Process December prompts
@@ -166,20 +170,22 @@ def populate_historical_sources():
                     new_ps = PromptSource(
                         prompt_id=dec_prompt.id,
                         source_id=source_id,
+                        project_id=dec_prompt.project_id,
                         citation_order=idx
                     )
                     session.add(new_ps)
                     dec_sources_added += 1
 
             # Modify response_text
-            if dec_prompt.response_text:
-                dec_prompt.response_text = vary_response_text(dec_prompt.response_text, "dec")
+            dec_text = load_response(session, dec_prompt.response_hash)
+            if dec_text:
+                dec_prompt.response_hash = store_response(session, vary_response_text(dec_text, "dec"))
                 dec_responses_modified += 1
 
         # Commit all changes
         session.commit()
 
-        print(f"\nDone!")
+        print("\nDone!")
         print(f"November: {nov_sources_added} sources added, {nov_responses_modified} responses modified")
         print(f"December: {dec_sources_added} sources added, {dec_responses_modified} responses modified")
 
@@ -188,7 +194,7 @@ def populate_historical_sources():
         dec_total = sum(1 for p in dec_prompts for _ in get_sources_for_prompt(session, p.id))
         jan_total = sum(1 for p in jan_prompts for _ in get_sources_for_prompt(session, p.id))
 
-        print(f"\nFinal source counts:")
+        print("\nFinal source counts:")
         print(f"  November: {nov_total}")
         print(f"  December: {dec_total}")
         print(f"  January:  {jan_total}")
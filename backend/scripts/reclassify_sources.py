@@ -0,0 +1,45 @@
+"""
+Reclassify all sources with the current source type rules.
+Run after changing DEFAULT_RULES in classification.py or SOURCE_TYPE_RULES_FILE.
+When any type changed, every project's suggestion signals are rebuilt.
+"""
+
+from collections import Counter
+
+from sqlmodel import Session, func, select
+
+from classification import get_classifier, reclassify_sources
+from database import create_db_and_tables, engine
+from models import Project, Source
+from projects import ensure_default_project
+from signals import rebuild_signals
+
+
+def main():
+    create_db_and_tables()
+
+    classifier = get_classifier()
+    print(f"Rules version: {classifier.version} ({len(classifier.rules)} rule groups)")
+
+    with Session(engine) as session:
+        scanned, updated = reclassify_sources(session)
+        print(f"Scanned {scanned} sources, updated {updated}")
+
+        if updated:
+            ensure_default_project(session)
+            # Signals are keyed by source type, so they must be recomputed
+            for project_id in session.exec(select(Project.id)).all():
+                rebuild_signals(session, project_id)
+                print(f"Rebuilt signals for project '{project_id}'")
+
+        counts = Counter(dict(session.exec(
+            select(Source.source_type, func.count(Source.id)).group_by(Source.source_type)
+        ).all()))
+
+    print("\n--- Source types ---")
+    for source_type, count in counts.most_common():
+        print(f"  {source_type}: {count}")
+
+
+if __name__ == "__main__":
+    main()
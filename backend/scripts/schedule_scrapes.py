@@ -0,0 +1,71 @@
+"""
+Schedule a month of scrapes for a project's tracked queries.
+
+Queues the runs each query still misses this month (runs already ingested
+or queued count) as scrape jobs spread over the rest of the month, no closer
+than the scraper's delay bounds (see scheduler.py). worker.py runs them as
+their time comes. With --recurring, a 'schedule_scrapes' job does this now
+and again every day, so a project keeps its target without further runs of
+this script.
+
+Usage: python scripts/schedule_scrapes.py [PROJECT_ID] [--runs=N] [--month=YYYY-MM] [--recurring] [--visible]
+"""
+
+import sys
+
+from sqlmodel import Session
+
+from database import create_db_and_tables, engine
+from models import DEFAULT_PROJECT_ID
+from scheduler import delay_bounds, schedule_recurring, schedule_scrapes
+
+DEFAULT_RUNS_PER_MONTH = 2
+
+
+def parse_args(argv: list[str]) -> tuple[str, int, str | None, bool, bool]:
+    """(project id, runs per query per month, month or None for the current one, recurring, headless)"""
+    project_id = DEFAULT_PROJECT_ID
+    runs = DEFAULT_RUNS_PER_MONTH
+    month = None
+    recurring = False
+    headless = True
+    for arg in argv:
+        if arg.startswith("--runs="):
+            runs = int(arg.split("=", 1)[1])
+        elif arg.startswith("--month="):
+            month = arg.split("=", 1)[1]
+        elif arg == "--recurring":
+            recurring = True
+        elif arg == "--visible":
+            headless = False
+        else:
+            project_id = arg
+    return project_id, runs, month, recurring, headless
+
+
+def main(project_id: str = DEFAULT_PROJECT_ID, runs: int = DEFAULT_RUNS_PER_MONTH, month: str | None = None,
+         recurring: bool = False, headless: bool = True):
+    create_db_and_tables()
+
+    with Session(engine) as session:
+        if recurring:
+            job = schedule_recurring(session, project_id, runs, headless)
+            print(f"Queued scheduling job {job.id} ({job.status}); it re-plans the month every day")
+            return
+
+        min_delay, max_delay = delay_bounds()
+        result = schedule_scrapes(session, project_id, runs, min_delay, max_delay, month, headless=headless)
+        times = sorted(job.run_after for job in result.queued)
+
+    print(f"Queued {len(result.queued)} scrape(s) and moved {result.moved} queued one(s), "
+          f"{min_delay}-{max_delay}s delay bounds")
+    if times:
+        print(f"  New runs from {times[0]:%Y-%m-%d %H:%M} to {times[-1]:%Y-%m-%d %H:%M} (UTC)")
+    if result.cancelled:
+        print(f"  Cancelled {result.cancelled} queued scrape(s) no longer needed")
+    if result.left_out:
+        print(f"  {result.left_out} run(s) do not fit in the month at the minimum delay")
+
+
+if __name__ == "__main__":
+    main(*parse_args(sys.argv[1:]))
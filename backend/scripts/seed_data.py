@@ -4,29 +4,11 @@ Run from the backend directory: python seed_data.py
 """
 
 from sqlmodel import Session, select
-from database import engine, create_db_and_tables
-from models import Brand, Prompt, PromptBrandMention, Source, PromptSource
-from datetime import datetime
 
-
-def get_or_create_source(session: Session, url: str, domain: str, title: str,
-                          description: str = None, published_date: str = None) -> Source:
-    """Get existing source or create new one"""
-    existing = session.exec(select(Source).where(Source.url == url)).first()
-    if existing:
-        return existing
-
-    source = Source(
-        url=url,
-        domain=domain,
-        title=title,
-        description=description,
-        published_date=published_date
-    )
-    session.add(source)
-    session.commit()
-    session.refresh(source)
-    return source
+from database import create_db_and_tables, engine
+from ingest import ingest_prompt
+from models import DEFAULT_PROJECT_ID, Brand, Prompt, Source
+from projects import ensure_default_project
 
 
 def add_prompt_data(session: Session, prompt_data: dict) -> None:
@@ -39,48 +21,14 @@ def add_prompt_data(session: Session, prompt_data: dict) -> None:
         print(f"Prompt already exists: {prompt_data['query'][:50]}...")
         return
 
-    # Create prompt
-    prompt = Prompt(
+    prompt = ingest_prompt(
+        session,
         query=prompt_data["query"],
         response_text=prompt_data.get("response_text"),
-        scraped_at=datetime.utcnow()
+        sources=prompt_data.get("sources", []),
+        brand_mentions=prompt_data.get("brand_mentions", []),
     )
-    session.add(prompt)
-    session.commit()
-    session.refresh(prompt)
     print(f"Added prompt {prompt.id}: {prompt.query[:50]}...")
-
-    # Add brand mentions
-    for mention in prompt_data.get("brand_mentions", []):
-        brand_mention = PromptBrandMention(
-            prompt_id=prompt.id,
-            brand_id=mention["brand_id"],
-            mentioned=mention["mentioned"],
-            position=mention.get("position"),
-            sentiment=mention.get("sentiment"),
-            context=mention.get("context")
-        )
-        session.add(brand_mention)
-
-    # Add sources
-    for idx, source_data in enumerate(prompt_data.get("sources", []), start=1):
-        source = get_or_create_source(
-            session,
-            url=source_data["url"],
-            domain=source_data["domain"],
-            title=source_data.get("title"),
-            description=source_data.get("description"),
-            published_date=source_data.get("published_date")
-        )
-
-        prompt_source = PromptSource(
-            prompt_id=prompt.id,
-            source_id=source.id,
-            citation_order=idx
-        )
-        session.add(prompt_source)
-
-    session.commit()
     print(f"  Added {len(prompt_data.get('brand_mentions', []))} brand mentions")
     print(f"  Added {len(prompt_data.get('sources', []))} sources")
 
@@ -1662,8 +1610,9 @@ def seed_brands(session: Session):
         {"id": "squarespace", "name": "Squarespace", "type": "competitor", "color": "#10b981"},
     ]
 
+    ensure_default_project(session)
     for brand_data in brands_data:
-        existing = session.get(Brand, brand_data["id"])
+        existing = session.get(Brand, (brand_data["id"], DEFAULT_PROJECT_ID))
         if not existing:
             session.add(Brand(**brand_data))
             print(f"Added brand: {brand_data['name']}")
@@ -1685,7 +1634,7 @@ def main():
         # Print summary
         prompt_count = session.exec(select(Prompt)).all()
         source_count = session.exec(select(Source)).all()
-        print(f"\nDatabase summary:")
+        print("\nDatabase summary:")
         print(f"  Prompts: {len(prompt_count)}")
         print(f"  Sources: {len(source_count)}")
 
@@ -4,8 +4,10 @@ Each response is distinct from January while covering the same topics.
 """
 
 from sqlmodel import Session, select
+
 from database import engine
 from models import Prompt
+from responses import load_response, store_response
 
 # Unique responses for each query - November 2025 versions
 NOVEMBER_RESPONSES = {
@@ -1817,14 +1819,14 @@ def update_responses():
         nov_updated = 0
         for prompt in nov_prompts:
             if prompt.query in NOVEMBER_RESPONSES:
-                prompt.response_text = NOVEMBER_RESPONSES[prompt.query]
+                prompt.response_hash = store_response(session, NOVEMBER_RESPONSES[prompt.query])
                 nov_updated += 1
 
         # Update December
         dec_updated = 0
         for prompt in dec_prompts:
             if prompt.query in DECEMBER_RESPONSES:
-                prompt.response_text = DECEMBER_RESPONSES[prompt.query]
+                prompt.response_hash = store_response(session, DECEMBER_RESPONSES[prompt.query])
                 dec_updated += 1
 
         session.commit()
@@ -1836,7 +1838,8 @@ def update_responses():
         if nov_prompts:
             sample = nov_prompts[0]
             print(f"\nSample November response for '{sample.query[:50]}...':")
-            print(sample.response_text[:200] + "..." if sample.response_text else "None")
+            sample_text = load_response(session, sample.response_hash)
+            print(sample_text[:200] + "..." if sample_text else "None")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,376 @@
+"""
+Full-text search over AI responses and cited sources.
+
+Three things are indexed:
+
+- prompt queries: SQLite FTS5 external-content table prompt_fts kept in sync
+  by triggers on prompt / Postgres generated tsvector column prompt.search_vector
+- response bodies: one entry per distinct ResponseBlob (so identical answers
+  are indexed once), written by index_response() when a blob is stored;
+  SQLite contentless FTS5 table response_fts / Postgres responseblob.search_vector
+- sources: FTS5 external-content table source_fts with triggers on source /
+  Postgres generated source.search_vector
+
+Response bodies are stored compressed, so prompt snippets are built in Python
+from the decompressed text of the returned rows only. Snippets are HTML: the
+text is escaped and only the highlight tags are markup.
+
+ensure_search_index() creates whatever is missing and backfills it once.
+User input is reduced to plain word tokens (the last one prefix-matched), so
+search syntax never reaches the query parser.
+
+matching_response_hashes() reuses the response index to narrow brand
+mention rescans (mention_sync.py) to the bodies that can contain a brand.
+"""
+
+import html
+import re
+
+from sqlalchemy import inspect, text
+from sqlmodel import Session, select
+
+from models import ResponseBlob
+from responses import decompress, load_responses
+from schemas import PromptSearchHit, SearchResponse, SourceSearchHit
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+# Markers FTS5 snippet() puts around matches, replaced by the tags once the text is escaped
+_MATCH_START = "\x02"
+_MATCH_END = "\x03"
+SNIPPET_WORDS = 24
+SNIPPET_LEAD_WORDS = 6
+MAX_TERMS = 16
+
+# Query matches count more than matches in the response body
+QUERY_WEIGHT = 4.0
+
+_SQLITE_EXTERNAL_INDEXES = {
+    "prompt_fts": ("prompt", ["query"]),
+    "source_fts": ("source", ["title", "description", "domain"]),
+}
+
+_POSTGRES_VECTORS = {
+    "prompt": "to_tsvector('english', coalesce(query, ''))",
+    "source": (
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(domain, '')), 'C')"
+    ),
+}
+
+
+def search_terms(q: str) -> list[str]:
+    """Word tokens of a user query"""
+    return re.findall(r"\w+", q.lower())[:MAX_TERMS]
+
+
+def ensure_search_index(engine) -> None:
+    """Create the full-text index for the engine's dialect if missing"""
+    if engine.dialect.name == "sqlite":
+        _ensure_sqlite_index(engine)
+    elif engine.dialect.name == "postgresql":
+        _ensure_postgres_index(engine)
+
+
+def index_response(session: Session, blob_id: int, response_text: str) -> None:
+    """Add a newly stored response body to the index (caller commits)"""
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        session.execute(
+            text("INSERT INTO response_fts(rowid, body) VALUES (:id, :body)"),
+            {"id": blob_id, "body": response_text},
+        )
+    elif dialect == "postgresql":
+        session.execute(
+            text("UPDATE responseblob SET search_vector = to_tsvector('english', :body) WHERE id = :id"),
+            {"id": blob_id, "body": response_text},
+        )
+
+
+def _ensure_sqlite_index(engine) -> None:
+    existing = set(inspect(engine).get_table_names())
+    with engine.begin() as conn:
+        for fts, (table, columns) in _SQLITE_EXTERNAL_INDEXES.items():
+            cols = ", ".join(columns)
+            new_cols = ", ".join(f"new.{c}" for c in columns)
+            old_cols = ", ".join(f"old.{c}" for c in columns)
+
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                f"{cols}, content='{table}', content_rowid='id', tokenize='porter unicode61')"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+                f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END"
+            ))
+            if fts not in existing:
+                # Index rows written before the index existed
+                conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+        # Blobs are immutable, so a contentless table only needs inserts
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS response_fts USING fts5("
+            "body, content='', tokenize='porter unicode61')"
+        ))
+        if "response_fts" not in existing:
+            _backfill_responses(conn, "INSERT INTO response_fts(rowid, body) VALUES (:id, :body)")
+
+
+def _ensure_postgres_index(engine) -> None:
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table, expression in _POSTGRES_VECTORS.items():
+            columns = {col["name"] for col in inspector.get_columns(table)}
+            if "search_vector" not in columns:
+                # Generated columns are computed for existing rows when added
+                conn.execute(text(
+                    f"ALTER TABLE {table} ADD COLUMN search_vector tsvector "
+                    f"GENERATED ALWAYS AS ({expression}) STORED"
+                ))
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING GIN (search_vector)"
+            ))
+
+        # Response bodies are compressed, so their vectors are written from Python
+        columns = {col["name"] for col in inspector.get_columns("responseblob")}
+        if "search_vector" not in columns:
+            conn.execute(text("ALTER TABLE responseblob ADD COLUMN search_vector tsvector"))
+            _backfill_responses(
+                conn, "UPDATE responseblob SET search_vector = to_tsvector('english', :body) WHERE id = :id"
+            )
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_responseblob_search_vector ON responseblob USING GIN (search_vector)"
+        ))
+
+
+def _backfill_responses(conn, statement: str) -> None:
+    for blob_id, codec, data in conn.execute(select(ResponseBlob.id, ResponseBlob.codec, ResponseBlob.data)).all():
+        conn.execute(text(statement), {"id": blob_id, "body": decompress(codec, data)})
+
+
+def _fts5_match(terms: list[str]) -> str:
+    """FTS5 query: every term required, the last one as a prefix"""
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _tsquery(terms: list[str]) -> str:
+    """to_tsquery input: every term required, the last one as a prefix"""
+    return " & ".join(terms[:-1] + [f"{terms[-1]}:*"])
+
+
+# Candidate runs are the project's runs whose query matches or whose response body
+# matches; both hit lists are scoped to the project, so other tenants' rows are never
+# collected, and the outer query only touches candidates (via the prompt id /
+# response_hash indexes)
+_PROMPTS_TEMPLATE = """
+    WITH query_hits AS ({query_hits}),
+         response_hits AS ({response_hits}),
+         candidates AS (
+             SELECT prompt_id AS id FROM query_hits
+             UNION
+             SELECT p.id FROM prompt p JOIN response_hits r ON r.hash = p.response_hash
+             WHERE p.project_id = :project_id
+         )
+    SELECT p.id, p.query, p.run_number, p.scraped_at, p.response_hash,
+           :query_weight * coalesce(q.score, 0) + coalesce(r.score, 0) AS score
+    FROM candidates c
+    JOIN prompt p ON p.id = c.id
+    LEFT JOIN query_hits q ON q.prompt_id = p.id
+    LEFT JOIN response_hits r ON r.hash = p.response_hash
+    ORDER BY score DESC, p.id
+    LIMIT :limit
+"""
+
+# bm25() is lower-is-better, so it is negated to match ts_rank
+_SQLITE_PROMPTS = text(_PROMPTS_TEMPLATE.format(
+    query_hits=(
+        "SELECT prompt_fts.rowid AS prompt_id, -bm25(prompt_fts) AS score FROM prompt_fts "
+        "JOIN prompt p ON p.id = prompt_fts.rowid WHERE prompt_fts MATCH :match AND p.project_id = :project_id"
+    ),
+    response_hits=(
+        "SELECT b.hash, -bm25(response_fts) AS score FROM response_fts "
+        "JOIN responseblob b ON b.id = response_fts.rowid WHERE response_fts MATCH :match "
+        "AND EXISTS (SELECT 1 FROM prompt p WHERE p.response_hash = b.hash AND p.project_id = :project_id)"
+    ),
+))
+
+_POSTGRES_PROMPTS = text(_PROMPTS_TEMPLATE.format(
+    query_hits=(
+        "SELECT id AS prompt_id, ts_rank(search_vector, to_tsquery('english', :match)) AS score "
+        "FROM prompt WHERE search_vector @@ to_tsquery('english', :match) AND project_id = :project_id"
+    ),
+    response_hits=(
+        "SELECT b.hash, ts_rank(b.search_vector, to_tsquery('english', :match)) AS score "
+        "FROM responseblob b WHERE b.search_vector @@ to_tsquery('english', :match) "
+        "AND EXISTS (SELECT 1 FROM prompt p WHERE p.response_hash = b.hash AND p.project_id = :project_id)"
+    ),
+))
+
+_SQLITE_SOURCES = text(f"""
+    SELECT s.id, s.domain, s.url, s.title, s.description,
+           snippet(source_fts, -1, :start, :end, '…', {SNIPPET_WORDS}) AS snippet,
+           -bm25(source_fts, 4.0, 1.0, 2.0) AS score
+    FROM source_fts
+    JOIN source s ON s.id = source_fts.rowid
+    WHERE source_fts MATCH :match
+      AND EXISTS (SELECT 1 FROM promptsource ps WHERE ps.source_id = s.id AND ps.project_id = :project_id)
+    ORDER BY bm25(source_fts, 4.0, 1.0, 2.0), s.id
+    LIMIT :limit
+""")
+
+_POSTGRES_SOURCES = text("""
+    SELECT s.id, s.domain, s.url, s.title, s.description, NULL AS snippet,
+           ts_rank(s.search_vector, to_tsquery('english', :match)) AS score
+    FROM source s
+    WHERE s.search_vector @@ to_tsquery('english', :match)
+      AND EXISTS (SELECT 1 FROM promptsource ps WHERE ps.source_id = s.id AND ps.project_id = :project_id)
+    ORDER BY score DESC, s.id
+    LIMIT :limit
+""")
+
+
+def matching_response_hashes(session: Session, phrases: list[str]) -> set[str] | None:
+    """
+    Hashes of the response bodies containing any of the phrases (as word
+    sequences, case and punctuation ignored). The index stems words, so this
+    is a superset of exact matches. None when the index cannot answer (a
+    phrase without indexable words), meaning every body is a candidate.
+    """
+    tokenized = [re.findall(r"\w+", phrase.lower()) for phrase in phrases]
+    if not tokenized or not all(tokenized):
+        return None
+
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        match = " OR ".join('"' + " ".join(tokens) + '"' for tokens in tokenized)
+        rows = session.execute(text(
+            "SELECT b.hash FROM response_fts JOIN responseblob b ON b.id = response_fts.rowid "
+            "WHERE response_fts MATCH :match"
+        ), {"match": match})
+    elif dialect == "postgresql":
+        params = {f"p{i}": " ".join(tokens) for i, tokens in enumerate(tokenized)}
+        queries = [f"phraseto_tsquery('english', :p{i})" for i in range(len(tokenized))]
+        # Phrases made only of stop words give empty queries that would match nothing
+        if session.execute(text(f"SELECT least({', '.join(f'numnode({q})' for q in queries)}, 1)"), params
+                           ).scalar() == 0:
+            return None
+        rows = session.execute(text(
+            f"SELECT hash FROM responseblob WHERE search_vector @@ ({' || '.join(queries)})"
+        ), params)
+    else:
+        return None
+    return {digest for (digest,) in rows}
+
+
+def _stem(term: str) -> str:
+    """Rough stem so highlighting also marks inflected forms the index matched"""
+    for suffix in ("ing", "es", "ed", "s"):
+        if term.endswith(suffix) and len(term) - len(suffix) >= 3:
+            return term[: -len(suffix)]
+    return term
+
+
+def _escape(text: str) -> str:
+    return html.escape(text, quote=False)
+
+
+def _highlighted(snippet: str) -> str:
+    """HTML of an FTS5 snippet whose matches are wrapped in the _MATCH_START/_MATCH_END markers"""
+    return _escape(snippet).replace(_MATCH_START, HIGHLIGHT_START).replace(_MATCH_END, HIGHLIGHT_END)
+
+
+def make_snippet(body: str, terms: list[str]) -> str | None:
+    """Escaped excerpt around the first matched term with matches wrapped in <mark>, or None if nothing matches"""
+    pattern = re.compile(r"\b(?:" + "|".join(re.escape(_stem(t)) for t in terms) + r")\w*", re.IGNORECASE)
+    first = pattern.search(body)
+    if first is None:
+        return None
+
+    words = list(re.finditer(r"\S+", body))
+    hit = next(i for i, w in enumerate(words) if w.end() > first.start())
+    start = max(0, hit - SNIPPET_LEAD_WORDS)
+    end = min(len(words), start + SNIPPET_WORDS)
+    excerpt = body[words[start].start():words[end - 1].end()]
+    parts = []
+    last = 0
+    for match in pattern.finditer(excerpt):
+        parts += [_escape(excerpt[last:match.start()]), HIGHLIGHT_START, _escape(match.group(0)), HIGHLIGHT_END]
+        last = match.end()
+    excerpt = "".join(parts) + _escape(excerpt[last:])
+    return ("…" if start > 0 else "") + excerpt + ("…" if end < len(words) else "")
+
+
+def search(session: Session, project_id: str, q: str, limit: int = 20) -> SearchResponse:
+    """Ranked prompt and source matches for q within a project"""
+    terms = search_terms(q)
+    if not terms:
+        return SearchResponse(query=q, prompts=[], sources=[])
+
+    if session.get_bind().dialect.name == "postgresql":
+        prompts_sql, sources_sql, match = _POSTGRES_PROMPTS, _POSTGRES_SOURCES, _tsquery(terms)
+    else:
+        prompts_sql, sources_sql, match = _SQLITE_PROMPTS, _SQLITE_SOURCES, _fts5_match(terms)
+
+    params = {
+        "match": match,
+        "project_id": project_id,
+        "limit": limit,
+        "query_weight": QUERY_WEIGHT,
+        "start": _MATCH_START,
+        "end": _MATCH_END,
+    }
+
+    prompt_rows = session.execute(prompts_sql, params).all()
+    bodies = load_responses(session, (row.response_hash for row in prompt_rows))
+    prompts = [
+        PromptSearchHit(
+            id=row.id,
+            query=row.query,
+            runNumber=row.run_number,
+            scrapedAt=_isoformat(row.scraped_at),
+            snippet=(
+                make_snippet(bodies.get(row.response_hash, ""), terms)
+                or make_snippet(row.query, terms)
+                or _escape(row.query)
+            ),
+            score=round(row.score, 4),
+        )
+        for row in prompt_rows
+    ]
+    sources = [
+        SourceSearchHit(
+            id=row.id,
+            domain=row.domain,
+            url=row.url,
+            title=row.title,
+            snippet=(
+                (_highlighted(row.snippet) if row.snippet else None)
+                or make_snippet(f"{row.title or ''} {row.description or ''}".strip(), terms)
+                or _escape(row.domain)
+            ),
+            score=round(row.score, 4),
+        )
+        for row in session.execute(sources_sql, params)
+    ]
+    return SearchResponse(query=q, prompts=prompts, sources=sources)
+
+
+def _isoformat(value) -> str:
+    # Raw SQL on SQLite returns timestamps as strings
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value.replace(" ", "T")
+    return value.isoformat()
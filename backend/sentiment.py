@@ -0,0 +1,146 @@
+"""
+Lexicon-based sentiment of brand mentions.
+
+An answer is scanned once for sentence breaks (". ", "! ", "? " and line
+ends, so every list item and table row is a sentence of its own) and once
+with a regex compiled from the whole lexicon, so only lexicon words are ever
+looked at in Python. Each sentence gets a positive and a negative count; a
+polar word is flipped when one of the NEGATION_WINDOW words before it, in
+the same sentence, is a negation ("not recommended" counts as negative,
+"never difficult" as positive).
+
+Brand mentions (offsets found by answer_parser.BrandMatcher) are placed in
+their sentence, and each brand is scored over the sentences that mention it:
+
+    score = (positive - negative) / (positive + negative)
+
+from -1 (only negative words) to 1 (only positive words), 0 without any.
+The label is the sign of the score.
+
+The default lexicon can be replaced with a JSON file (same structure as
+DEFAULT_LEXICON) pointed to by SENTIMENT_LEXICON_FILE. Entries are single
+words; after changing them, run scripts/sync_brand_mentions.py to rescore
+stored mentions.
+"""
+
+import json
+import os
+import re
+from bisect import bisect_right
+from collections.abc import Iterable
+from functools import lru_cache
+from typing import NamedTuple
+
+POSITIVE = "positive"
+NEUTRAL = "neutral"
+NEGATIVE = "negative"
+
+# Words after a negation that it still applies to
+NEGATION_WINDOW = 3
+
+DEFAULT_LEXICON = {
+    "positive": [
+        "best", "excellent", "great", "top", "leading", "recommended", "recommend", "ideal", "perfect",
+        "strong", "strongest", "powerful",
+    ],
+    "negative": [
+        "worst", "avoid", "poor", "weak", "weakest", "limited", "limitations", "difficult", "complex",
+        "expensive", "struggles", "struggle",
+    ],
+    "negation": ["not", "no", "never", "without", "hardly", "neither", "nor", "cannot"],
+}
+
+_SENTENCE_END_RE = re.compile(r"[.!?](?=\s|$)|\n")
+_WORD_RE = re.compile(r"\w+")
+# Contractions ("isn't", "doesn’t") are negations whatever the lexicon says
+_CONTRACTION = r"\w+n['’]t"
+
+
+class BrandSentiment(NamedTuple):
+    label: str
+    score: float
+
+
+class SentimentScorer:
+    """Compiled lexicon; scoring is pure and needs one pass over the text"""
+
+    def __init__(self, lexicon: dict):
+        self.lexicon = lexicon
+        self._polarity: dict[str, int] = {}
+        for word in lexicon.get("positive", []):
+            self._polarity[word.lower()] = 1
+        for word in lexicon.get("negative", []):
+            self._polarity[word.lower()] = -1
+        negations = {word.lower() for word in lexicon.get("negation", [])} - set(self._polarity)
+
+        words = sorted(set(self._polarity) | negations, key=len, reverse=True)
+        alternatives = [re.escape(word) for word in words] + [_CONTRACTION]
+        self._regex = re.compile(rf"(?<![\w'’])(?:{'|'.join(alternatives)})(?![\w'’])")
+
+    def sentences(self, text: str) -> tuple[list[int], list[tuple[int, int]]]:
+        """Start offset and (positive, negative) counts of every sentence of a text"""
+        text = text.lower()
+        starts = [0] + [end.end() for end in _SENTENCE_END_RE.finditer(text)]
+        counts = [(0, 0)] * len(starts)
+
+        negation = None  # (sentence, end offset) of the last negation
+        for hit in self._regex.finditer(text):
+            sentence = bisect_right(starts, hit.start()) - 1
+            polarity = self._polarity.get(hit.group())
+            if polarity is None:
+                negation = (sentence, hit.end())
+                continue
+            if negation and negation[0] == sentence and (
+                len(_WORD_RE.findall(text, negation[1], hit.start())) < NEGATION_WINDOW
+            ):
+                polarity = -polarity
+            positive, negative = counts[sentence]
+            counts[sentence] = (positive + 1, negative) if polarity > 0 else (positive, negative + 1)
+        return starts, counts
+
+    def score_brands(self, text: str | None, mentions: Iterable[tuple[str, int]]) -> dict[str, BrandSentiment]:
+        """Sentiment of each brand from (brand id, offset) mentions in a text"""
+        if not text:
+            return {}
+
+        starts, counts = self.sentences(text)
+
+        # Sentence -> brand index: each sentence counts once per brand, however often it is named
+        sentences_by_brand: dict[str, set[int]] = {}
+        for brand_id, offset in mentions:
+            sentences_by_brand.setdefault(brand_id, set()).add(bisect_right(starts, offset) - 1)
+
+        result = {}
+        for brand_id, sentence_indexes in sentences_by_brand.items():
+            positive = sum(counts[i][0] for i in sentence_indexes)
+            negative = sum(counts[i][1] for i in sentence_indexes)
+            score = (positive - negative) / (positive + negative) if positive + negative else 0.0
+            label = POSITIVE if score > 0 else NEGATIVE if score < 0 else NEUTRAL
+            result[brand_id] = BrandSentiment(label, round(score, 3))
+        return result
+
+
+def load_lexicon() -> dict:
+    """Load the lexicon from SENTIMENT_LEXICON_FILE if set, else the built-in default"""
+    lexicon_file = os.getenv("SENTIMENT_LEXICON_FILE")
+    if lexicon_file:
+        with open(lexicon_file, encoding="utf-8") as f:
+            return json.load(f)
+    return DEFAULT_LEXICON
+
+
+@lru_cache(maxsize=1)
+def get_scorer() -> SentimentScorer:
+    """Process-wide scorer compiled from the configured lexicon"""
+    return SentimentScorer(load_lexicon())
+
+
+def score_brand_sentiment(text: str | None, mentions: Iterable[tuple[str, int]]) -> dict[str, BrandSentiment]:
+    """Score brand mentions with the configured lexicon"""
+    return get_scorer().score_brands(text, mentions)
+
+
+def average_score(scores: Iterable[float | None]) -> float | None:
+    """Mean of the stored scores (None when no mention has one)"""
+    values = [score for score in scores if score is not None]
+    return round(sum(values) / len(values), 3) if values else None
@@ -0,0 +1,199 @@
+"""
+Opportunity signals for the suggestion engine.
+
+Signals are small aggregate tables kept up to date as prompts are ingested, so
+/api/suggestions only reads precomputed counts:
+
+- QuerySignal: per query and month, runs mentioning a primary brand vs competitors
+- DomainSignal: per cited domain, citations from runs with/without the primary brand
+- SourceTypeSignal: per source type, sources and citations
+
+All signals are kept per project; a source counts towards a project's type
+totals once it is cited by one of the project's prompts.
+
+record_prompt() applies one ingested prompt incrementally. rebuild_signals()
+recomputes everything and is used after bulk rewrites of mentions or brands.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+
+from sqlmodel import Session, delete, func, select
+
+from classification import reclassify_sources
+from models import (
+    DomainSignal,
+    Prompt,
+    PromptBrandMention,
+    PromptSource,
+    QuerySignal,
+    Source,
+    SourceTypeSignal,
+)
+from scoring import primary_brand_ids
+
+COMPARISON_WORDS = ['vs', 'versus', 'compare', 'best', 'top']
+STREAM_BATCH_SIZE = 1000
+
+
+def is_comparison_query(query: str) -> bool:
+    """Whether a query asks to compare or rank platforms"""
+    query_lower = query.lower()
+    return any(word in query_lower for word in COMPARISON_WORDS)
+
+
+def month_key(scraped_at: datetime) -> str:
+    return scraped_at.strftime("%Y-%m")
+
+
+def _coverage(mentioned_brand_ids: set[str], primary_ids: set[str]) -> tuple[bool, bool]:
+    """(primary brand mentioned, any competitor mentioned)"""
+    has_primary = not mentioned_brand_ids.isdisjoint(primary_ids)
+    has_competitor = bool(mentioned_brand_ids - primary_ids)
+    return has_primary, has_competitor
+
+
+def record_prompt(
+    session: Session,
+    prompt: Prompt,
+    mentioned_brand_ids: set[str],
+    cited_sources: list[Source],
+    new_sources: list[Source],
+    primary_ids: set[str] | None = None,
+) -> None:
+    """
+    Add one newly ingested prompt to its project's signals (caller commits).
+
+    new_sources are the cited sources the project had not cited before.
+    """
+    project_id = prompt.project_id
+    if primary_ids is None:
+        primary_ids = primary_brand_ids(session, project_id)
+    has_primary, has_competitor = _coverage(mentioned_brand_ids, primary_ids)
+
+    month = month_key(prompt.scraped_at)
+    query_signal = session.exec(
+        select(QuerySignal).where(
+            QuerySignal.project_id == project_id,
+            QuerySignal.query == prompt.query,
+            QuerySignal.month == month,
+        )
+    ).first()
+    if query_signal is None:
+        query_signal = QuerySignal(
+            project_id=project_id,
+            query=prompt.query,
+            month=month,
+            is_comparison=is_comparison_query(prompt.query),
+        )
+    query_signal.runs += 1
+    query_signal.primary_runs += int(has_primary)
+    query_signal.competitor_runs += int(has_competitor)
+    session.add(query_signal)
+
+    for source in new_sources:
+        type_signal = (
+            session.get(SourceTypeSignal, (project_id, source.source_type))
+            or SourceTypeSignal(project_id=project_id, source_type=source.source_type)
+        )
+        type_signal.sources += 1
+        session.add(type_signal)
+        session.flush()
+
+    for source in cited_sources:
+        domain_signal = (
+            session.get(DomainSignal, (project_id, source.domain))
+            or DomainSignal(project_id=project_id, domain=source.domain)
+        )
+        domain_signal.citations += 1
+        domain_signal.primary_citations += int(has_primary)
+        domain_signal.competitor_only_citations += int(has_competitor and not has_primary)
+        session.add(domain_signal)
+
+        type_signal = (
+            session.get(SourceTypeSignal, (project_id, source.source_type))
+            or SourceTypeSignal(project_id=project_id, source_type=source.source_type)
+        )
+        type_signal.citations += 1
+        type_signal.primary_citations += int(has_primary)
+        session.add(type_signal)
+        # Flush so a domain/type cited twice in one prompt is found by the next get()
+        session.flush()
+
+
+def rebuild_signals(session: Session, project_id: str) -> None:
+    """Recompute a project's signal tables from its prompts, mentions and citations"""
+    # Signals are keyed by source type: type any source stored before types existed
+    reclassify_sources(session, only_missing=True)
+    primary_ids = primary_brand_ids(session, project_id)
+
+    mentioned: dict[int, set[str]] = defaultdict(set)
+    for prompt_id, brand_id in session.exec(
+        select(PromptBrandMention.prompt_id, PromptBrandMention.brand_id)
+        .where(PromptBrandMention.project_id == project_id, PromptBrandMention.mentioned.is_(True))
+    ):
+        mentioned[prompt_id].add(brand_id)
+
+    coverage = {prompt_id: _coverage(brand_ids, primary_ids) for prompt_id, brand_ids in mentioned.items()}
+    no_mentions = (False, False)
+
+    query_signals: dict[tuple[str, str], QuerySignal] = {}
+    for prompt_id, query, scraped_at in session.exec(
+        select(Prompt.id, Prompt.query, Prompt.scraped_at)
+        .where(Prompt.project_id == project_id)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    ):
+        key = (query, month_key(scraped_at))
+        signal = query_signals.get(key)
+        if signal is None:
+            signal = query_signals[key] = QuerySignal(
+                project_id=project_id, query=key[0], month=key[1], is_comparison=is_comparison_query(query)
+            )
+        has_primary, has_competitor = coverage.get(prompt_id, no_mentions)
+        signal.runs += 1
+        signal.primary_runs += int(has_primary)
+        signal.competitor_runs += int(has_competitor)
+
+    domain_signals: dict[str, DomainSignal] = {}
+    type_signals: dict[str, SourceTypeSignal] = {}
+    for source_type, count in session.exec(
+        select(Source.source_type, func.count(func.distinct(Source.id)))
+        .join(PromptSource, PromptSource.source_id == Source.id)
+        .where(PromptSource.project_id == project_id)
+        .group_by(Source.source_type)
+    ):
+        type_signals[source_type] = SourceTypeSignal(project_id=project_id, source_type=source_type, sources=count)
+
+    for prompt_id, domain, source_type in session.exec(
+        select(PromptSource.prompt_id, Source.domain, Source.source_type)
+        .join(Source, Source.id == PromptSource.source_id)
+        .where(PromptSource.project_id == project_id)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    ):
+        has_primary, has_competitor = coverage.get(prompt_id, no_mentions)
+        domain_signal = domain_signals.get(domain)
+        if domain_signal is None:
+            domain_signal = domain_signals[domain] = DomainSignal(project_id=project_id, domain=domain)
+        domain_signal.citations += 1
+        domain_signal.primary_citations += int(has_primary)
+        domain_signal.competitor_only_citations += int(has_competitor and not has_primary)
+
+        type_signal = type_signals.get(source_type)
+        if type_signal is None:
+            type_signal = type_signals[source_type] = SourceTypeSignal(project_id=project_id, source_type=source_type)
+        type_signal.citations += 1
+        type_signal.primary_citations += int(has_primary)
+
+    session.exec(delete(QuerySignal).where(QuerySignal.project_id == project_id))
+    session.exec(delete(DomainSignal).where(DomainSignal.project_id == project_id))
+    session.exec(delete(SourceTypeSignal).where(SourceTypeSignal.project_id == project_id))
+    session.add_all(query_signals.values())
+    session.add_all(domain_signals.values())
+    session.add_all(type_signals.values())
+    session.commit()
+
+
+def signals_empty(session: Session, project_id: str) -> bool:
+    return session.exec(
+        select(QuerySignal.id).where(QuerySignal.project_id == project_id).limit(1)
+    ).first() is None
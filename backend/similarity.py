@@ -0,0 +1,256 @@
+"""
+Near-duplicate detection between AI responses (MinHash + LSH).
+
+Each response body is reduced to a set of word shingles and summarised by a
+MinHash signature: NUM_PERM minimum hash values whose fraction of equal
+positions estimates the Jaccard similarity of two bodies. Signatures are
+computed once per distinct body, when it is stored (ResponseBlob.minhash).
+
+Shingles are single words: runs of the same query are reworded rather than
+copied, and longer shingles score nearly every pair of runs close to 0.
+
+For lookups across the whole corpus the signature is cut into LSH_BANDS
+bands; each band is hashed into a 64-bit bucket (ResponseBand). Bodies sharing at
+least one bucket are candidates, so finding near-duplicates of a response is
+a handful of indexed lookups instead of a comparison with every stored body.
+With 16 bands of 8 rows, pairs above ~0.7 similarity are almost always
+candidates and pairs below ~0.4 almost never are.
+"""
+
+import hashlib
+import random
+import re
+import struct
+from collections.abc import Iterable
+from datetime import datetime
+from itertools import combinations
+
+from sqlalchemy import exists
+from sqlmodel import Session, select
+
+from models import Prompt, ResponseBand, ResponseBlob
+from prompt_index import PromptRow
+from schemas import MonthlyDriftResponse
+
+SHINGLE_SIZE = 1  # Words per shingle
+NUM_PERM = 128
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+BACKFILL_BATCH_SIZE = 200
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_SIGNATURE_FORMAT = f"<{NUM_PERM}I"
+
+# Fixed seed: signatures must be comparable across processes and restarts
+_rng = random.Random(20251)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)
+]
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def shingles(response_text: str) -> set[int]:
+    """64-bit hashes of the overlapping SHINGLE_SIZE-word windows of a text (case and markup ignored)"""
+    words = _WORD_RE.findall(response_text.lower())
+    windows = [words] if len(words) < SHINGLE_SIZE else (
+        words[i:i + SHINGLE_SIZE] for i in range(len(words) - SHINGLE_SIZE + 1)
+    )
+    return {
+        int.from_bytes(hashlib.blake2b(" ".join(window).encode("utf-8"), digest_size=8).digest(), "little")
+        for window in windows if window
+    }
+
+
+def minhash(response_text: str) -> tuple[int, ...]:
+    """MinHash signature of a text (all _MAX_HASH for a text without words)"""
+    hashes = shingles(response_text)
+    if not hashes:
+        return (_MAX_HASH,) * NUM_PERM
+    return tuple(
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes) & _MAX_HASH
+        for a, b in _PERMUTATIONS
+    )
+
+
+def pack_signature(signature: tuple[int, ...]) -> bytes:
+    return struct.pack(_SIGNATURE_FORMAT, *signature)
+
+
+def unpack_signature(data: bytes) -> tuple[int, ...]:
+    return struct.unpack(_SIGNATURE_FORMAT, data)
+
+
+def signature_similarity(a: tuple[int, ...], b: tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity (0-1) of the texts behind two signatures"""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def band_buckets(signature: tuple[int, ...]) -> list[int]:
+    """Bucket key of each band of a signature (signed 64-bit, the band number is part of the hash)"""
+    return [
+        int.from_bytes(hashlib.blake2b(
+            struct.pack(f"<I{LSH_ROWS}I", band, *signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]), digest_size=8
+        ).digest(), "little", signed=True)
+        for band in range(LSH_BANDS)
+    ]
+
+
+def index_similarity(session: Session, blob: ResponseBlob, response_text: str) -> None:
+    """Store the signature of a new blob and add it to the LSH buckets; the caller commits"""
+    signature = minhash(response_text)
+    blob.minhash = pack_signature(signature)
+    session.add(blob)
+    for bucket in set(band_buckets(signature)):
+        session.add(ResponseBand(bucket=bucket, blob_id=blob.id))
+
+
+def backfill_signatures(engine) -> int:
+    """Sign blobs stored before signatures existed; returns how many were signed"""
+    from responses import decompress
+
+    signed = 0
+    with Session(engine) as session:
+        while True:
+            blobs = session.exec(
+                select(ResponseBlob).where(ResponseBlob.minhash.is_(None)).order_by(ResponseBlob.id)
+                .limit(BACKFILL_BATCH_SIZE)
+            ).all()
+            if not blobs:
+                break
+            for blob in blobs:
+                index_similarity(session, blob, decompress(blob.codec, blob.data))
+            session.commit()
+            signed += len(blobs)
+    return signed
+
+
+def load_signatures(session: Session, hashes: Iterable[str | None]) -> dict[str, tuple[int, ...]]:
+    """Signatures of the given response hashes (unsigned blobs are left out)"""
+    wanted = {h for h in hashes if h}
+    if not wanted:
+        return {}
+    rows = session.exec(
+        select(ResponseBlob.hash, ResponseBlob.minhash)
+        .where(ResponseBlob.hash.in_(wanted), ResponseBlob.minhash.is_not(None))
+    )
+    return {digest: unpack_signature(data) for digest, data in rows}
+
+
+def near_duplicate_prompts(session: Session, project_id: str, signatures: dict[str, tuple[int, ...]],
+                           threshold: float = NEAR_DUPLICATE_THRESHOLD) -> dict[str, list[int]]:
+    """
+    For each response hash, ids of the project's prompts whose response is a
+    near-duplicate (estimated similarity >= threshold), identical bodies included.
+
+    Candidates come from shared LSH buckets and are confirmed on their signatures.
+    """
+    if not signatures:
+        return {}
+
+    buckets: dict[int, set[str]] = {}
+    for digest, signature in signatures.items():
+        for bucket in band_buckets(signature):
+            buckets.setdefault(bucket, set()).add(digest)
+
+    # Identical bodies always match; bucket neighbours match if their signatures are close enough.
+    # Only bodies of the project's own runs are candidates: other tenants' buckets are never read.
+    matches: dict[str, set[str]] = {digest: {digest} for digest in signatures}
+    other_signatures: dict[str, tuple[int, ...]] = {}
+    rows = session.exec(
+        select(ResponseBand.bucket, ResponseBlob.hash, ResponseBlob.minhash)
+        .join(ResponseBlob, ResponseBlob.id == ResponseBand.blob_id)
+        .where(
+            ResponseBand.bucket.in_(buckets),
+            exists().where(Prompt.response_hash == ResponseBlob.hash, Prompt.project_id == project_id),
+        )
+    )
+    for bucket, other, data in rows:
+        if other not in other_signatures:
+            other_signatures[other] = unpack_signature(data)
+        for digest in buckets[bucket]:
+            if other not in matches[digest] and (
+                signature_similarity(signatures[digest], other_signatures[other]) >= threshold
+            ):
+                matches[digest].add(other)
+
+    prompts_by_hash: dict[str, list[int]] = {}
+    matched_hashes = set().union(*matches.values())
+    if matched_hashes:
+        for prompt_id, digest in session.exec(
+            select(Prompt.id, Prompt.response_hash)
+            .where(Prompt.project_id == project_id, Prompt.response_hash.in_(matched_hashes))
+            .order_by(Prompt.id)
+        ):
+            prompts_by_hash.setdefault(digest, []).append(prompt_id)
+
+    return {
+        digest: sorted(prompt_id for other in others for prompt_id in prompts_by_hash.get(other, []))
+        for digest, others in matches.items()
+    }
+
+
+def mean_similarity(pairs: Iterable[tuple[tuple[int, ...], tuple[int, ...]]]) -> float | None:
+    """Average estimated similarity over signature pairs (None without pairs)"""
+    scores = [signature_similarity(a, b) for a, b in pairs]
+    return sum(scores) / len(scores) if scores else None
+
+
+def within_similarity(signatures: list[tuple[int, ...]]) -> float | None:
+    """Average similarity between every pair of the given signatures"""
+    return mean_similarity(combinations(signatures, 2))
+
+
+def cross_similarity(first: list[tuple[int, ...]], second: list[tuple[int, ...]]) -> float | None:
+    """Average similarity between each signature of one group and each of the other"""
+    return mean_similarity((a, b) for a in first for b in second)
+
+
+def _percent(similarity: float | None) -> float | None:
+    return round(similarity * 100, 1) if similarity is not None else None
+
+
+def query_drift(prompts: Iterable[PromptRow], signatures: dict[str, tuple[int, ...]]
+                ) -> tuple[float | None, list[MonthlyDriftResponse]]:
+    """
+    Stability and month-over-month drift of one query's responses.
+
+    Stability is the average similarity between runs scraped in the same month;
+    a month's drift is how far its responses moved from the previous month's.
+    """
+    by_month: dict[str, list[tuple[int, ...]]] = {}
+    for prompt in prompts:
+        if prompt.month and prompt.response_hash in signatures:
+            by_month.setdefault(prompt.month, []).append(signatures[prompt.response_hash])
+
+    stability = mean_similarity(
+        pair for month_signatures in by_month.values() for pair in combinations(month_signatures, 2)
+    )
+
+    drift = []
+    previous = None
+    for month, month_signatures in sorted(by_month.items()):
+        across = cross_similarity(previous, month_signatures) if previous else None
+        drift.append(MonthlyDriftResponse(
+            month=datetime.strptime(month, "%Y-%m").strftime("%b %Y"),
+            runs=len(month_signatures),
+            stability=_percent(within_similarity(month_signatures)),
+            drift=_percent(1 - across) if across is not None else None,
+        ))
+        previous = month_signatures
+    return _percent(stability), drift
+
+
+def previous_run_similarity(prompts: list[PromptRow], signatures: dict[str, tuple[int, ...]]
+                            ) -> dict[int, float | None]:
+    """% similarity of each run's response to the run before it, by prompt id"""
+    result: dict[int, float | None] = {}
+    previous = None
+    for prompt in prompts:
+        current = signatures.get(prompt.response_hash)
+        result[prompt.id] = _percent(signature_similarity(previous, current)) if previous and current else None
+        previous = current
+    return result
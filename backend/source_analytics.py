@@ -0,0 +1,137 @@
+"""
+Source analytics engine.
+
+Builds the /api/sources/analytics response from a single streamed, grouped
+query over sources and their citations: domain breakdown, source-type
+distribution and the top sources are all accumulated in one scan.
+"""
+
+import heapq
+from collections import Counter
+
+from sqlmodel import Session, func, select
+
+from classification import get_classifier
+from models import Prompt, PromptSource, Source
+from schemas import (
+    DomainBreakdown,
+    SourcesAnalyticsResponse,
+    SourcesSummary,
+    SourceType,
+    TopSource,
+)
+
+TOP_DOMAINS = 20
+TOP_SOURCES = 50
+PROMPTS_PER_SOURCE = 5
+STREAM_BATCH_SIZE = 1000
+
+def source_citations_query(project_id: str):
+    """One row per source cited in the project with its total citation count (across all runs)"""
+    return (
+        select(
+            Source.id,
+            Source.domain,
+            Source.url,
+            Source.title,
+            Source.source_type,
+            func.count(PromptSource.id).label("citations"),
+        )
+        .select_from(PromptSource)
+        .join(Source, Source.id == PromptSource.source_id)
+        .where(PromptSource.project_id == project_id)
+        .group_by(Source.id, Source.domain, Source.url, Source.title, Source.source_type)
+        .order_by(Source.id)
+    )
+
+
+def _citing_queries(session: Session, project_id: str, source_ids: list[int]) -> dict[int, list[str]]:
+    """Unique citing queries per source (in citation order), for the given sources only"""
+    if not source_ids:
+        return {}
+
+    rows = session.exec(
+        select(PromptSource.source_id, Prompt.query)
+        .join(Prompt, Prompt.id == PromptSource.prompt_id)
+        .where(PromptSource.project_id == project_id, PromptSource.source_id.in_(source_ids))
+        .order_by(PromptSource.id)
+    )
+
+    queries: dict[int, list[str]] = {source_id: [] for source_id in source_ids}
+    for source_id, query in rows:
+        source_queries = queries[source_id]
+        if len(source_queries) < PROMPTS_PER_SOURCE and query not in source_queries:
+            source_queries.append(query)
+    return queries
+
+
+def build_sources_analytics(session: Session, project_id: str) -> SourcesAnalyticsResponse:
+    """Compute the full sources analytics response in one pass over the sources"""
+    domain_citations = Counter()
+    type_counts = Counter()
+    # Min-heap of (citations, -id, row) holding the current top sources
+    top_heap: list[tuple[int, int, tuple]] = []
+    total_sources = 0
+    classifier = get_classifier()
+
+    rows = session.exec(source_citations_query(project_id).execution_options(yield_per=STREAM_BATCH_SIZE))
+    for row in rows:
+        source_id, domain, url, title, source_type, citations = row
+        total_sources += 1
+        domain_citations[domain] += citations
+        # Stored at ingest; only rows that predate classification are classified here
+        type_counts[source_type or classifier.classify(domain, url)] += 1
+
+        # Source ids are unique, so comparisons never fall through to the row itself
+        entry = (citations, -source_id, (source_id, domain, url, title, citations))
+        if len(top_heap) < TOP_SOURCES:
+            heapq.heappush(top_heap, entry)
+        else:
+            heapq.heappushpop(top_heap, entry)
+
+    total_citations = sum(domain_citations.values())
+
+    domain_breakdown = [
+        DomainBreakdown(
+            domain=domain,
+            citations=citations,
+            percentage=round(citations / total_citations * 100, 1) if total_citations > 0 else 0,
+            type=classifier.classify_domain(domain),
+        )
+        for domain, citations in heapq.nlargest(TOP_DOMAINS, domain_citations.items(), key=lambda x: x[1])
+    ]
+
+    source_types = [
+        SourceType(
+            type=stype,
+            count=count,
+            percentage=round(count / total_sources * 100, 1) if total_sources > 0 else 0,
+        )
+        for stype, count in type_counts.most_common()
+    ]
+
+    top_rows = [entry[2] for entry in sorted(top_heap, reverse=True)]
+    prompts_by_source = _citing_queries(session, project_id, [r[0] for r in top_rows])
+    top_sources = [
+        TopSource(
+            id=source_id,
+            domain=domain,
+            url=url,
+            title=title,
+            citations=citations,
+            prompts=prompts_by_source.get(source_id, []),
+        )
+        for source_id, domain, url, title, citations in top_rows
+    ]
+
+    return SourcesAnalyticsResponse(
+        summary=SourcesSummary(
+            totalSources=total_sources,
+            totalDomains=len(domain_citations),
+            totalCitations=total_citations,
+            avgCitationsPerSource=round(total_citations / total_sources, 1) if total_sources > 0 else 0,
+        ),
+        domainBreakdown=domain_breakdown,
+        sourceTypes=source_types,
+        topSources=top_sources,
+    )
@@ -0,0 +1,80 @@
+"""
+Source listing queries.
+
+All per-source metrics are computed by the database in a single grouped join,
+so listing cost no longer grows with the number of citations per source.
+Sources are shared between projects; a project's sources are those its
+prompts cite.
+"""
+
+from collections.abc import Iterator
+
+from sqlalchemy import Float, cast
+from sqlmodel import Session, func, select
+
+from models import Prompt, PromptSource, Source
+from schemas import SourceResponse
+
+# Rows fetched per round trip when streaming large source lists
+STREAM_BATCH_SIZE = 1000
+
+
+def source_stats_query(project_id: str):
+    """
+    One row per source cited in the project: domain, distinct citing queries,
+    average citation order, plus the project's total number of distinct queries
+    (used to compute usage %).
+    """
+    total_queries = (
+        select(func.count(func.distinct(Prompt.query)))
+        .where(Prompt.project_id == project_id)
+        .scalar_subquery()
+    )
+    citing_queries = func.count(func.distinct(Prompt.query))
+
+    return (
+        select(
+            Source.domain,
+            citing_queries.label("citing_queries"),
+            func.avg(cast(PromptSource.citation_order, Float)).label("avg_citation_order"),
+            total_queries.label("total_queries"),
+        )
+        .select_from(PromptSource)
+        .join(Source, Source.id == PromptSource.source_id)
+        .join(Prompt, Prompt.id == PromptSource.prompt_id)
+        .where(PromptSource.project_id == project_id)
+        .group_by(Source.id, Source.domain)
+        .order_by(citing_queries.desc(), Source.id)
+    )
+
+
+def iter_source_stats(session: Session, project_id: str) -> Iterator[SourceResponse]:
+    """Yield SourceResponse rows sorted by usage, fetching in batches"""
+    rows = session.exec(
+        source_stats_query(project_id).execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+    for domain, citing, avg_order, total in rows:
+        usage = (citing / total * 100) if total else 0
+        yield SourceResponse(
+            domain=domain,
+            usage=round(usage, 1),
+            avgCitations=round(avg_order or 0, 1),
+        )
+
+
+def stream_sources_json(engine, project_id: str) -> Iterator[str]:
+    """
+    Encode the source list as a JSON array chunk by chunk.
+
+    Opens its own session because the response body is produced after the
+    request's dependency-managed session may already be closed.
+    """
+    with Session(engine) as session:
+        yield "["
+        first = True
+        for source in iter_source_stats(session, project_id):
+            if not first:
+                yield ","
+            first = False
+            yield source.model_dump_json()
+        yield "]"
@@ -0,0 +1,271 @@
+"""
+Suggestion engine.
+
+Suggestions are produced by a pipeline of generator functions that each read
+the precomputed signals (see signals.py) and return a Suggestion or None.
+Adding a suggestion type means adding a generator to SUGGESTION_GENERATORS;
+no per-request scans over prompts or sources are involved.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from sqlmodel import Session, select
+
+from models import DomainSignal, PromptSource, QuerySignal, Source, SourceTypeSignal
+from schemas import Suggestion, SuggestionExample, SuggestionsResponse
+
+# Month used for the current visibility score and gap analysis
+CURRENT_MONTH = "2026-01"
+
+# A source type is under-indexed when its share of citations in runs that mention
+# the primary brand is below this fraction of its share across all runs
+UNDER_INDEX_RATIO = 0.75
+
+
+@dataclass
+class SignalSnapshot:
+    """A project's signal tables loaded once per request"""
+    project_id: str
+    query_signals: list[QuerySignal]
+    domain_signals: list[DomainSignal]
+    type_signals: dict[str, SourceTypeSignal]
+
+    @property
+    def total_sources(self) -> int:
+        return sum(t.sources for t in self.type_signals.values())
+
+    @property
+    def queries(self) -> list[str]:
+        return sorted({q.query for q in self.query_signals})
+
+    @property
+    def comparison_queries(self) -> list[str]:
+        return sorted({q.query for q in self.query_signals if q.is_comparison})
+
+    def current_month(self) -> list[QuerySignal]:
+        return [q for q in self.query_signals if q.month == CURRENT_MONTH]
+
+    def type_pct(self, source_type: str) -> int:
+        total = self.total_sources
+        signal = self.type_signals.get(source_type)
+        return round(signal.sources / total * 100) if signal and total > 0 else 0
+
+
+def load_signals(session: Session, project_id: str) -> SignalSnapshot:
+    return SignalSnapshot(
+        project_id=project_id,
+        query_signals=list(session.exec(
+            select(QuerySignal).where(QuerySignal.project_id == project_id)
+        ).all()),
+        domain_signals=list(session.exec(
+            select(DomainSignal).where(DomainSignal.project_id == project_id)
+        ).all()),
+        type_signals={t.source_type: t for t in session.exec(
+            select(SourceTypeSignal).where(SourceTypeSignal.project_id == project_id)
+        ).all()},
+    )
+
+
+def _sample_sources(session: Session, signals: SignalSnapshot, source_type: str,
+                    limit: int = 3) -> list[SuggestionExample]:
+    """First sources of a type cited by the project"""
+    cited = select(PromptSource.source_id).where(PromptSource.project_id == signals.project_id)
+    sources = session.exec(
+        select(Source)
+        .where(Source.source_type == source_type, Source.id.in_(cited))
+        .order_by(Source.id)
+        .limit(limit)
+    ).all()
+    return [SuggestionExample(type="source", domain=s.domain, title=s.title) for s in sources]
+
+
+def blog_content(session: Session, signals: SignalSnapshot) -> Suggestion:
+    blog_pct = signals.type_pct("blog")
+    return Suggestion(
+        id=0,
+        priority="high",
+        category="content",
+        title="Create More Blog Content",
+        description=f"{blog_pct}% of AI citation sources are blog posts. Publishing regular, in-depth blog content about ecommerce topics significantly increases your chances of being cited by AI systems. Focus on comprehensive guides and tutorials.",
+        stat=f"{blog_pct}%",
+        statLabel="of sources are blogs",
+        action="Start a blog with ecommerce guides, tutorials, and industry insights",
+        examples=_sample_sources(session, signals, "blog") + [
+            SuggestionExample(type="prompt", query=q) for q in signals.comparison_queries[:2]
+        ],
+    )
+
+
+def community_engagement(session: Session, signals: SignalSnapshot) -> Suggestion:
+    community_pct = signals.type_pct("community")
+    return Suggestion(
+        id=0,
+        priority="medium",
+        category="community",
+        title="Engage on Reddit & Forums",
+        description=f"{community_pct}% of AI citations come from community discussions on Reddit and forums. Participating authentically in relevant subreddits like r/ecommerce, r/shopify, and r/smallbusiness can boost your visibility.",
+        stat=f"{community_pct}%",
+        statLabel="of sources are community sites",
+        action="Join r/ecommerce, r/entrepreneur, and relevant subreddit communities",
+        examples=_sample_sources(session, signals, "community"),
+    )
+
+
+def industry_publications(session: Session, signals: SignalSnapshot) -> Suggestion:
+    news_pct = signals.type_pct("news")
+    return Suggestion(
+        id=0,
+        priority="high",
+        category="authority",
+        title="Get Featured in Industry Publications",
+        description=f"News and industry publications account for {news_pct}% of AI citations. PR efforts, guest posts, and getting featured on authority sites like Forbes, TechCrunch, and Entrepreneur improve AI visibility significantly.",
+        stat=f"{news_pct}%",
+        statLabel="are news/industry sites",
+        action="Pitch stories to ecommerce and tech publications, pursue guest posting opportunities",
+        examples=_sample_sources(session, signals, "news"),
+    )
+
+
+def comparison_queries(session: Session, signals: SignalSnapshot) -> Suggestion:
+    total_queries = len(signals.queries)
+    comparison = signals.comparison_queries
+    comparison_pct = round(len(comparison) / total_queries * 100) if total_queries else 0
+    return Suggestion(
+        id=0,
+        priority="medium",
+        category="technical",
+        title="Optimize for Comparison Queries",
+        description=f"{comparison_pct}% of tracked prompts are comparison queries (e.g., 'best platform', 'X vs Y'). Creating dedicated comparison pages and landing pages optimized for these queries can improve visibility.",
+        stat=f"{comparison_pct}%",
+        statLabel="of queries compare platforms",
+        action="Build comparison landing pages and feature comparison content",
+        examples=[SuggestionExample(type="prompt", query=q) for q in comparison[:3]],
+    )
+
+
+def review_platforms(session: Session, signals: SignalSnapshot) -> Suggestion:
+    review_pct = signals.type_pct("review")
+    return Suggestion(
+        id=0,
+        priority="low",
+        category="content",
+        title="Collect Reviews on G2 & Capterra",
+        description=f"Review platforms account for {review_pct}% of sources. Having strong presence on review sites like G2, Capterra, and Trustpilot provides social proof that AI systems reference.",
+        stat=f"{review_pct}%",
+        statLabel="are review platforms",
+        action="Encourage customers to leave reviews on G2, Capterra, and Trustpilot",
+        examples=[],
+    )
+
+
+def competitor_gap_queries(session: Session, signals: SignalSnapshot) -> Suggestion | None:
+    """Queries where competitors are mentioned but the primary brand never is"""
+    current = signals.current_month()
+    gaps = sorted(
+        (q for q in current if q.primary_runs == 0 and q.competitor_runs > 0),
+        key=lambda q: (-q.competitor_runs, q.query),
+    )
+    if not gaps:
+        return None
+
+    gap_pct = round(len(gaps) / len(current) * 100)
+    return Suggestion(
+        id=0,
+        priority="high",
+        category="content",
+        title="Win Queries Where Only Competitors Appear",
+        description=f"In {gap_pct}% of this month's tracked queries, AI answers recommend competitors without mentioning your brand. Targeted content answering exactly these questions is the most direct way to enter those answers.",
+        stat=f"{len(gaps)}",
+        statLabel="queries mention competitors but not you",
+        action="Publish pages that directly answer these queries and position your product against the named competitors",
+        examples=[SuggestionExample(type="prompt", query=q.query) for q in gaps[:3]],
+    )
+
+
+def competitor_only_domains(session: Session, signals: SignalSnapshot) -> Suggestion | None:
+    """Domains cited only in answers where competitors appear without the primary brand"""
+    domains = sorted(
+        (d for d in signals.domain_signals if d.competitor_only_citations > 0 and d.primary_citations == 0),
+        key=lambda d: (-d.competitor_only_citations, d.domain),
+    )
+    if not domains:
+        return None
+
+    return Suggestion(
+        id=0,
+        priority="medium",
+        category="authority",
+        title="Get Cited by Competitor-Only Sources",
+        description=f"{len(domains)} domains are cited by AI answers that mention competitors but never your brand. Earning coverage on these sites feeds the exact sources AI systems already trust for these topics.",
+        stat=f"{len(domains)}",
+        statLabel="domains only cite competitors",
+        action="Reach out to these sites for reviews, comparisons, or guest content featuring your brand",
+        examples=[SuggestionExample(type="source", domain=d.domain) for d in domains[:3]],
+    )
+
+
+def under_indexed_source_types(session: Session, signals: SignalSnapshot) -> Suggestion | None:
+    """Source type with the largest shortfall in runs that mention the primary brand"""
+    total_citations = sum(t.citations for t in signals.type_signals.values())
+    primary_citations = sum(t.primary_citations for t in signals.type_signals.values())
+    if not total_citations or not primary_citations:
+        return None
+
+    worst = None
+    for signal in signals.type_signals.values():
+        if not signal.source_type or signal.source_type == "other" or not signal.citations:
+            continue
+        overall_share = signal.citations / total_citations
+        primary_share = signal.primary_citations / primary_citations
+        ratio = primary_share / overall_share
+        if ratio < UNDER_INDEX_RATIO and (worst is None or ratio < worst[0]):
+            worst = (ratio, signal, overall_share, primary_share)
+
+    if worst is None:
+        return None
+
+    _, signal, overall_share, primary_share = worst
+    return Suggestion(
+        id=0,
+        priority="medium",
+        category="content",
+        title=f"Close the Gap on {signal.source_type.title()} Sources",
+        description=f"{signal.source_type.title()} sources make up {round(overall_share * 100)}% of all citations but only {round(primary_share * 100)}% of citations in answers that mention your brand. Improving your presence on this kind of source is likely to lift visibility.",
+        stat=f"{round(primary_share * 100)}% vs {round(overall_share * 100)}%",
+        statLabel=f"{signal.source_type} citation share (you vs overall)",
+        action=f"Prioritize getting featured on {signal.source_type} sources cited for your tracked queries",
+        examples=_sample_sources(session, signals, signal.source_type),
+    )
+
+
+SUGGESTION_GENERATORS: list[Callable[[Session, SignalSnapshot], Suggestion | None]] = [
+    blog_content,
+    community_engagement,
+    industry_publications,
+    comparison_queries,
+    review_platforms,
+    competitor_gap_queries,
+    competitor_only_domains,
+    under_indexed_source_types,
+]
+
+
+def build_suggestions(session: Session, project_id: str) -> SuggestionsResponse:
+    """Run every generator over the project's current signals"""
+    signals = load_signals(session, project_id)
+
+    suggestions = []
+    for generator in SUGGESTION_GENERATORS:
+        suggestion = generator(session, signals)
+        if suggestion is not None:
+            suggestion.id = len(suggestions) + 1
+            suggestions.append(suggestion)
+
+    # Overall AI SEO score: share of this month's queries where a primary brand appears
+    current = signals.current_month()
+    visible = sum(1 for q in current if q.primary_runs > 0)
+    visibility_score = round(visible / len(current) * 100) if current else 0
+    ai_seo_score = min(100, round(visibility_score * 0.9 + 10))  # Base 10 + visibility contribution
+
+    return SuggestionsResponse(score=ai_seo_score, suggestions=suggestions)
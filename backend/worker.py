@@ -0,0 +1,86 @@
+"""
+Job queue worker (see jobs.py).
+
+Runs N worker processes that claim and run queued jobs: scrapes, mention
+re-syncs and, when the API runs with JOB_WORKERS=0, brand re-scans and
+re-matches.
+Workers on several machines can share one PostgreSQL database. Each
+worker keeps one browser session open for its scrapes (see
+scraper_sessions.py). SIGINT or SIGTERM lets every worker finish its
+current job before exiting.
+
+Usage: python worker.py [--workers=N] [--kinds=scrape,rematch,...] [--burst]
+
+--burst exits once no job is runnable instead of waiting for new ones.
+"""
+
+import multiprocessing
+import signal
+import sys
+import threading
+
+import scraper_sessions
+from database import create_db_and_tables, engine
+from jobs import HANDLERS, work
+
+
+def parse_args(argv: list[str]) -> tuple[int, list[str] | None, bool]:
+    """(worker processes, job kinds or None for all, burst)"""
+    workers = 1
+    kinds = None
+    burst = False
+    for arg in argv:
+        if arg.startswith("--workers="):
+            workers = int(arg.split("=", 1)[1])
+        elif arg.startswith("--kinds="):
+            kinds = [kind.strip() for kind in arg.split("=", 1)[1].split(",") if kind.strip()]
+            unknown = set(kinds) - set(HANDLERS)
+            if unknown:
+                sys.exit(f"Unknown job kinds: {', '.join(sorted(unknown))}")
+        elif arg == "--burst":
+            burst = True
+    return workers, kinds, burst
+
+
+def run_worker(kinds: list[str] | None, burst: bool, slot: int = 0) -> None:
+    """Run one worker in this process until it is signalled (or, with burst, the queue is empty)"""
+    # Connections inherited from the parent must not be shared with it
+    engine.dispose(close=False)
+    # The browser session of the worker keeps its CAPTCHA history across restarts
+    scraper_sessions.use_slot(slot)
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+    try:
+        ran = work(kinds, stop, burst)
+    finally:
+        scraper_sessions.close_scraper()
+    print(f"Worker stopped after {ran} job(s)")
+
+
+def main(workers: int, kinds: list[str] | None, burst: bool) -> None:
+    create_db_and_tables()
+    print(f"Starting {workers} worker(s) for {', '.join(kinds) if kinds else 'all'} jobs")
+    if workers == 1:
+        run_worker(kinds, burst)
+        return
+
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(kinds, burst, slot)) for slot in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    def forward(*_):
+        for process in processes:
+            process.terminate()
+
+    # A terminal's Ctrl-C reaches every worker itself; SIGTERM is passed on to them
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, forward)
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main(*parse_args(sys.argv[1:]))
@@ -2,6 +2,12 @@ import { config } from '../config';
 
 const API_BASE = config.apiBaseUrl;
 
+/** Build an API URL scoped to the configured project */
+function apiUrl(endpoint: string): string {
+  const separator = endpoint.includes('?') ? '&' : '?';
+  return `${API_BASE}${endpoint}${separator}project=${encodeURIComponent(config.projectId)}`;
+}
+
 export interface BrandResponse {
   id: string;
   name: string;
@@ -11,6 +17,7 @@ export interface BrandResponse {
   avgPosition: number;
   trend: string;
   sentiment: string;
+  sentimentScore: number | null;
 }
 
 export interface PromptBrandMentionResponse {
@@ -40,6 +47,8 @@ export interface RunResponse {
   brands: PromptBrandMentionResponse[];
   responseText: string | null;
   sources: SourceInPromptResponse[];
+  similarToPrevious: number | null;
+  nearDuplicateRunIds: number[];
 }
 
 export interface PromptResponse {
@@ -52,8 +61,17 @@ export interface PromptResponse {
   brands: PromptBrandMentionResponse[];
 }
 
+export interface MonthlyDriftResponse {
+  month: string;
+  runs: number;
+  stability: number | null;
+  drift: number | null;
+}
+
 export interface PromptDetailResponse extends PromptResponse {
   runs: RunResponse[];
+  stability: number | null;
+  drift: MonthlyDriftResponse[];
 }
 
 export interface SourceResponse {
@@ -75,17 +93,13 @@ export interface DashboardMetricsResponse {
   avgPosition: MetricResponse;
 }
 
-export interface DailyVisibilityResponse {
-  date: string;
-  shopify: number | null;
-  woocommerce: number | null;
-  bigcommerce: number | null;
-  wix: number | null;
-  squarespace: number | null;
+export interface VisibilitySeriesResponse {
+  dates: string[];
+  series: Record<string, number[]>;  // brand id -> visibility per date
 }
 
 async function fetchJson<T>(endpoint: string): Promise<T> {
-  const response = await fetch(`${API_BASE}${endpoint}`);
+  const response = await fetch(apiUrl(endpoint));
   if (!response.ok) {
     throw new Error(`API error: ${response.status}`);
   }
@@ -112,8 +126,8 @@ export async function fetchMetrics(): Promise<DashboardMetricsResponse> {
   return fetchJson<DashboardMetricsResponse>('/metrics');
 }
 
-export async function fetchVisibilityData(): Promise<DailyVisibilityResponse[]> {
-  return fetchJson<DailyVisibilityResponse[]>('/visibility');
+export async function fetchVisibilityData(): Promise<VisibilitySeriesResponse> {
+  return fetchJson<VisibilitySeriesResponse>('/visibility');
 }
 
 // Sources Analytics types
@@ -209,6 +223,7 @@ export interface BrandDetailResponse {
   avgPosition: number;
   trend: string;
   sentiment: string;
+  sentimentScore: number | null;
   totalMentions: number;
   totalPrompts: number;
   topPrompts: BrandPromptDetailResponse[];
@@ -232,7 +247,7 @@ export async function fetchBrandsDetails(): Promise<BrandsListResponse> {
 }
 
 export async function createBrand(brand: BrandCreateRequest): Promise<BrandDetailResponse> {
-  const response = await fetch(`${API_BASE}/brands`, {
+  const response = await fetch(apiUrl('/brands'), {
     method: 'POST',
     headers: {
       'Content-Type': 'application/json',
@@ -246,8 +261,49 @@ export async function createBrand(brand: BrandCreateRequest): Promise<BrandDetai
   return response.json();
 }
 
+export interface BrandUpdateRequest {
+  name?: string;
+  type?: string;
+  color?: string;
+  variations?: string[];
+}
+
+export interface BrandRematchResponse {
+  id: number;
+  status: 'running' | 'done' | 'superseded' | 'failed';
+  name: string;
+  variations: string[];
+  parsed: number;
+  total: number;
+  error: string | null;
+}
+
+export interface BrandUpdateResponse {
+  brand: BrandDetailResponse;  // As currently served: old name/variations until the re-match is done
+  rematch: BrandRematchResponse | null;
+}
+
+export async function updateBrand(brandId: string, update: BrandUpdateRequest): Promise<BrandUpdateResponse> {
+  const response = await fetch(apiUrl(`/brands/${brandId}`), {
+    method: 'PATCH',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify(update),
+  });
+  if (!response.ok) {
+    const error = await response.json();
+    throw new Error(error.detail || `API error: ${response.status}`);
+  }
+  return response.json();
+}
+
+export async function fetchBrandRematch(brandId: string): Promise<BrandRematchResponse> {
+  return fetchJson<BrandRematchResponse>(`/brands/${brandId}/rematch`);
+}
+
 export async function deleteBrand(brandId: string): Promise<{ success: boolean; message: string }> {
-  const response = await fetch(`${API_BASE}/brands/${brandId}`, {
+  const response = await fetch(apiUrl(`/brands/${brandId}`), {
     method: 'DELETE',
   });
   if (!response.ok) {
@@ -256,3 +312,32 @@ export async function deleteBrand(brandId: string): Promise<{ success: boolean;
   }
   return response.json();
 }
+
+// Full-text search types
+export interface PromptSearchHit {
+  id: number;  // Run id
+  query: string;
+  runNumber: number;
+  scrapedAt: string;
+  snippet: string;  // Escaped HTML, matched terms wrapped in <mark></mark>
+  score: number;
+}
+
+export interface SourceSearchHit {
+  id: number;
+  domain: string;
+  url: string;
+  title: string | null;
+  snippet: string;
+  score: number;
+}
+
+export interface SearchResponse {
+  query: string;
+  prompts: PromptSearchHit[];
+  sources: SourceSearchHit[];
+}
+
+export async function searchContent(query: string, limit = 5): Promise<SearchResponse> {
+  return fetchJson<SearchResponse>(`/search?q=${encodeURIComponent(query)}&limit=${limit}`);
+}
@@ -1,4 +1,4 @@
-import { FileText, Building2, Globe } from 'lucide-react';
+import { FileText, MessageSquareText, Building2, Globe } from 'lucide-react';
 import type { SearchResult } from '../../types';
 
 interface SearchResultItemProps {
@@ -9,6 +9,7 @@ interface SearchResultItemProps {
 
 const categoryIcons = {
   prompts: FileText,
+  responses: MessageSquareText,
   brands: Building2,
   sources: Globe,
 };
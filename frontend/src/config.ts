@@ -8,6 +8,9 @@ export const config = {
   /** Base URL for API requests */
   apiBaseUrl: import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000/api',
 
+  /** Project (client workspace) whose data is shown */
+  projectId: import.meta.env.VITE_PROJECT_ID || 'default',
+
   /**
    * Extract the host (origin) from API URL for error messages.
    * Example: "http://localhost:8000/api" -> "http://localhost:8000"
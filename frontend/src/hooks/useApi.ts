@@ -9,15 +9,17 @@ import {
   fetchSourcesAnalytics,
   fetchSuggestions,
   fetchBrandsDetails,
+  searchContent,
   type BrandResponse,
   type PromptResponse,
   type PromptDetailResponse,
   type SourceResponse,
   type DashboardMetricsResponse,
-  type DailyVisibilityResponse,
+  type VisibilitySeriesResponse,
   type SourcesAnalyticsResponse,
   type SuggestionsDataResponse,
   type BrandsListResponse,
+  type SearchResponse,
 } from '../api/client';
 
 interface UseApiState<T> {
@@ -96,7 +98,7 @@ export function useMetrics() {
 }
 
 export function useVisibilityData() {
-  return useApiQuery<DailyVisibilityResponse[]>(fetchVisibilityData);
+  return useApiQuery<VisibilitySeriesResponse>(fetchVisibilityData);
 }
 
 export function useSourcesAnalytics() {
@@ -110,3 +112,12 @@ export function useSuggestions() {
 export function useBrandsDetails() {
   return useApiQuery<BrandsListResponse>(fetchBrandsDetails);
 }
+
+export function useSearch(query: string) {
+  const fetcher = useCallback(() => searchContent(query), [query]);
+  return useApiQuery<SearchResponse>(
+    fetcher,
+    [query],
+    { enabled: query.length >= 2 }
+  );
+}
@@ -1,13 +1,23 @@
 import { useMemo } from 'react';
-import { useBrands, usePrompts, useSources } from './useApi';
+import { useBrands, usePrompts, useSources, useSearch } from './useApi';
 import type { SearchResultGroup, SearchResult } from '../types';
 
 const MAX_RESULTS_PER_CATEGORY = 5;
 
+/** Plain-text snippet (the API escapes the text and marks matched terms with <mark>) */
+function stripHighlights(snippet: string): string {
+  return snippet
+    .replace(/<\/?mark>/g, '')
+    .replace(/&lt;/g, '<')
+    .replace(/&gt;/g, '>')
+    .replace(/&amp;/g, '&');
+}
+
 export function useGlobalSearch(query: string) {
   const { data: prompts } = usePrompts();
   const { data: brands } = useBrands();
   const { data: sources } = useSources();
+  const { data: fullText } = useSearch(query.trim());
 
   const results = useMemo<SearchResultGroup[]>(() => {
     if (!query || query.length < 2) return [];
@@ -49,6 +59,22 @@ export function useGlobalSearch(query: string) {
         href: `/sources?domain=${encodeURIComponent(s.domain)}`,
       }));
 
+    // Runs whose AI response matches (server-side full-text search), one per query
+    const seenQueries = new Set(promptResults.map((r) => r.title));
+    const responseResults: SearchResult[] = [];
+    for (const hit of fullText?.prompts ?? []) {
+      if (seenQueries.has(hit.query) || responseResults.length >= MAX_RESULTS_PER_CATEGORY) continue;
+      seenQueries.add(hit.query);
+      const prompt = prompts.find((p) => p.query === hit.query);
+      responseResults.push({
+        id: `run-${hit.id}`,
+        category: 'responses',
+        title: hit.query,
+        subtitle: stripHighlights(hit.snippet),
+        href: prompt ? `/prompts?highlight=${prompt.id}` : '/prompts',
+      });
+    }
+
     const groups: SearchResultGroup[] = [];
 
     if (brandResults.length > 0) {
@@ -57,12 +83,15 @@ export function useGlobalSearch(query: string) {
     if (promptResults.length > 0) {
       groups.push({ category: 'prompts', label: 'Prompts', results: promptResults });
     }
+    if (responseResults.length > 0) {
+      groups.push({ category: 'responses', label: 'AI Responses', results: responseResults });
+    }
     if (sourceResults.length > 0) {
       groups.push({ category: 'sources', label: 'Sources', results: sourceResults });
     }
 
     return groups;
-  }, [query, prompts, brands, sources]);
+  }, [query, prompts, brands, sources, fullText]);
 
   const totalResults = results.reduce((sum, group) => sum + group.results.length, 0);
 
@@ -156,14 +156,13 @@ export function Dashboard() {
 
   const chartData: DailyVisibility[] = useMemo(() => {
     if (!visibilityData) return [];
-    return visibilityData.map(d => ({
-      date: d.date,
-      shopify: d.shopify ?? 0,
-      woocommerce: d.woocommerce ?? 0,
-      bigcommerce: d.bigcommerce ?? 0,
-      wix: d.wix ?? 0,
-      squarespace: d.squarespace ?? 0,
-    }));
+    return visibilityData.dates.map((date, idx) => {
+      const point: DailyVisibility = { date };
+      for (const [brandId, values] of Object.entries(visibilityData.series)) {
+        point[brandId] = values[idx] ?? 0;
+      }
+      return point;
+    });
   }, [visibilityData]);
 
   const isLoading = brandsLoading || sourcesLoading || metricsLoading || visibilityLoading;
@@ -45,7 +45,7 @@ export interface MetricData {
 }
 
 // Search types
-export type SearchCategory = 'prompts' | 'brands' | 'sources';
+export type SearchCategory = 'prompts' | 'responses' | 'brands' | 'sources';
 
 export interface SearchResult {
   id: string;
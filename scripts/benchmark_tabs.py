@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark scraping in tabs against one query at a time, on a local fixture server.
+
+The fixture server answers /search like AI Mode: a page that shows
+"Thinking..." for --think seconds, then renders an answer (headings, list
+items, cited links). The same queries are scraped by one browser, first one
+at a time (GoogleAIScraper.scrape) and then in --tabs concurrent tabs
+(scrape_in_tabs). The report gives wall time, throughput, the browser's peak
+memory (with psutil) and whether every answer was extracted.
+
+Usage:
+    python scripts/benchmark_tabs.py [--queries=12] [--tabs=4] [--think=5] [--headless]
+"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from scrapers.google_ai_scraper import GoogleAIScraper
+
+FIXTURE_PAGE = """<!doctype html>
+<html><head><title>{query} - Fixture AI Mode</title></head>
+<body>
+<div id="answer">Thinking...</div>
+<script>
+document.cookie = "SOCS=fixture; path=/";
+setTimeout(function () {{
+    document.getElementById("answer").innerHTML = {answer};
+}}, {think_ms});
+</script>
+</body></html>
+"""
+
+FIXTURE_ANSWER = (
+    "<h2>Top picks for {query}</h2>"
+    "<ul>"
+    "<li>Acme Suite is the most complete option for {query} in most reviews.</li>"
+    "<li>Globex One is cheaper and works well for small teams looking at {query}.</li>"
+    "</ul>"
+    "<ul>"
+    "<li><a href='https://reviews.example.com/{slug}'>The best tools for {query} compared</a></li>"
+    "<li><a href='https://blog.example.org/{slug}-guide'>A buyer's guide to {query}</a></li>"
+    "</ul>"
+)
+
+
+def fixture_handler(think_seconds: float):
+    class FixtureHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/search":
+                self.send_error(404)
+                return
+            query = parse_qs(url.query).get("q", [""])[0]
+            answer = FIXTURE_ANSWER.format(query=query, slug=query.replace(" ", "-"))
+            think_ms = int(think_seconds * 1000)
+            body = FIXTURE_PAGE.format(query=query, answer=json.dumps(answer), think_ms=think_ms).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+
+def run(scraper: GoogleAIScraper, queries: list[str], tabs: int) -> tuple[float, list]:
+    start = time.time()
+    if tabs == 1:
+        results = [scraper.scrape(query) for query in queries]
+    else:
+        results = list(scraper.scrape_in_tabs(queries, tabs=tabs))
+    return time.time() - start, results
+
+
+def parse_args(argv: list[str]) -> tuple[int, int, float, bool]:
+    """(queries, tabs, think seconds, headless)"""
+    count, tabs, think, headless = 12, 4, 5.0, False
+    for arg in argv:
+        if arg.startswith("--queries="):
+            count = int(arg.split("=", 1)[1])
+        elif arg.startswith("--tabs="):
+            tabs = max(2, int(arg.split("=", 1)[1]))
+        elif arg.startswith("--think="):
+            think = float(arg.split("=", 1)[1])
+        elif arg == "--headless":
+            headless = True
+    return count, tabs, think, headless
+
+
+def main():
+    count, tabs, think, headless = parse_args(sys.argv[1:])
+    server = ThreadingHTTPServer(("127.0.0.1", 0), fixture_handler(think))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/search"
+    print(f"Fixture server at {base_url}, answers after {think}s")
+
+    queries = [f"fixture query {i}" for i in range(count)]
+    report = []
+    try:
+        with GoogleAIScraper(headless=headless, base_url=base_url) as scraper:
+            scraper.scrape(queries[0])  # Warm-up (and consent cookie) outside the timings
+            for mode_tabs in (1, tabs):
+                elapsed, results = run(scraper, queries, mode_tabs)
+                rss = [r.browser["rss_mb"] for r in results if r.browser and r.browser["rss_mb"] is not None]
+                extracted = sum(1 for r in results if r.success and r.source_count >= 2)
+                report.append((mode_tabs, elapsed, max(rss) if rss else None, extracted))
+    finally:
+        server.shutdown()
+
+    print()
+    print(f"{'Tabs':>5} {'Seconds':>8} {'Queries/min':>12} {'Peak MB':>8} {'Extracted':>10}")
+    for mode_tabs, elapsed, peak, extracted in report:
+        print(f"{mode_tabs:>5} {elapsed:>8.1f} {len(queries) / elapsed * 60:>12.1f} "
+              f"{f'{peak:.0f}' if peak is not None else '-':>8} {f'{extracted}/{len(queries)}':>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Parse recorded AI Mode payloads, as a live scrape parses them.
+
+Payloads are recorded with scrape_google_ai.py --record-payloads (in
+data/payloads). Replaying them checks payload parsing without a browser,
+e.g. after a change to src/scrapers/payloads.py or to Google's markup.
+
+Usage:
+    python scripts/parse_payloads.py data/payloads/what_is_the_best_crm_20250101_120000.json
+    python scripts/parse_payloads.py FIXTURE ... --json
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from scrapers.payloads import load_payloads, parse_payloads
+
+
+def main():
+    paths = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    as_json = "--json" in sys.argv
+    if not paths:
+        print("Usage: python scripts/parse_payloads.py FIXTURE ... [--json]")
+        sys.exit(1)
+
+    for path in paths:
+        payloads = load_payloads(Path(path))
+        answer = parse_payloads(payloads)
+        if as_json:
+            print(json.dumps({"fixture": path, "response_text": answer.response_text, "sources": answer.sources},
+                             indent=2, ensure_ascii=False))
+            continue
+
+        print("=" * 60)
+        print(f"{path}: {len(payloads)} payload(s)")
+        print(f"Response: {len(answer.response_text)} chars, {len(answer.sources)} sources")
+        print("-" * 40)
+        print(answer.response_text[:500])
+        for i, source in enumerate(answer.sources[:5], 1):
+            print(f"{i}. {source['title'][:60]}")
+            print(f"   {source['url'][:70]}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Scrape a batch of queries into one NDJSON file, resumably.
+
+Queries come from a file (one per line; blank lines and # comments are
+skipped) or from stdin ("-"). One browser, or a pool of --browsers=N each
+with its own profile, scrapes them all, waiting the scraper's delay between
+queries (SCRAPER_MIN_DELAY_SECONDS / SCRAPER_MAX_DELAY_SECONDS), so the batch
+pays one browser launch per browser instead of one per query.
+
+Each result (a ScrapeResult) is appended to the output as one JSON line and
+fsync'd before the next query starts. On restart, queries with a successful
+result in the output are skipped and failed ones are tried again; a line cut
+short by a crash is dropped. A CAPTCHA stops the browser that hit it (its
+query is left for the next run); in a visible browser it can be solved by
+hand instead.
+
+With --tabs=N, each browser scrapes N queries at once in separate tabs
+(GoogleAIScraper.scrape_in_tabs), without delay between them: one Chrome
+process does the work of several. Browsers are recycled as in any long
+scrape (BROWSER_MAX_* settings); the summary says how often.
+
+Usage:
+    python scripts/scrape_batch.py queries.txt --output=data/results/batch.ndjson
+    cat queries.txt | python scripts/scrape_batch.py - --output=batch.ndjson --browsers=2 --headless
+    python scripts/scrape_batch.py queries.txt --tabs=4 --headless
+"""
+
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from config.settings import settings
+from scrapers.google_ai_scraper import GoogleAIScraper
+from utils.exceptions import CaptchaError
+
+DEFAULT_OUTPUT = Path(__file__).parent.parent / "data" / "results" / "google" / "batch.ndjson"
+
+
+def read_queries(source) -> list[str]:
+    """Queries of a file object, in order and without duplicates."""
+    queries = []
+    seen = set()
+    for line in source:
+        query = line.strip()
+        if query and not query.startswith("#") and query not in seen:
+            seen.add(query)
+            queries.append(query)
+    return queries
+
+
+def completed_queries(path: Path) -> set[str]:
+    """
+    Queries with a successful result in an NDJSON output. A trailing line
+    without newline (a write cut short) is truncated away.
+    """
+    if not path.exists():
+        return set()
+
+    completed = set()
+    valid_size = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            valid_size += len(line)
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            if result.get("success"):
+                completed.add(result["query"])
+
+    if valid_size < path.stat().st_size:
+        print(f"Dropping an incomplete last line of {path}")
+        with open(path, "r+b") as f:
+            f.truncate(valid_size)
+    return completed
+
+
+class NdjsonWriter:
+    """Appends results as JSON lines, each flushed and fsync'd (safe across threads)."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def queued_queries(pending: queue.Queue, delay: bool = True):
+    """Queries off the queue until it is empty, waiting the scraper's delay between them."""
+    first = True
+    while True:
+        try:
+            query = pending.get_nowait()
+        except queue.Empty:
+            return
+        if delay and not first:
+            time.sleep(random.uniform(settings.scraper.min_delay_seconds, settings.scraper.max_delay_seconds))
+        first = False
+        yield query
+
+
+def scrape_worker(index: int, pending: queue.Queue, writer: NdjsonWriter, headless: bool, profile: str | None,
+                  tabs: int, stats: dict, stats_lock: threading.Lock):
+    """Scrape queries off the queue in one browser until it is empty (or a CAPTCHA stops the browser)."""
+    name = f"{profile}-{index}" if profile else None
+    with GoogleAIScraper(headless=headless, solve_captcha=True, profile=name) as scraper:
+        if tabs > 1:
+            results = scraper.scrape_in_tabs(queued_queries(pending, delay=False), tabs=tabs)
+        else:
+            results = (scraper.scrape(query) for query in queued_queries(pending))
+
+        try:
+            for result in results:
+                writer.write(asdict(result))
+                with stats_lock:
+                    stats["done" if result.success else "failed"] += 1
+                    print(f"[browser {index}] {'OK' if result.success else 'FAILED'} "
+                          f"({stats['done'] + stats['failed']}/{stats['total']}): {result.query}")
+        except CaptchaError as e:
+            print(f"[browser {index}] CAPTCHA, stopping this browser: {e}")
+            with stats_lock:
+                stats["captcha"] += 1
+
+        with stats_lock:
+            stats["recycles"] += scraper.browser_metrics()["recycles"]
+
+
+def parse_args(argv: list[str]) -> tuple[str | None, Path, int, int, bool, str | None]:
+    """(queries file or "-", output path, browsers, tabs per browser, headless, profile)"""
+    source = None
+    output = DEFAULT_OUTPUT
+    browsers = 1
+    tabs = 1
+    headless = False
+    profile = "batch"
+    for arg in argv:
+        if arg.startswith("--output="):
+            output = Path(arg.split("=", 1)[1])
+        elif arg.startswith("--browsers="):
+            browsers = max(1, int(arg.split("=", 1)[1]))
+        elif arg.startswith("--tabs="):
+            tabs = max(1, int(arg.split("=", 1)[1]))
+        elif arg == "--headless":
+            headless = True
+        elif arg.startswith("--profile="):
+            profile = arg.split("=", 1)[1]
+        elif arg == "--no-profile":
+            profile = None
+        else:
+            source = arg
+    return source, output, browsers, tabs, headless, profile
+
+
+def main():
+    source, output, browsers, tabs, headless, profile = parse_args(sys.argv[1:])
+    if source is None:
+        print("Usage: python scripts/scrape_batch.py <queries file | -> [--output=FILE] [--browsers=N] [--tabs=N] "
+              "[--headless] [--profile=NAME | --no-profile]")
+        sys.exit(1)
+
+    if source == "-":
+        queries = read_queries(sys.stdin)
+    else:
+        with open(source, encoding="utf-8") as f:
+            queries = read_queries(f)
+
+    completed = completed_queries(output)
+    todo = [query for query in queries if query not in completed]
+    print(f"{len(queries)} queries, {len(queries) - len(todo)} already done in {output}, {len(todo)} to scrape")
+    if not todo:
+        return
+
+    pending = queue.Queue()
+    for query in todo:
+        pending.put(query)
+    stats = {"total": len(todo), "done": 0, "failed": 0, "captcha": 0, "recycles": 0}
+    stats_lock = threading.Lock()
+    writer = NdjsonWriter(output)
+    # Daemon threads: on Ctrl-C the batch stops with every finished result already on disk
+    threads = [
+        threading.Thread(
+            target=scrape_worker, args=(index, pending, writer, headless, profile, tabs, stats, stats_lock), daemon=True,
+        )
+        for index in range(min(browsers, len(todo)))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.close()
+
+    left = len(todo) - stats["done"]
+    print()
+    print(f"Scraped {stats['done']} queries, {stats['failed']} failed, {left} left for the next run")
+    print(f"Browsers recycled {stats['recycles']} time(s)")
+    if stats["captcha"]:
+        print(f"{stats['captcha']} browser(s) stopped at a CAPTCHA")
+    sys.exit(1 if left else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,12 @@ CLI script to scrape Google AI Mode.
 Usage:
     python scripts/scrape_google_ai.py "what is the best crm"
     python scripts/scrape_google_ai.py "best project management software" --headless
+    python scripts/scrape_google_ai.py "what is the best crm" --profile=research
+
+The browser profile (default "default", in data/profiles) is kept between
+runs, so cookie consent is only given once; --no-profile uses a throwaway one.
+--dom extracts the answer from the page instead of its network payloads;
+--record-payloads saves the payloads to data/payloads (see parse_payloads.py).
 """
 
 import sys
@@ -14,18 +20,28 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 from scrapers.google_ai_scraper import GoogleAIScraper
+from utils.exceptions import CaptchaError
 
 
 def main():
     # Parse arguments
     if len(sys.argv) < 2:
-        print("Usage: python scripts/scrape_google_ai.py <query> [--headless] [--screenshot]")
+        print("Usage: python scripts/scrape_google_ai.py <query> [--headless] [--screenshot] "
+              "[--profile=NAME | --no-profile] [--dom] [--record-payloads]")
         print('Example: python scripts/scrape_google_ai.py "what is the best crm"')
         sys.exit(1)
 
     query = sys.argv[1]
     headless = "--headless" in sys.argv
     screenshot = "--screenshot" in sys.argv
+    extraction = "dom" if "--dom" in sys.argv else None
+    record_payloads = "--record-payloads" in sys.argv
+    profile = "default"
+    for arg in sys.argv[2:]:
+        if arg.startswith("--profile="):
+            profile = arg.split("=", 1)[1]
+        elif arg == "--no-profile":
+            profile = None
 
     # Output directory
     output_dir = Path(__file__).parent.parent / "data" / "results" / "google"
@@ -36,11 +52,19 @@ def main():
     print(f"Query: {query}")
     print(f"Headless: {headless}")
     print(f"Screenshot: {screenshot}")
+    print(f"Profile: {profile or '(temporary)'}")
     print()
 
-    # Run scraper
-    with GoogleAIScraper(headless=headless) as scraper:
-        result = scraper.scrape(query, take_screenshot=screenshot)
+    # Run scraper (in a visible browser, a CAPTCHA can be solved by hand)
+    with GoogleAIScraper(
+        headless=headless, solve_captcha=True, profile=profile, extraction=extraction, record_payloads=record_payloads,
+    ) as scraper:
+        try:
+            result = scraper.scrape(query, take_screenshot=screenshot)
+        except CaptchaError as e:
+            print()
+            print(f"CAPTCHA: {e}")
+            sys.exit(1)
 
         if result.success:
             # Save result
@@ -52,6 +76,15 @@ def main():
             print("=" * 60)
             print(f"Query: {result.query}")
             print(f"Sources found: {result.source_count}")
+            print(f"Extracted from: {result.extraction}")
+            if result.network:
+                print(f"Requests blocked: {result.network['blocked_requests']} "
+                      f"(~{result.network['bytes_saved'] / 1024:.0f} KB saved, "
+                      f"{result.network['bytes_loaded'] / 1024:.0f} KB loaded)")
+            if result.timings:
+                print("Timings: " + ", ".join(f"{phase} {seconds:.1f}s" for phase, seconds in result.timings.items()))
+            if result.timeout_phase:
+                print(f"Timed out in: {result.timeout_phase}")
             print()
 
             # Show first 500 chars of response
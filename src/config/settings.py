@@ -1,14 +1,51 @@
 """Configuration management using Pydantic Settings."""
 
 from pathlib import Path
+from typing import Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
-
 # Base directory of the project
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
+# Requests blocked during scrapes (see scrapers/network.py): resources extraction
+# does not need, i.e. images, fonts, media, ads and tracking
+DEFAULT_BLOCKED_URLS = [
+    "*://*/*.png*",
+    "*://*/*.jpg*",
+    "*://*/*.jpeg*",
+    "*://*/*.gif*",
+    "*://*/*.webp*",
+    "*://*/*.avif*",
+    "*://*/*.ico*",
+    "*://*/*.woff*",
+    "*://*/*.ttf*",
+    "*://*/*.otf*",
+    "*://*/*.mp4*",
+    "*://*/*.webm*",
+    "*://encrypted-tbn*.gstatic.com/*",  # Result thumbnails
+    "*://*.ytimg.com/*",  # Video thumbnails
+    "*://*.googleusercontent.com/*",
+    "*://fonts.gstatic.com/*",
+    "*://*.doubleclick.net/*",
+    "*://*.googlesyndication.com/*",
+    "*://*.googleadservices.com/*",
+    "*://*.google-analytics.com/*",
+    "*://www.googletagmanager.com/*",
+    "*://*/gen_204*",  # Logging pings
+    "*://*/client_204*",
+]
+
+# Never blocked: the search page itself, its scripts and styles, and the consent flow
+DEFAULT_ALLOWED_URLS = [
+    "*://www.google.com/search*",
+    "*://www.google.com/xjs/*",
+    "*://www.google.com/async/*",
+    "*://www.gstatic.com/_/*",
+    "*://consent.google.com/*",
+]
+
 
 class BrowserSettings(BaseSettings):
     """Browser automation settings."""
@@ -16,7 +53,12 @@ class BrowserSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="BROWSER_")
 
     headless: bool = False
+    # Time budget of one query, shared out between its phases (see scrapers/budget.py)
     timeout_seconds: int = 60
+    # Restart the browser (same profile) between queries after this many queries,
+    # or once its process tree uses more than this much memory (needs psutil); 0 disables
+    max_queries_per_browser: int = 100
+    max_memory_mb: int = 1500
 
 
 class ScraperSettings(BaseSettings):
@@ -27,6 +69,12 @@ class ScraperSettings(BaseSettings):
     min_delay_seconds: int = 30
     max_delay_seconds: int = 60
     take_screenshots: bool = False
+    # Requests blocked during scrapes (CDP Network.setBlockedURLs); lists are JSON in env vars
+    block_requests: bool = True
+    blocked_urls: list[str] = Field(default_factory=lambda: list(DEFAULT_BLOCKED_URLS))
+    allowed_urls: list[str] = Field(default_factory=lambda: list(DEFAULT_ALLOWED_URLS))
+    # "network": parse the answer from captured response payloads (DOM as fallback); "dom": query the page
+    extraction: Literal["network", "dom"] = "network"
 
 
 class Settings(BaseSettings):
@@ -51,12 +99,17 @@ class Settings(BaseSettings):
     data_dir: Path = BASE_DIR / "data"
     results_dir: Path = BASE_DIR / "data" / "results"
     screenshots_dir: Path = BASE_DIR / "data" / "screenshots"
+    # Persistent Chrome profiles (cookies, cache), one directory per profile name
+    profiles_dir: Path = BASE_DIR / "data" / "profiles"
+    # Recorded network payloads (fixtures for scripts/parse_payloads.py)
+    payloads_dir: Path = BASE_DIR / "data" / "payloads"
 
     def ensure_directories(self) -> None:
         """Create required directories if they don't exist."""
         self.data_dir.mkdir(parents=True, exist_ok=True)
         self.results_dir.mkdir(parents=True, exist_ok=True)
         self.screenshots_dir.mkdir(parents=True, exist_ok=True)
+        self.profiles_dir.mkdir(parents=True, exist_ok=True)
 
 
 # Global settings instance
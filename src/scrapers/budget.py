@@ -0,0 +1,94 @@
+"""
+Time budget of a scrape.
+
+A scrape gets a total budget (BrowserSettings.timeout_seconds) and moves
+through phases: navigation, consent, response, extraction and expansion.
+Each phase may use at most its share of the total (PHASE_SHARES), and never
+more than what is left before the scrape's deadline, so a bad page can hold
+a session for no longer than the total. Time a phase leaves unused goes to
+the later ones. A phase entered again (extraction, around the sources'
+expansion) continues with what is left of its share.
+
+Waits inside a phase are bounded by remaining(); check() raises
+ScrapeTimeoutError once the phase is out of time. timings() gives the
+seconds each phase took, for the result.
+"""
+
+import time
+
+from utils.exceptions import ScrapeTimeoutError
+
+# Most of a phase's share of the total budget; shares add up to more than 1
+# because a phase finishing early leaves its time to the others
+PHASE_SHARES = {
+    "navigation": 0.3,
+    "consent": 0.15,
+    "response": 0.75,
+    "extraction": 0.3,
+    "expansion": 0.25,
+}
+
+
+class ScrapeBudget:
+    """Deadline of one scrape and the budget of its current phase."""
+
+    def __init__(self, total_seconds: float, shares: dict[str, float] | None = None):
+        self.total_seconds = total_seconds
+        self.shares = shares or PHASE_SHARES
+        self.started = time.monotonic()
+        self.deadline = self.started + total_seconds
+        self.phase: str | None = None
+        self._phase_started = self.started
+        self._phase_end = self.deadline
+        self._timings: dict[str, float] = {}
+
+    def start(self, phase: str) -> "ScrapeBudget":
+        """End the current phase and start another."""
+        self._end_phase()
+        now = time.monotonic()
+        share = self.shares.get(phase, 1.0) * self.total_seconds - self._timings.get(phase, 0.0)
+        self.phase = phase
+        self._phase_started = now
+        self._phase_end = min(now + max(share, 0.0), self.deadline)
+        return self
+
+    def _end_phase(self):
+        if self.phase is not None:
+            elapsed = time.monotonic() - self._phase_started
+            self._timings[self.phase] = self._timings.get(self.phase, 0.0) + elapsed
+            self.phase = None
+
+    def remaining(self, at_most: float | None = None) -> float:
+        """Seconds left in the current phase (capped at at_most)."""
+        left = max(self._phase_end - time.monotonic(), 0.0)
+        return min(left, at_most) if at_most is not None else left
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self._phase_end
+
+    def timeout_error(self) -> ScrapeTimeoutError:
+        """The error for the current phase running out of time."""
+        return ScrapeTimeoutError(self.phase or "scrape", self._phase_end - self._phase_started)
+
+    def check(self):
+        """Raise ScrapeTimeoutError if the current phase is out of time."""
+        if self.expired():
+            raise self.timeout_error()
+
+    def extend(self, seconds: float):
+        """Move the deadline (and the phase's end) back, e.g. for time spent waiting on a person."""
+        self.deadline += seconds
+        self._phase_end += seconds
+
+    def sleep(self, seconds: float):
+        """Sleep, but not past the end of the phase."""
+        time.sleep(self.remaining(seconds))
+
+    def timings(self) -> dict[str, float]:
+        """Seconds spent in each phase so far, and in total."""
+        timings = dict(self._timings)
+        if self.phase is not None:
+            timings[self.phase] = timings.get(self.phase, 0.0) + time.monotonic() - self._phase_started
+        timings = {phase: round(seconds, 2) for phase, seconds in timings.items()}
+        timings["total"] = round(time.monotonic() - self.started, 2)
+        return timings
@@ -3,21 +3,68 @@ Google AI Mode Scraper
 
 Extracts AI-generated responses and source citations from Google AI Mode (udm=50).
 Uses undetected-chromedriver to avoid bot detection.
+
+With a profile, Chrome keeps its user data (cookies, cache) in
+data/profiles/<name> across runs: consent given once is remembered, so later
+scrapes skip the consent dialog, and a profile that was used before starts
+without the settling pause of a fresh one. A profile can only be used by one
+browser at a time.
+
+Requests for images, fonts, media and trackers are blocked (ScraperSettings
+block_requests, blocked_urls, allowed_urls; see network.py), and each result
+reports the page's requests, bytes loaded and what blocking saved.
+
+By default the answer is parsed from the network responses that carry it
+(captured through the DevTools Protocol, see payloads.py) in one pass; the
+slower DOM extraction, an element query at a time, fills in whatever the
+payloads lack (ScraperSettings.extraction = "dom" always uses it).
+
+Long-lived browsers gain memory, so the browser is restarted with the same
+profile between queries once it has served BrowserSettings
+max_queries_per_browser queries or its process tree (Chrome and its
+driver) exceeds max_memory_mb (measured with psutil, when installed).
+browser_metrics() reports the starts and recycles, also in each result.
+
+scrape_in_tabs() scrapes several queries at once in tabs of one browser:
+their page loads and answer generation overlap, at the memory cost of tabs
+rather than of more Chrome processes (see scripts/benchmark_tabs.py).
+
+Every scrape runs against a ScrapeBudget of BrowserSettings.timeout_seconds
+split across its phases (navigation, consent, response, expansion,
+extraction; see budget.py). Waits never outlast their phase; a page that
+does not load, an answer that never finishes or an extraction that runs
+long fails the query with ScrapeTimeoutError (timeout_phase in the result),
+and each result reports the seconds each phase took.
 """
 
+import base64
 import json
 import re
 import time
-from datetime import datetime, timezone
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
 from pathlib import Path
 from urllib.parse import quote_plus
-from dataclasses import dataclass, asdict
-from typing import Optional
 
 import undetected_chromedriver as uc
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from config.settings import settings
+from scrapers.budget import ScrapeBudget
+from scrapers.network import (
+    LOGGING_PREFS,
+    block_requests,
+    network_events,
+    network_events_by_target,
+    network_stats,
+)
+from scrapers.payloads import Payload, is_answer_payload, parse_payloads, save_payloads
+from utils.exceptions import CaptchaError, ScrapeTimeoutError
+from utils.memory import process_tree_rss
 
 
 @dataclass
@@ -25,9 +72,9 @@ class Source:
     """A source citation from Google AI Mode."""
     title: str
     url: str
-    date: Optional[str] = None
-    description: Optional[str] = None
-    publisher: Optional[str] = None
+    date: str | None = None
+    description: str | None = None
+    publisher: str | None = None
 
 
 @dataclass
@@ -39,7 +86,23 @@ class ScrapeResult:
     sources: list[dict]
     source_count: int
     success: bool
-    error: Optional[str] = None
+    error: str | None = None
+    network: dict | None = None  # NetworkStats of the page (with request blocking)
+    extraction: str | None = None  # Where text and sources came from: "network", "dom" or "mixed"
+    browser: dict | None = None  # Browser lifecycle metrics (GoogleAIScraper.browser_metrics)
+    timings: dict | None = None  # Seconds spent in each phase and in total (ScrapeBudget.timings)
+    timeout_phase: str | None = None  # Phase that ran out of time (the error is a ScrapeTimeoutError)
+
+
+@dataclass
+class _TabQuery:
+    """A query loading in a tab (see GoogleAIScraper.scrape_in_tabs)."""
+    query: str
+    timestamp: str
+    started: float
+    budget: ScrapeBudget
+    events: list[dict] = field(default_factory=list)  # The tab's Network events so far
+    settled_at: float | None = None  # When "Thinking" was gone
 
 
 class GoogleAIScraper:
@@ -47,9 +110,46 @@ class GoogleAIScraper:
 
     BASE_URL = "https://www.google.com/search"
 
-    def __init__(self, headless: bool = False):
+    # Waits (each bounded by the phase's budget), and the poll interval of scrape_in_tabs
+    LOAD_SECONDS = 2  # Before checking a page for CAPTCHA and answer
+    RENDER_SECONDS = 3  # After "Thinking" is gone, for the answer to render
+    CONSENT_WAIT_SECONDS = 3  # For each consent button selector
+    TAB_POLL_SECONDS = 0.5
+
+    # Cookies Google sets once consent is given (CONSENT only counts with a "YES+" value)
+    CONSENT_COOKIES = ("SOCS", "CONSENT")
+
+    def __init__(self, headless: bool = False, solve_captcha: bool = False, profile: str | None = None,
+                 extraction: str | None = None, record_payloads: bool = False, base_url: str | None = None):
+        """
+        solve_captcha: on a CAPTCHA, wait for it to be solved by hand in the
+        browser window instead of raising CaptchaError (interactive use only)
+        profile: name of a persistent Chrome profile in settings.profiles_dir
+        (None for a temporary one)
+        extraction: "network" or "dom" (default: ScraperSettings.extraction)
+        record_payloads: save each page's captured payloads to settings.payloads_dir
+        base_url: search URL to scrape instead of Google's (e.g. a local fixture server)
+        """
         self.headless = headless
+        self.base_url = base_url or self.BASE_URL
+        self.solve_captcha = solve_captcha and not headless
+        self.profile_dir = settings.profiles_dir / profile if profile else None
+        self.block_requests = settings.scraper.block_requests
+        self.extraction = extraction or settings.scraper.extraction
+        self.record_payloads = record_payloads and self.extraction == "network"
+        # Both read DevTools events from Chrome's performance log
+        self._network_log = self.block_requests or self.extraction == "network"
         self._driver = None
+        self._consent_given = False
+        self.timeout_seconds = settings.browser.timeout_seconds
+        self._budget = ScrapeBudget(self.timeout_seconds)  # Of the scrape (or tab) in progress
+
+        self.max_queries_per_browser = settings.browser.max_queries_per_browser
+        self.max_memory_mb = settings.browser.max_memory_mb
+        self.browser_starts = 0
+        self.browser_queries = 0  # Queries since the browser (re)started
+        self.browser_rss_mb: float | None = None  # After the last query (None without psutil)
+        self.recycles = {"queries": 0, "memory": 0}
 
     def __enter__(self):
         self._start_browser()
@@ -68,19 +168,97 @@ class GoogleAIScraper:
 
         if self.headless:
             options.add_argument("--headless=new")
-
-        # Use version_main to avoid version mismatch
-        self._driver = uc.Chrome(options=options, use_subprocess=True)
-        print("Browser started!")
-        time.sleep(2)  # Give browser time to stabilize
+        if self._network_log:
+            options.set_capability("goog:loggingPrefs", LOGGING_PREFS)
+
+        warm = self.profile_dir is not None and self.profile_dir.exists()
+        if self.profile_dir is not None:
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            # Kept by undetected-chromedriver when given explicitly
+            self._driver = uc.Chrome(options=options, use_subprocess=True, user_data_dir=str(self.profile_dir))
+        else:
+            self._driver = uc.Chrome(options=options, use_subprocess=True)
+        self.browser_starts += 1
+        self.browser_queries = 0
+        self.browser_rss_mb = None
+        print(f"Browser started ({'profile ' + self.profile_dir.name if self.profile_dir else 'temporary profile'})!")
+        if not warm:
+            time.sleep(2)  # Give a new profile time to stabilize
+
+        self._prepare_tab()
+
+    def _prepare_tab(self):
+        """Enable network capture and request blocking in the current tab (DevTools settings are per tab)."""
+        if self._network_log:
+            self._driver.execute_cdp_cmd("Network.enable", {})
+        if self.block_requests:
+            if not block_requests(self._driver, settings.scraper.blocked_urls, settings.scraper.allowed_urls):
+                print("This Chrome ignores the allow-list: only block patterns apply")
 
     def _close_browser(self):
         """Close the browser."""
         if self._driver:
             self._driver.quit()
+            self._driver = None
+
+    def _measure_memory(self):
+        """Resident memory of Chrome and its driver, with all their child processes."""
+        pids = [getattr(self._driver, "browser_pid", None)]
+        process = getattr(getattr(self._driver, "service", None), "process", None)
+        pids.append(process.pid if process else None)
+        rss = process_tree_rss([pid for pid in pids if pid])
+        self.browser_rss_mb = rss / 2**20 if rss is not None else None
+
+    def _recycle_reason(self) -> str | None:
+        if self.max_queries_per_browser and self.browser_queries >= self.max_queries_per_browser:
+            return "queries"
+        if self.max_memory_mb and self.browser_rss_mb is not None and self.browser_rss_mb > self.max_memory_mb:
+            return "memory"
+        return None
+
+    def recycle_if_needed(self) -> bool:
+        """Restart the browser (same profile) if it served too many queries or uses too much memory."""
+        reason = self._recycle_reason()
+        if reason is None:
+            return False
+        print(f"Recycling browser after {self.browser_queries} queries"
+              + (f", {self.browser_rss_mb:.0f} MB" if self.browser_rss_mb is not None else "") + f" ({reason})")
+        self._close_browser()
+        if self.profile_dir is None:
+            self._consent_given = False  # A new temporary profile has no cookies
+        self._start_browser()
+        self.recycles[reason] += 1
+        return True
+
+    def browser_metrics(self) -> dict:
+        """How often the browser was started and recycled, and its current load."""
+        return {
+            "starts": self.browser_starts,
+            "recycles": sum(self.recycles.values()),
+            "recycles_for_queries": self.recycles["queries"],
+            "recycles_for_memory": self.recycles["memory"],
+            "queries_in_browser": self.browser_queries,
+            "rss_mb": round(self.browser_rss_mb, 1) if self.browser_rss_mb is not None else None,
+        }
+
+    def _has_consent_cookie(self) -> bool:
+        """Whether the browser already carries Google's consent cookie."""
+        try:
+            for name in self.CONSENT_COOKIES:
+                cookie = self._driver.get_cookie(name)
+                if cookie and (name != "CONSENT" or cookie.get("value", "").startswith("YES")):
+                    return True
+        except Exception:
+            pass
+        return False
 
     def _handle_cookie_consent(self):
-        """Accept cookie consent if shown."""
+        """Accept cookie consent if shown (skipped once the consent cookie is set)."""
+        if self._consent_given or self._has_consent_cookie():
+            self._consent_given = True
+            print("Cookie consent already given")
+            return
+
         try:
             # Try multiple selectors for the Accept button
             selectors = [
@@ -91,13 +269,17 @@ class GoogleAIScraper:
             ]
 
             for selector in selectors:
+                if self._budget.expired():
+                    print("Cookie consent: out of time")
+                    return
                 try:
-                    accept_btn = WebDriverWait(self._driver, 3).until(
+                    accept_btn = WebDriverWait(self._driver, self._budget.remaining(self.CONSENT_WAIT_SECONDS)).until(
                         EC.element_to_be_clickable((By.XPATH, selector))
                     )
                     accept_btn.click()
                     print("Cookie consent accepted!")
-                    time.sleep(2)
+                    self._consent_given = True
+                    self._budget.sleep(2)
                     return
                 except Exception:
                     continue
@@ -106,10 +288,13 @@ class GoogleAIScraper:
             try:
                 buttons = self._driver.find_elements(By.TAG_NAME, "button")
                 for btn in buttons:
+                    if self._budget.expired():
+                        return
                     if "Accept" in btn.text or "accept" in btn.text.lower():
                         btn.click()
                         print("Cookie consent accepted (fallback)!")
-                        time.sleep(2)
+                        self._consent_given = True
+                        self._budget.sleep(2)
                         return
             except Exception:
                 pass
@@ -117,35 +302,56 @@ class GoogleAIScraper:
         except Exception as e:
             print(f"Cookie consent handling: {e}")
 
-    def _wait_for_response(self, timeout: int = 60):
-        """Wait for AI response to be ready."""
+    def _captcha_shown(self, page_text: str) -> bool:
+        """Whether Google shows its bot check (the /sorry/ page or an inline reCAPTCHA)."""
+        return (
+            "/sorry/" in self._driver.current_url
+            or "I'm not a robot" in page_text
+            or "unusual traffic" in page_text.lower()
+        )
+
+    def _check_captcha(self, page_text: str, timeout: int = 60):
+        """Raise CaptchaError if a CAPTCHA is shown (or, with solve_captcha, wait for it to be solved)."""
+        if not self._captcha_shown(page_text):
+            return
+        if not self.solve_captcha:
+            raise CaptchaError(f"CAPTCHA shown at {self._driver.current_url}")
+
+        print("\n*** CAPTCHA DETECTED - Please solve it manually ***")
+        start_time = time.time()
+        while self._captcha_shown(self._driver.page_source):
+            if time.time() - start_time > timeout:
+                raise CaptchaError(f"CAPTCHA not solved within {timeout}s")
+            time.sleep(1)
+        print("CAPTCHA solved! Continuing...")
+        time.sleep(2)
+        # Solving by hand does not count against the scrape's budget
+        self._budget.extend(time.time() - start_time)
+
+    def _wait_for_response(self):
+        """Wait for AI response to be ready (ScrapeTimeoutError when the response phase runs out)."""
         print("Waiting for AI response to generate...")
 
         # Wait for "Thinking" to appear and then disappear
-        start_time = time.time()
-        while time.time() - start_time < timeout:
+        while True:
             try:
                 page_text = self._driver.page_source
 
-                # Check for CAPTCHA
-                if "I'm not a robot" in page_text or "unusual traffic" in page_text.lower():
-                    print("\n*** CAPTCHA DETECTED - Please solve it manually ***")
-                    # Wait for user to solve
-                    while "I'm not a robot" in self._driver.page_source:
-                        time.sleep(1)
-                    print("CAPTCHA solved! Continuing...")
-                    time.sleep(2)
+                self._check_captcha(page_text)
 
                 # Check if response is ready (no more "Thinking")
                 if "Thinking" not in page_text:
                     # Give extra time for content to render
-                    time.sleep(3)
+                    self._budget.sleep(self.RENDER_SECONDS)
                     return
 
+            except CaptchaError:
+                raise
             except Exception:
                 pass
 
-            time.sleep(1)
+            self._budget.check()
+            self._budget.sleep(1)
 
     def _extract_response_text(self) -> str:
         """Extract the main AI response text."""
@@ -155,6 +361,7 @@ class GoogleAIScraper:
 
             # Get headings
             for h in self._driver.find_elements(By.CSS_SELECTOR, "h2, h3"):
+                self._budget.check()
                 text = h.text.strip()
                 if text and len(text) > 3 and len(text) < 200:
                     if not any(skip in text.lower() for skip in ['sign in', 'accessibility', 'filters']):
@@ -162,6 +369,7 @@ class GoogleAIScraper:
 
             # Get list items (recommendations)
             for li in self._driver.find_elements(By.TAG_NAME, "li"):
+                self._budget.check()
                 text = li.text.strip()
                 if text and len(text) > 30:
                     if not any(skip in text.lower() for skip in ['sign in', 'accessibility']):
@@ -169,6 +377,7 @@ class GoogleAIScraper:
 
             # Get table content
             for table in self._driver.find_elements(By.TAG_NAME, "table"):
+                self._budget.check()
                 rows = []
                 for tr in table.find_elements(By.TAG_NAME, "tr"):
                     cells = [td.text.strip() for td in tr.find_elements(By.CSS_SELECTOR, "th, td")]
@@ -178,17 +387,22 @@ class GoogleAIScraper:
                     response_parts.append("\n".join(rows))
 
             return "\n\n".join(response_parts)
+        except ScrapeTimeoutError:
+            raise
         except Exception as e:
             print(f"Error extracting response: {e}")
             return ""
 
     def _expand_sources(self):
-        """Click button to expand all sources."""
+        """Click button to expand all sources (gives up when the expansion phase runs out)."""
         try:
             # Look for the sources count button (e.g., "22 sites" or "16 sites")
             # This is typically a button with number + "sites" text
             buttons = self._driver.find_elements(By.TAG_NAME, "button")
             for btn in buttons:
+                if self._budget.expired():
+                    print("Sources expansion: out of time")
+                    return False
                 try:
                     text = btn.text.strip()
                     # Match patterns like "22 sites", "16 sites", etc.
@@ -196,7 +410,7 @@ class GoogleAIScraper:
                         if btn.is_displayed():
                             btn.click()
                             print(f"Clicked sources button: '{text}'")
-                            time.sleep(3)
+                            self._budget.sleep(3)
                             return True
                 except:
                     continue
@@ -204,11 +418,14 @@ class GoogleAIScraper:
             # Try clicking elements that contain "sites" text
             sites_elements = self._driver.find_elements(By.XPATH, "//*[contains(text(), 'sites')]")
             for elem in sites_elements:
+                if self._budget.expired():
+                    print("Sources expansion: out of time")
+                    return False
                 try:
                     if elem.is_displayed() and elem.is_enabled():
                         elem.click()
                         print(f"Clicked sites element: '{elem.text[:30]}'")
-                        time.sleep(3)
+                        self._budget.sleep(3)
                         return True
                 except:
                     continue
@@ -218,12 +435,15 @@ class GoogleAIScraper:
                 "//button[contains(text(), 'Show all')]",
                 "//*[contains(text(), 'Show all')]",
             ]:
+                if self._budget.expired():
+                    print("Sources expansion: out of time")
+                    return False
                 try:
                     show_all = self._driver.find_element(By.XPATH, selector)
                     if show_all.is_displayed():
                         show_all.click()
                         print("Clicked 'Show all' button")
-                        time.sleep(3)
+                        self._budget.sleep(3)
                         return True
                 except:
                     continue
@@ -241,8 +461,9 @@ class GoogleAIScraper:
 
         try:
             # First try to expand sources panel
-            expanded = self._expand_sources()
-            time.sleep(1)
+            self._budget.start("expansion")
+            self._expand_sources()
+            self._budget.sleep(1)
 
             # If a dialog/panel opened, look for links inside it
             dialog_links = []
@@ -253,9 +474,11 @@ class GoogleAIScraper:
                     if dialog.is_displayed():
                         # Scroll within the dialog to load all sources
                         for _ in range(5):
+                            if self._budget.expired():
+                                break
                             try:
                                 self._driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", dialog)
-                                time.sleep(0.5)
+                                self._budget.sleep(0.5)
                             except:
                                 break
 
@@ -265,6 +488,8 @@ class GoogleAIScraper:
             except:
                 pass
 
+            self._budget.start("extraction")
+
             # If no dialog, look for the sources panel/list
             if not dialog_links:
                 try:
@@ -281,6 +506,7 @@ class GoogleAIScraper:
                 # Combine dialog links with page links (dialog first as they're more relevant)
                 existing_hrefs = {l.get_attribute("href") for l in dialog_links}
                 for link in all_links:
+                    self._budget.check()
                     href = link.get_attribute("href")
                     if href and href not in existing_hrefs:
                         dialog_links.append(link)
@@ -288,6 +514,7 @@ class GoogleAIScraper:
                 print(f"Total links after combining: {len(dialog_links)}")
 
             for link in dialog_links:
+                self._budget.check()
                 try:
                     url = link.get_attribute("href")
 
@@ -381,11 +608,88 @@ class GoogleAIScraper:
 
             print(f"Extracted {len(sources)} sources")
 
+        except ScrapeTimeoutError:
+            raise
         except Exception as e:
             print(f"Error extracting sources: {e}")
 
         return sources
 
+    def _network_events(self) -> list[dict]:
+        """DevTools Network events since the last call (none without a network log)."""
+        if not self._network_log:
+            return []
+        try:
+            return network_events(self._driver)
+        except Exception as e:
+            print(f"Error reading network log: {e}")
+            return []
+
+    def _network_stats(self, events: list[dict]) -> dict | None:
+        """Network use of the page (None without request blocking)."""
+        if not self.block_requests:
+            return None
+        stats = network_stats(events)
+        print(f"Network: {stats.requests} requests, {stats.bytes_loaded / 1024:.0f} KB loaded; "
+              f"blocked {stats.blocked_requests} requests, ~{stats.bytes_saved / 1024:.0f} KB saved")
+        return asdict(stats)
+
+    def _capture_payloads(self, events: list[dict]) -> tuple[list[Payload], int]:
+        """
+        Bodies of the page's finished responses that may carry the answer, and
+        how many such responses could not be read (unfinished or evicted).
+        """
+        candidates = {}
+        finished = set()
+        for event in events:
+            params = event.get("params", {})
+            if event.get("method") == "Network.responseReceived":
+                response = params.get("response", {})
+                if is_answer_payload(response.get("url", ""), response.get("mimeType", "")):
+                    candidates[params.get("requestId")] = response
+            elif event.get("method") == "Network.loadingFinished":
+                finished.add(params.get("requestId"))
+
+        payloads = []
+        unread = 0
+        for request_id, response in candidates.items():
+            if request_id not in finished:
+                unread += 1
+                continue
+            try:
+                body = self._driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            except Exception:
+                unread += 1  # Evicted from Chrome's buffer or not kept (redirects)
+                continue
+            text = body.get("body", "")
+            if body.get("base64Encoded"):
+                text = base64.b64decode(text).decode("utf-8", errors="replace")
+            payloads.append(Payload(url=response["url"], mime_type=response["mimeType"], body=text))
+        return payloads, unread
+
+    def _extract_from_payloads(self, query: str, events: list[dict]):
+        """Parse the answer from the page's captured payloads (None when extracting from the DOM)."""
+        if self.extraction != "network":
+            return None
+        try:
+            payloads, unread = self._capture_payloads(events)
+            if self.record_payloads and payloads:
+                name = re.sub(r'[-\s]+', '_', re.sub(r'[^\w\s-]', '', query.lower()))[:50]
+                path = save_payloads(
+                    payloads, settings.payloads_dir / f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+                )
+                print(f"Payloads recorded: {path}")
+            answer = parse_payloads(payloads)
+        except Exception as e:
+            print(f"Error parsing payloads: {e}")
+            return None
+        print(f"Parsed {len(payloads)} payload(s): {len(answer.response_text)} chars, {len(answer.sources)} sources")
+        if unread and answer.response_text:
+            # Part of the answer may be in a response that was not captured: take the text from the page
+            print(f"{unread} answer payload(s) not captured, response text taken from the page")
+            answer.response_text = ""
+        return answer
+
     def _take_screenshot(self, name: str = "debug"):
         """Take a screenshot for debugging."""
         try:
@@ -400,60 +704,230 @@ class GoogleAIScraper:
             return None
 
     def scrape(self, query: str, take_screenshot: bool = False) -> ScrapeResult:
-        """Scrape Google AI Mode for a query."""
-        timestamp = datetime.now(timezone.utc).isoformat()
+        """Scrape Google AI Mode for a query. Raises CaptchaError when Google shows a CAPTCHA."""
+        timestamp = datetime.now(UTC).isoformat()
 
         try:
+            self._budget = ScrapeBudget(self.timeout_seconds)  # Replaced once the browser is ready
+            # Between queries, so a restart never interrupts a page (a failed restart is retried next query)
+            self.recycle_if_needed()
+            self.browser_queries += 1
+
             # Build URL with AI Mode parameter
-            encoded_query = quote_plus(query)
-            url = f"{self.BASE_URL}?udm=50&q={encoded_query}"
+            url = self._search_url(query)
+
+            self._network_events()  # Drop the previous page's events
 
             print(f"Navigating to: {url}")
-            self._driver.get(url)
-            time.sleep(2)
+            self._budget = ScrapeBudget(self.timeout_seconds).start("navigation")
+            self._driver.set_page_load_timeout(self._budget.remaining())
+            try:
+                self._driver.get(url)
+            except TimeoutException:
+                raise self._budget.timeout_error()
+            self._budget.sleep(self.LOAD_SECONDS)
+
+            # A blocked session is redirected to the CAPTCHA page before any consent dialog
+            self._check_captcha(self._driver.page_source)
 
             # Handle cookie consent
             print("Handling cookie consent...")
+            self._budget.start("consent")
             self._handle_cookie_consent()
 
             # Wait for AI response
+            self._budget.start("response")
             self._wait_for_response()
 
-            if take_screenshot:
-                self._take_screenshot(f"google_ai_{query[:20]}")
-
-            # Extract response text
-            print("Extracting response text...")
-            response_text = self._extract_response_text()
-
-            # Extract sources
-            print("Extracting sources...")
-            sources = self._extract_sources()
+            return self._extract_result(query, timestamp, self._network_events(), take_screenshot)
 
+        except CaptchaError:
+            # Not a failure of this query: the caller retries it in another session
             if take_screenshot:
-                self._take_screenshot(f"google_ai_final_{query[:20]}")
+                self._take_screenshot("google_ai_captcha")
+            raise
 
-            return ScrapeResult(
-                query=query,
-                timestamp=timestamp,
-                response_text=response_text,
-                sources=[asdict(s) for s in sources],
-                source_count=len(sources),
-                success=True,
-            )
+        except Exception as e:
+            return self._failed_result(query, timestamp, e, take_screenshot)
+
+    def scrape_in_tabs(self, queries: Iterable[str], tabs: int = 3,
+                       take_screenshot: bool = False) -> Iterator[ScrapeResult]:
+        """
+        Scrape queries concurrently in up to `tabs` tabs of this browser,
+        yielding each result as its tab finishes (not in query order).
+
+        Page loads and answer generation overlap across tabs; checks and
+        extraction run for one tab at a time, as WebDriver drives one tab at
+        a time. Each query gets a new tab, closed once extracted. Raises
+        CaptchaError when a tab shows a CAPTCHA: results already yielded
+        stand, queries still loading are dropped.
+        """
+        queries = iter(queries)
+        # Consent is given once, in a single tab; the tabs then share its cookie
+        if not (self._consent_given or self._has_consent_cookie()):
+            query = next(queries, None)
+            if query is None:
+                return
+            yield self.scrape(query, take_screenshot)
+
+        self._network_events()  # Drop earlier pages' events
+        anchor = self._driver.current_window_handle  # Keeps the browser open between tabs
+        active: dict[str, _TabQuery] = {}
+        try:
+            while True:
+                # A browser due for recycling takes no new tabs; it restarts once its tabs are done
+                if not active and self.recycle_if_needed():
+                    anchor = self._driver.current_window_handle
+                while len(active) < tabs and self._recycle_reason() is None:
+                    query = next(queries, None)
+                    if query is None:
+                        break
+                    self.browser_queries += 1
+                    budget = ScrapeBudget(self.timeout_seconds).start("navigation")
+                    active[self._open_tab(query)] = _TabQuery(
+                        query, datetime.now(UTC).isoformat(), time.time(), budget,
+                    )
+                if not active:
+                    if self._recycle_reason() is None:
+                        return
+                    continue
 
+                if self._network_log:
+                    for target, events in network_events_by_target(self._driver).items():
+                        if target in active:
+                            active[target].events.extend(events)
+
+                for handle, tab in list(active.items()):
+                    result = self._poll_tab(handle, tab, take_screenshot)
+                    if result is not None:
+                        del active[handle]
+                        self._close_tab(handle, anchor)
+                        yield result
+                time.sleep(self.TAB_POLL_SECONDS)
+        finally:
+            for handle in active:
+                self._close_tab(handle, anchor)
+
+    def _open_tab(self, query: str) -> str:
+        """Open a tab and start loading a query's page in it, without waiting; returns its handle."""
+        self._driver.switch_to.new_window("tab")
+        self._prepare_tab()
+        print(f"Opening tab for: {query}")
+        self._driver.execute_script("window.location.href = arguments[0]", self._search_url(query))
+        return self._driver.current_window_handle
+
+    def _close_tab(self, handle: str, anchor: str):
+        try:
+            self._driver.switch_to.window(handle)
+            self._driver.close()
+            self._driver.switch_to.window(anchor)
         except Exception as e:
+            print(f"Closing tab failed: {e}")
+
+    def _poll_tab(self, handle: str, tab: _TabQuery, take_screenshot: bool) -> ScrapeResult | None:
+        """
+        The tab's result once its answer has rendered (None while it is still
+        loading or generating); each tab has its own budget.
+        """
+        self._budget = tab.budget
+        try:
+            self._driver.switch_to.window(handle)
+            if tab.budget.phase == "navigation":
+                if (
+                    time.time() - tab.started < self.LOAD_SECONDS
+                    or self._driver.current_url == "about:blank"
+                    or self._driver.execute_script("return document.readyState") != "complete"
+                ):
+                    tab.budget.check()
+                    return None
+                tab.budget.start("response")
+
+            page_text = self._driver.page_source
+            self._check_captcha(page_text)
+            if tab.settled_at is None:
+                if "Thinking" in page_text:
+                    tab.budget.check()
+                    return None
+                tab.settled_at = time.time()
+            if time.time() - tab.settled_at < self.RENDER_SECONDS and not tab.budget.expired():
+                return None
+
+            print(f"Extracting in tab: {tab.query}")
+            return self._extract_result(tab.query, tab.timestamp, tab.events, take_screenshot)
+
+        except CaptchaError:
             if take_screenshot:
-                self._take_screenshot(f"google_ai_error")
-            return ScrapeResult(
-                query=query,
-                timestamp=timestamp,
-                response_text="",
-                sources=[],
-                source_count=0,
-                success=False,
-                error=str(e),
-            )
+                self._take_screenshot("google_ai_captcha")
+            raise
+
+        except Exception as e:
+            return self._failed_result(tab.query, tab.timestamp, e, take_screenshot)
+
+    def _search_url(self, query: str) -> str:
+        """AI Mode (udm=50) search URL of a query."""
+        return f"{self.base_url}?udm=50&q={quote_plus(query)}"
+
+    def _extract_result(self, query: str, timestamp: str, events: list[dict],
+                        take_screenshot: bool = False) -> ScrapeResult:
+        """Result of the answer shown in the current tab (events: the page's Network events)."""
+        self._budget.start("extraction")
+        if take_screenshot:
+            self._take_screenshot(f"google_ai_{query[:20]}")
+
+        answer = self._extract_from_payloads(query, events)
+
+        # Extract response text (from the DOM when no payload carried it)
+        if answer and answer.response_text:
+            response_text = answer.response_text
+        else:
+            print("Extracting response text...")
+            response_text = self._extract_response_text()
+
+        # Extract sources
+        if answer and answer.sources:
+            sources = answer.sources
+        else:
+            print("Extracting sources...")
+            sources = [asdict(s) for s in self._extract_sources()]
+
+        if take_screenshot:
+            self._take_screenshot(f"google_ai_final_{query[:20]}")
+
+        self._measure_memory()
+
+        from_network = [bool(answer and answer.response_text), bool(answer and answer.sources)]
+        extraction = "network" if all(from_network) else "mixed" if any(from_network) else "dom"
+
+        return ScrapeResult(
+            query=query,
+            timestamp=timestamp,
+            response_text=response_text,
+            sources=sources,
+            source_count=len(sources),
+            success=True,
+            network=self._network_stats(events),
+            extraction=extraction,
+            browser=self.browser_metrics(),
+            timings=self._budget.timings(),
+        )
+
+    def _failed_result(self, query: str, timestamp: str, error: Exception, take_screenshot: bool = False) -> ScrapeResult:
+        if take_screenshot:
+            self._take_screenshot("google_ai_error")
+        if self._driver:
+            self._measure_memory()
+        return ScrapeResult(
+            query=query,
+            timestamp=timestamp,
+            response_text="",
+            sources=[],
+            source_count=0,
+            success=False,
+            error=str(error),
+            browser=self.browser_metrics(),
+            timings=self._budget.timings(),
+            timeout_phase=error.phase if isinstance(error, ScrapeTimeoutError) else None,
+        )
 
     def save_result(self, result: ScrapeResult, output_dir: Path):
         """Save result to JSON file."""
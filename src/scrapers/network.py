@@ -0,0 +1,109 @@
+"""
+Request blocking and network accounting for scraper browsers.
+
+Google result pages load images, fonts, video thumbnails and tracking pings
+that extraction never uses. block_requests() tells Chrome, through the
+DevTools Protocol (Network.setBlockedURLs), to fail such requests before they
+are sent. Patterns use the wildcard syntax of Chrome's blocked URLs
+("*://*.doubleclick.net/*", "*://*/*.png*"); allow patterns win over block
+patterns, so what AI Mode needs to render is never blocked. Chrome versions
+that only know the plain URL list get the block patterns alone.
+
+network_stats() reads Chrome's performance log (the Network events of the
+last page) and counts the requests made, the bytes received and the requests
+blocked. Blocked requests are never sent, so the bytes they would have cost
+are estimated from typical sizes of their resource type (TYPICAL_BYTES).
+"""
+
+import json
+from dataclasses import dataclass, field
+
+# Typical transfer size in bytes of a resource of each type, for estimating what blocking saved
+TYPICAL_BYTES = {
+    "Image": 20_000,
+    "Font": 40_000,
+    "Media": 250_000,
+    "Script": 50_000,
+    "Stylesheet": 15_000,
+}
+DEFAULT_TYPICAL_BYTES = 2_000  # Pings, XHRs and other small requests
+
+# Chrome capability that records DevTools events for network_stats()
+LOGGING_PREFS = {"performance": "ALL"}
+
+
+@dataclass
+class NetworkStats:
+    """Network use of a page load."""
+    requests: int = 0  # Requests sent
+    bytes_loaded: int = 0  # Bytes received (encoded, as transferred)
+    blocked_requests: int = 0  # Requests blocked before being sent
+    bytes_saved: int = 0  # Estimated bytes the blocked requests would have cost
+    blocked_by_type: dict[str, int] = field(default_factory=dict)
+
+
+def block_requests(driver, blocked: list[str], allowed: list[str] = ()) -> bool:
+    """
+    Block requests matching the blocked patterns (unless an allowed one
+    matches) in the driver's current tab. Returns whether the allow-list is
+    honoured (False on Chrome versions that only take a plain block list).
+    """
+    driver.execute_cdp_cmd("Network.enable", {})
+    url_patterns = [{"urlPattern": url, "block": False} for url in allowed]
+    url_patterns += [{"urlPattern": url, "block": True} for url in blocked]
+    try:
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urlPatterns": url_patterns})
+        return True
+    except Exception:
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(blocked)})
+        return False
+
+
+def _logged_network_events(driver):
+    """(target id, event) of the Network events logged since the last read."""
+    for entry in driver.get_log("performance"):
+        try:
+            logged = json.loads(entry["message"])
+            message = logged["message"]
+        except (KeyError, TypeError, ValueError):
+            continue
+        if message.get("method", "").startswith("Network."):
+            yield logged.get("webview"), message
+
+
+def network_events(driver) -> list[dict]:
+    """Network events logged since the last call (reading the performance log drains it)."""
+    return [event for _, event in _logged_network_events(driver)]
+
+
+def network_events_by_target(driver) -> dict[str, list[dict]]:
+    """
+    Network events logged since the last call, by the tab they belong to
+    (its DevTools target id, which ChromeDriver uses as window handle).
+    """
+    events = {}
+    for target, event in _logged_network_events(driver):
+        events.setdefault(target, []).append(event)
+    return events
+
+
+def network_stats(events: list[dict]) -> NetworkStats:
+    """Requests, bytes and blocked requests of a list of DevTools Network events."""
+    stats = NetworkStats()
+    types = {}
+    for event in events:
+        method, params = event.get("method"), event.get("params", {})
+        if method == "Network.requestWillBeSent":
+            types[params.get("requestId")] = params.get("type", "Other")
+        elif method == "Network.loadingFinished":
+            stats.requests += 1
+            stats.bytes_loaded += int(params.get("encodedDataLength", 0))
+        elif method == "Network.loadingFailed":
+            if params.get("blockedReason"):
+                resource_type = params.get("type") or types.get(params.get("requestId"), "Other")
+                stats.blocked_requests += 1
+                stats.bytes_saved += TYPICAL_BYTES.get(resource_type, DEFAULT_TYPICAL_BYTES)
+                stats.blocked_by_type[resource_type] = stats.blocked_by_type.get(resource_type, 0) + 1
+            else:
+                stats.requests += 1
+    return stats
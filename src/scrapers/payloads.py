@@ -0,0 +1,252 @@
+"""
+AI Mode answers parsed from captured network payloads.
+
+Instead of querying the rendered page element by element, the scraper can
+capture the responses that carry the AI answer (the search document and the
+async fragments AI Mode streams into it, read through the DevTools Protocol)
+and parse them in one pass. parse_payloads() is a pure function of the
+captured Payloads, so recorded payloads (save_payloads / load_payloads, see
+scripts/parse_payloads.py and tests/fixtures/payloads) replay exactly as a
+live scrape parses them.
+
+Parsing follows the DOM extraction's rules: h2/h3 headings, list items longer
+than 30 characters and table rows make up the response text; links outside
+Google with a title of 10+ characters are the sources, with a date and
+description from their enclosing block.
+"""
+
+import json
+import re
+from dataclasses import asdict, dataclass
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urlparse
+
+# Responses worth parsing: Google's search document and the async fragments of AI Mode
+PAYLOAD_URLS = re.compile(r"^https://www\.google\.[a-z.]+/(search|async/)")
+PAYLOAD_TYPES = ("text/html", "application/json", "text/plain")
+
+# Prefix Google puts before JSON responses against cross-site script inclusion
+XSSI_PREFIX = ")]}'"
+
+SKIP_HEADINGS = ("sign in", "accessibility", "filters")
+SKIP_ITEMS = ("sign in", "accessibility")
+SKIP_URLS = ("google.com", "accounts.google", "support.google", "policies.google", "g.co/", "gstatic.com")
+SKIP_TITLES = ("sign in", "accessibility", "privacy", "terms", "google apps")
+DATE_PATTERN = re.compile(
+    r"\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4}|"
+    r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2},?\s+\d{4}",
+    re.IGNORECASE,
+)
+
+# Elements whose text is not part of the answer
+IGNORED_TAGS = {"script", "style", "noscript", "svg", "template"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+BLOCK_TAGS = {"div", "li", "p", "section", "article", "td", "th", "tr", "ul", "ol", "table", "h2", "h3"}
+
+
+@dataclass
+class Payload:
+    """A captured network response."""
+    url: str
+    mime_type: str
+    body: str
+
+
+@dataclass
+class ParsedAnswer:
+    """Response text and sources parsed from payloads."""
+    response_text: str
+    sources: list[dict]  # Source dicts (title, url, date, description, publisher)
+
+
+def is_answer_payload(url: str, mime_type: str) -> bool:
+    """Whether a response may carry the AI answer or its citations."""
+    return bool(PAYLOAD_URLS.match(url)) and mime_type.split(";")[0].strip() in PAYLOAD_TYPES
+
+
+class _Element:
+    def __init__(self, tag: str, attrs: dict):
+        self.tag = tag
+        self.attrs = attrs
+        self.text: list[str] = []
+
+
+class _AnswerParser(HTMLParser):
+    """Collects headings, list items, table rows and links of an HTML fragment."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack: list[_Element] = []
+        self.ignored = 0
+        self.parts: list[str] = []
+        self.table_rows: list[str] | None = None
+        self.row: list[str] | None = None
+        self.links: list[tuple[_Element, list[_Element]]] = []  # (link, its enclosing blocks, innermost first)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            return
+        if tag in IGNORED_TAGS:
+            self.ignored += 1
+        element = _Element(tag, dict(attrs))
+        self.stack.append(element)
+        if tag == "table":
+            self.table_rows = []
+        elif tag == "tr":
+            self.row = []
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS or not any(element.tag == tag for element in self.stack):
+            return
+        while self.stack:
+            element = self.stack.pop()
+            self._close(element)
+            if element.tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self.ignored:
+            return
+        for element in self.stack:
+            element.text.append(data)
+
+    def _close(self, element: _Element):
+        if element.tag in IGNORED_TAGS:
+            self.ignored -= 1
+            return
+        if self.ignored:
+            return
+        text = _clean(" ".join(element.text))
+        if element.tag in ("h2", "h3"):
+            if 3 < len(text) < 200 and not any(skip in text.lower() for skip in SKIP_HEADINGS):
+                self.parts.append(f"## {text}")
+        elif element.tag == "li":
+            if len(text) > 30 and not any(skip in text.lower() for skip in SKIP_ITEMS):
+                self.parts.append(f"- {text}")
+        elif element.tag in ("td", "th") and self.row is not None:
+            self.row.append(text)
+        elif element.tag == "tr" and self.table_rows is not None:
+            if self.row:
+                self.table_rows.append(" | ".join(self.row))
+            self.row = None
+        elif element.tag == "table":
+            if self.table_rows:
+                self.parts.append("\n".join(self.table_rows))
+            self.table_rows = None
+        elif element.tag == "a":
+            element.text = [text]
+            enclosing = [parent for parent in reversed(self.stack) if parent.tag in BLOCK_TAGS][:4]
+            self.links.append((element, enclosing))
+
+
+def _clean(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _publisher(url: str) -> str | None:
+    hostname = urlparse(url).hostname
+    return hostname.replace("www.", "").split(".")[0].capitalize() if hostname else None
+
+
+def _source(link: _Element, enclosing: list[_Element]) -> dict | None:
+    url = link.attrs.get("href") or ""
+    if not url.startswith("http") or any(skip in url for skip in SKIP_URLS):
+        return None
+    title = link.text[0] if link.text else ""
+    title = title or link.attrs.get("aria-label") or ""
+    if not title:
+        path = urlparse(url).path
+        title = path.split("/")[-1].replace("-", " ").replace("_", " ").title()
+    if len(title) < 10 or any(skip in title.lower() for skip in SKIP_TITLES):
+        return None
+
+    date = None
+    description = None
+    for parent in enclosing:
+        # Blocks are complete once the fragment is parsed, text after the link included
+        block = _clean(" ".join(parent.text))
+        if not date:
+            match = DATE_PATTERN.search(block)
+            if match:
+                date = match.group()
+        if not description and len(block) > len(title) + 40:
+            desc = block.replace(title, "")
+            if date:
+                desc = desc.replace(date, "")
+            desc = re.sub(r"Opens in new tab|About this result", "", desc, flags=re.IGNORECASE).strip()
+            if len(desc) > 20:
+                description = desc[:300]
+                break
+
+    clean_title = re.sub(r"\.?\s*Opens in new tab\.?", "", title, flags=re.IGNORECASE).strip()
+    if not clean_title:
+        return None
+    return {"title": clean_title, "url": url, "date": date, "description": description, "publisher": _publisher(url)}
+
+
+def _html_fragments(payload: Payload) -> list[str]:
+    """HTML in a payload: the body itself, or the HTML strings of a JSON (XSSI-prefixed) response."""
+    body = payload.body
+    if body.startswith(XSSI_PREFIX):
+        body = body[len(XSSI_PREFIX):].lstrip()
+    if body[:1] not in ("[", "{"):
+        return [payload.body]
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return [payload.body]
+    fragments = []
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, str):
+            if "<" in value and ">" in value:
+                fragments.append(value)
+        elif isinstance(value, dict):
+            stack.extend(reversed(list(value.values())))
+        elif isinstance(value, list):
+            stack.extend(reversed(value))
+    return fragments
+
+
+def parse_payloads(payloads: list[Payload]) -> ParsedAnswer:
+    """
+    The AI answer in captured payloads: the answer parts (headings, list
+    items, tables) of all fragments in capture order, so an answer streamed
+    over several async fragments is joined, and the sources of all of them.
+    A part or URL seen before (the same answer in the document and in a
+    fragment) is not repeated. Empty when no payload carries the answer.
+    """
+    parts = []
+    seen_parts = set()
+    sources = []
+    seen_urls = set()
+    for payload in payloads:
+        for fragment in _html_fragments(payload):
+            parser = _AnswerParser()
+            parser.feed(fragment)
+            parser.close()
+            for part in parser.parts:
+                if part not in seen_parts:
+                    seen_parts.add(part)
+                    parts.append(part)
+            for link, enclosing in parser.links:
+                source = _source(link, enclosing)
+                if source and source["url"] not in seen_urls:
+                    seen_urls.add(source["url"])
+                    sources.append(source)
+    return ParsedAnswer("\n\n".join(parts), sources)
+
+
+def save_payloads(payloads: list[Payload], path: Path) -> Path:
+    """Record captured payloads as a JSON fixture."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([asdict(payload) for payload in payloads], f, ensure_ascii=False, indent=2)
+    return path
+
+
+def load_payloads(path: Path) -> list[Payload]:
+    with open(path, encoding="utf-8") as f:
+        return [Payload(**payload) for payload in json.load(f)]
@@ -29,3 +29,12 @@ class ResponseExtractionError(ScraperException):
     """Raised when unable to extract response from page."""
 
     pass
+
+
+class ScrapeTimeoutError(ScraperException):
+    """Raised when a scrape phase runs past its time budget or the scrape's deadline."""
+
+    def __init__(self, phase: str, budget_seconds: float):
+        super().__init__(f"{phase} phase ran out of its {budget_seconds:.1f}s budget")
+        self.phase = phase
+        self.budget_seconds = budget_seconds
@@ -0,0 +1,34 @@
+"""Memory use of process trees (needs the optional psutil package)."""
+
+
+try:
+    import psutil
+except ImportError:  # Optional: without it, memory is not measured
+    psutil = None
+
+
+def process_tree_rss(pids: list[int]) -> int | None:
+    """
+    Resident memory in bytes of the processes and all their descendants
+    (each process counted once), or None when psutil is not installed.
+    """
+    if psutil is None:
+        return None
+
+    seen = set()
+    total = 0
+    for pid in pids:
+        try:
+            root = psutil.Process(pid)
+            processes = [root] + root.children(recursive=True)
+        except psutil.Error:
+            continue
+        for process in processes:
+            if process.pid in seen:
+                continue
+            seen.add(process.pid)
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                continue  # Exited meanwhile
+    return total
@@ -0,0 +1,53 @@
+"""Fixtures for the backend tests: a fresh SQLite database per test."""
+
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# database.py creates its engine on import, so the URL must be set before any backend import
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(tempfile.mkdtemp(prefix='aiseo-tests-')) / 'aiseo.db'}"
+
+from sqlmodel import Session, select  # noqa: E402
+
+from database import create_db_and_tables, engine  # noqa: E402
+from models import DEFAULT_PROJECT_ID, Brand, PromptBrandMention  # noqa: E402
+from projects import ensure_default_project  # noqa: E402
+
+
+@pytest.fixture
+def session():
+    engine.dispose()
+    Path(engine.url.database).unlink(missing_ok=True)
+    create_db_and_tables()
+    with Session(engine) as session:
+        ensure_default_project(session)
+        yield session
+    engine.dispose()
+
+
+@pytest.fixture
+def add_brand(session):
+    """Add a brand to the default project"""
+    def add(brand_id: str, name: str, variations: str | None = None) -> Brand:
+        brand = Brand(id=brand_id, project_id=DEFAULT_PROJECT_ID, name=name, color="#000000",
+                      variations=variations)
+        session.add(brand)
+        session.commit()
+        return brand
+
+    return add
+
+
+@pytest.fixture
+def mentions(session):
+    """{brand id: position (None when not mentioned)} of a prompt, as stored now"""
+    def read(prompt_id: int) -> dict[str, int | None]:
+        rows = session.exec(
+            select(PromptBrandMention.brand_id, PromptBrandMention.mentioned, PromptBrandMention.position)
+            .where(PromptBrandMention.prompt_id == prompt_id)
+        ).all()
+        return {brand_id: position if mentioned else None for brand_id, mentioned, position in rows}
+
+    return read
@@ -0,0 +1,100 @@
+"""Phase budgets and the deadline of a scrape (src/scrapers/budget.py)."""
+
+import time
+
+import pytest
+
+from scrapers.budget import ScrapeBudget
+from utils.exceptions import ScrapeTimeoutError
+
+SHARES = {"navigation": 0.3, "response": 0.75, "extraction": 0.3, "expansion": 0.25}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    monkeypatch.setattr(time, "sleep", clock.advance)
+    return clock
+
+
+def test_phase_gets_its_share_of_the_total(clock):
+    budget = ScrapeBudget(10, SHARES).start("navigation")
+    assert budget.remaining() == pytest.approx(3.0)
+    assert budget.remaining(at_most=1) == 1
+
+    clock.advance(2)
+    assert budget.remaining() == pytest.approx(1.0)
+    budget.check()
+
+    clock.advance(1.5)
+    assert budget.expired()
+    with pytest.raises(ScrapeTimeoutError) as error:
+        budget.check()
+    assert (error.value.phase, error.value.budget_seconds) == ("navigation", pytest.approx(3.0))
+
+
+def test_phase_never_runs_past_the_deadline(clock):
+    budget = ScrapeBudget(10, SHARES).start("navigation")
+    clock.advance(2)
+    budget.start("response")  # 7.5s share, 8s left
+    clock.advance(7)
+
+    budget.start("extraction")  # 3s share, 1s left
+
+    assert budget.remaining() == pytest.approx(1.0)
+
+
+def test_reentered_phase_continues_with_what_is_left_of_its_share(clock):
+    budget = ScrapeBudget(10, SHARES).start("extraction")
+    clock.advance(1)
+    budget.start("expansion")
+    clock.advance(1)
+
+    budget.start("extraction")
+
+    assert budget.remaining() == pytest.approx(2.0)
+
+
+def test_sleep_stops_at_the_end_of_the_phase(clock):
+    budget = ScrapeBudget(10, SHARES).start("navigation")
+
+    budget.sleep(5)
+
+    assert clock.now == pytest.approx(1003.0)
+    assert budget.expired()
+
+
+def test_extend_moves_the_deadline_back(clock):
+    budget = ScrapeBudget(10, SHARES).start("navigation")
+    clock.advance(3)
+    assert budget.expired()
+
+    budget.extend(30)  # e.g. time spent solving a CAPTCHA
+
+    assert budget.remaining() == pytest.approx(30.0)
+    assert budget.deadline == pytest.approx(1040.0)
+
+
+def test_timings_add_up_per_phase(clock):
+    budget = ScrapeBudget(10, SHARES).start("navigation")
+    clock.advance(1)
+    budget.start("extraction")
+    clock.advance(0.5)
+    budget.start("expansion")
+    clock.advance(0.25)
+    budget.start("extraction")
+    clock.advance(0.25)
+
+    assert budget.timings() == {"navigation": 1.0, "extraction": 0.75, "expansion": 0.25, "total": 2.0}
@@ -0,0 +1,140 @@
+"""Durable job queue: keys, leases, retries and requeues (backend/jobs.py)."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import select
+
+import jobs
+from jobs import (
+    DONE,
+    FAILED,
+    MAINTENANCE_KINDS,
+    QUEUED,
+    RUNNING,
+    RequeueError,
+    claim,
+    enqueue,
+    fail,
+    renew_lease,
+    requeue_expired,
+    run_job,
+)
+from models import Job
+
+WORKER = "test-worker"
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    """Replace the registered handlers for the test"""
+    registered = {}
+    monkeypatch.setattr(jobs, "HANDLERS", registered)
+    return registered
+
+
+def test_unfinished_job_with_the_same_key_is_reused(session):
+    first = enqueue(session, "scrape", {"query": "best crm"}, key="scrape:default:2025-01:1:best crm")
+    again = enqueue(session, "scrape", {"query": "best crm"}, key="scrape:default:2025-01:1:best crm")
+    assert again.id == first.id
+
+    first.status = DONE
+    session.add(first)
+    session.commit()
+    assert enqueue(session, "scrape", key="scrape:default:2025-01:1:best crm").id != first.id
+
+
+def test_claim_takes_the_highest_priority_runnable_job(session):
+    routine = enqueue(session, "scrape", priority=0)
+    enqueue(session, "rematch", priority=10, run_after=datetime.utcnow() + timedelta(hours=1))
+    urgent = enqueue(session, "rescan_brand", priority=10)
+
+    job = claim(session, WORKER)
+
+    assert job.id == urgent.id
+    assert (job.status, job.attempts, job.lease_owner) == (RUNNING, 1, WORKER)
+    assert job.lease_expires_at > datetime.utcnow()
+    assert claim(session, WORKER).id == routine.id
+    assert claim(session, WORKER) is None  # The re-match is not due yet
+
+
+def test_api_workers_leave_scrapes_and_resyncs_to_worker_processes(session):
+    enqueue(session, "scrape")
+    enqueue(session, "resync_mentions", {"project_id": "default"})
+
+    assert claim(session, WORKER, MAINTENANCE_KINDS) is None
+
+
+def test_failed_job_is_retried_with_backoff_until_out_of_attempts(session):
+    enqueue(session, "scrape", max_attempts=2)
+
+    job = claim(session, WORKER)
+    fail(session, job, WORKER, "boom")
+    session.refresh(job)
+    assert job.status == QUEUED
+    assert job.run_after >= datetime.utcnow() + timedelta(seconds=jobs.RETRY_DELAY_SECONDS - 5)
+    assert claim(session, WORKER) is None
+
+    job.run_after = datetime.utcnow()
+    session.add(job)
+    session.commit()
+    job = claim(session, WORKER)
+    assert job.attempts == 2
+    fail(session, job, WORKER, "boom again")
+    session.refresh(job)
+    assert (job.status, job.error) == (FAILED, "boom again")
+
+
+def test_lease_is_only_renewed_by_its_owner(session):
+    enqueue(session, "scrape")
+    job = claim(session, WORKER)
+
+    assert renew_lease(session, job.id, WORKER)
+    assert not renew_lease(session, job.id, "another-worker")
+
+
+def test_expired_leases_are_requeued_or_failed(session):
+    enqueue(session, "scrape", max_attempts=1)
+    enqueue(session, "scrape", max_attempts=3)
+    out_of_attempts, retried = claim(session, WORKER), claim(session, WORKER)
+    for job in (out_of_attempts, retried):
+        job.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+        session.add(job)
+    session.commit()
+
+    assert requeue_expired(session) == 1
+
+    session.refresh(out_of_attempts)
+    session.refresh(retried)
+    assert (out_of_attempts.status, out_of_attempts.error) == (FAILED, "Lease expired")
+    assert (retried.status, retried.lease_owner) == (QUEUED, None)
+
+
+def test_requeued_job_does_not_use_up_an_attempt(session, handlers):
+    def captcha(query):
+        raise RequeueError(f"CAPTCHA for {query}")
+
+    handlers["scrape"] = captcha
+    enqueue(session, "scrape", {"query": "best crm"})
+    job = claim(session, WORKER)
+
+    assert not run_job(session, job, WORKER)
+
+    session.refresh(job)
+    assert (job.status, job.attempts, job.error) == (QUEUED, 0, "CAPTCHA for best crm")
+    assert claim(session, WORKER).id == job.id
+
+
+def test_run_job_records_success_and_unknown_kinds(session, handlers):
+    calls = []
+    handlers["rematch"] = lambda rematch_id: calls.append(rematch_id)
+    enqueue(session, "rematch", {"rematch_id": 7})
+    enqueue(session, "missing")
+
+    assert run_job(session, claim(session, WORKER), WORKER)
+    unknown = claim(session, WORKER)
+    assert not run_job(session, unknown, WORKER)
+
+    assert calls == [7]
+    statuses = {job.kind: job.status for job in session.exec(select(Job)).all()}
+    assert statuses == {"rematch": DONE, "missing": FAILED}
@@ -0,0 +1,125 @@
+"""Brand rescans and whole-project re-syncs of stored mentions (backend/mention_sync.py)."""
+
+from sqlalchemy import update
+from sqlmodel import func, select
+
+import mention_sync
+from ingest import ingest_prompt
+from mention_sync import pending_ranges, project_matcher, rescan_brand, resync_mentions
+from models import DEFAULT_PROJECT_ID, MentionSyncCheckpoint, Prompt, PromptBrandMention
+
+ANSWER = """Top website builders:
+1. Squarespace has the best templates.
+2. Shopify is built for online stores.
+3. Wix is the easiest to start with."""
+
+SUPPLIED = [
+    {"brand_id": "shopify", "mentioned": True, "position": 1},
+    {"brand_id": "wix", "mentioned": True, "position": 2},
+]
+
+# Positions parsing would not give
+STALE = [
+    {"brand_id": "shopify", "mentioned": True, "position": 5},
+    {"brand_id": "wix", "mentioned": True, "position": 6},
+]
+
+
+def matcher_versions(session) -> dict[int, str | None]:
+    return dict(session.exec(select(Prompt.id, Prompt.matcher_version)).all())
+
+
+def test_added_brand_reranks_parsed_prompts_only(session, add_brand, mentions):
+    add_brand("shopify", "Shopify")
+    add_brand("wix", "Wix")
+    parsed = ingest_prompt(session, "best website builder", ANSWER, [])
+    supplied = ingest_prompt(session, "best website builder", ANSWER, [], brand_mentions=SUPPLIED)
+    unrelated = ingest_prompt(session, "best crm", "HubSpot is a CRM.", [])
+    assert mentions(parsed.id) == {"shopify": 1, "wix": 2}
+
+    previous_version = project_matcher(session, DEFAULT_PROJECT_ID).version
+    add_brand("squarespace", "Squarespace")
+    assert rescan_brand(session, DEFAULT_PROJECT_ID, "squarespace", previous_version) == 2
+
+    assert mentions(parsed.id) == {"squarespace": 1, "shopify": 2, "wix": 3}
+    # Supplied positions are kept; only the new brand's own row is parsed in
+    assert mentions(supplied.id) == {"shopify": 1, "wix": 2, "squarespace": 1}
+    assert mentions(unrelated.id) == {"shopify": None, "wix": None, "squarespace": None}
+
+    current = project_matcher(session, DEFAULT_PROJECT_ID).version
+    assert matcher_versions(session) == {parsed.id: current, supplied.id: None, unrelated.id: current}
+
+
+def test_removed_brand_leaves_supplied_ranks(session, add_brand, mentions):
+    add_brand("shopify", "Shopify")
+    add_brand("wix", "Wix")
+    add_brand("squarespace", "Squarespace")
+    parsed = ingest_prompt(session, "best website builder", ANSWER, [])
+    supplied = ingest_prompt(session, "best website builder", ANSWER, [], brand_mentions=SUPPLIED)
+
+    version = project_matcher(session, DEFAULT_PROJECT_ID).version
+    rescan_brand(session, DEFAULT_PROJECT_ID, "squarespace", version, removed=True)
+
+    assert mentions(parsed.id) == {"shopify": 1, "wix": 2}
+    assert mentions(supplied.id) == {"shopify": 1, "wix": 2}
+
+
+def test_rescan_keeps_mentions_of_prompts_without_text(session, add_brand, mentions):
+    add_brand("shopify", "Shopify")
+    add_brand("wix", "Wix")
+    empty = ingest_prompt(session, "best website builder", None, [])
+    session.exec(
+        update(PromptBrandMention)
+        .where(PromptBrandMention.prompt_id == empty.id, PromptBrandMention.brand_id == "wix")
+        .values(mentioned=True, position=1)
+    )
+    session.commit()
+
+    rescan_brand(session, DEFAULT_PROJECT_ID, "wix", project_matcher(session, DEFAULT_PROJECT_ID).version)
+    resync_mentions(DEFAULT_PROJECT_ID, workers=1, progress=lambda _: None)
+
+    assert mentions(empty.id) == {"shopify": None, "wix": 1}
+
+
+def test_stale_resync_skips_supplied_prompts(session, add_brand):
+    add_brand("shopify", "Shopify")
+    ingest_prompt(session, "best website builder", ANSWER, [], brand_mentions=SUPPLIED)
+    add_brand("squarespace", "Squarespace")
+    version = project_matcher(session, DEFAULT_PROJECT_ID).version
+
+    assert pending_ranges(session, DEFAULT_PROJECT_ID, version, only_stale=True) == []
+    assert pending_ranges(session, DEFAULT_PROJECT_ID, version) == [0]
+
+
+def test_interrupted_resync_resumes_from_checkpoints(session, add_brand, mentions, monkeypatch):
+    monkeypatch.setattr(mention_sync, "CHUNK_SIZE", 1)  # One prompt per range
+    add_brand("shopify", "Shopify")
+    add_brand("wix", "Wix")
+    first = ingest_prompt(session, "best website builder", ANSWER, [], brand_mentions=STALE)
+    second = ingest_prompt(session, "best website builder", ANSWER, [], brand_mentions=STALE)
+    version = project_matcher(session, DEFAULT_PROJECT_ID).version
+    # The interrupted run finished the first prompt's range
+    session.add(MentionSyncCheckpoint(project_id=DEFAULT_PROJECT_ID, range_start=first.id, version=version))
+    session.commit()
+
+    assert resync_mentions(DEFAULT_PROJECT_ID, workers=1, progress=lambda _: None) == (1, 2)
+
+    assert mentions(first.id) == {"shopify": 5, "wix": 6}  # Not parsed again
+    assert mentions(second.id) == {"shopify": 1, "wix": 2}
+    assert matcher_versions(session) == {first.id: None, second.id: version}
+    assert session.exec(select(func.count()).select_from(MentionSyncCheckpoint)).one() == 0
+
+
+def test_restarted_resync_parses_every_range(session, add_brand, mentions, monkeypatch):
+    monkeypatch.setattr(mention_sync, "CHUNK_SIZE", 1)
+    add_brand("shopify", "Shopify")
+    first = ingest_prompt(session, "best website builder", ANSWER, [], brand_mentions=STALE[:1])
+    ingest_prompt(session, "best website builder", ANSWER, [], brand_mentions=STALE[:1])
+    version = project_matcher(session, DEFAULT_PROJECT_ID).version
+    session.add(MentionSyncCheckpoint(project_id=DEFAULT_PROJECT_ID, range_start=first.id, version=version))
+    session.commit()
+
+    parsed, _ = resync_mentions(DEFAULT_PROJECT_ID, workers=1, restart=True, progress=lambda _: None)
+
+    assert parsed == 2
+    assert mentions(first.id) == {"shopify": 1}
@@ -0,0 +1,90 @@
+"""Parsing of AI Mode answers from recorded network payloads (src/scrapers/payloads.py)."""
+
+from pathlib import Path
+
+from scrapers.payloads import (
+    Payload,
+    is_answer_payload,
+    load_payloads,
+    parse_payloads,
+    save_payloads,
+)
+
+FIXTURES = Path(__file__).parent / "fixtures" / "payloads"
+
+ZAPIER_URL = "https://www.zapier.com/blog/best-crm-app/"
+PCMAG_URL = "https://www.pcmag.com/picks/the-best-crm-software"
+
+
+def test_recorded_answer():
+    """Search document plus an XSSI-prefixed JSON fragment: text of both, each source once."""
+    answer = parse_payloads(load_payloads(FIXTURES / "best_crm_for_small_business.json"))
+
+    assert answer.response_text == "\n\n".join([
+        "## Best CRM software for small businesses",
+        "- HubSpot CRM is free to start and covers contacts, deals and email tracking for small teams.",
+        "- Zoho CRM is the most affordable paid option, with automation included from the Standard plan.",
+        "## How they compare",
+        "- Pipedrive is built around a visual sales pipeline and suits teams that sell in stages.",
+        "CRM | Free plan\nHubSpot | Yes\nPipedrive | No",
+    ])
+    assert answer.sources == [
+        {
+            "title": "The 10 best CRM software for small businesses in 2025",
+            "url": ZAPIER_URL,
+            "date": "12 Mar 2025",
+            "description": "A hands-on comparison of CRM apps by price, ease of use and the integrations small teams rely on.",
+            "publisher": "Zapier",
+        },
+        {
+            "title": "The Best CRM Software for 2025",
+            "url": PCMAG_URL,
+            "date": "Jan 5, 2025",
+            "description": "PCMag tested more than a dozen CRM platforms on contact management, reporting and pricing.",
+            "publisher": "Pcmag",
+        },
+    ]
+
+
+def test_xssi_json_fragment_alone():
+    payloads = load_payloads(FIXTURES / "best_crm_for_small_business.json")
+    fragment = [payload for payload in payloads if payload.mime_type.startswith("application/json")]
+
+    answer = parse_payloads(fragment)
+
+    assert answer.response_text.startswith("## Best CRM software for small businesses\n\n## How they compare")
+    assert "Pipedrive | No" in answer.response_text
+    assert [source["url"] for source in answer.sources] == [ZAPIER_URL, PCMAG_URL]  # Google's own link skipped
+
+
+def test_answer_streamed_over_fragments_is_joined():
+    first = "<h2>Choosing a CRM</h2><ul><li>Start with the free plan of HubSpot to learn what your team needs.</li></ul>"
+    second = "<ul><li>Move to Pipedrive or Zoho once deals need a pipeline and automation rules.</li></ul>"
+    payloads = [
+        Payload("https://www.google.com/async/folae?a=1", "text/html", first),
+        Payload("https://www.google.com/async/folae?a=2", "text/html", second),
+        Payload("https://www.google.com/async/folae?a=3", "text/html", first),  # Re-sent fragment
+    ]
+
+    answer = parse_payloads(payloads)
+
+    assert answer.response_text == "\n\n".join([
+        "## Choosing a CRM",
+        "- Start with the free plan of HubSpot to learn what your team needs.",
+        "- Move to Pipedrive or Zoho once deals need a pipeline and automation rules.",
+    ])
+
+
+def test_answer_payload_filter():
+    assert is_answer_payload("https://www.google.com/search?q=crm", "text/html; charset=UTF-8")
+    assert is_answer_payload("https://www.google.co.uk/async/folae?x=1", "application/json")
+    assert not is_answer_payload("https://www.gstatic.com/og/_/js/k=og.qtm.en_US.js", "text/javascript")
+    assert not is_answer_payload("https://www.google.com/search?q=crm", "image/png")
+
+
+def test_saved_payloads_load_back(tmp_path):
+    payloads = load_payloads(FIXTURES / "best_crm_for_small_business.json")
+
+    path = save_payloads(payloads, tmp_path / "recorded.json")
+
+    assert load_payloads(path) == payloads
@@ -0,0 +1,107 @@
+"""Background re-matching of an edited brand and the swap of its staged mentions (backend/rematch.py)."""
+
+from sqlmodel import func, select
+
+from ingest import ingest_prompt
+from mention_sync import project_matcher
+from models import DEFAULT_PROJECT_ID, Brand, BrandRematch, Prompt, StagedMention
+from rematch import DONE, RUNNING, SUPERSEDED, run_rematch, start_rematch
+
+ANSWER = """Top ecommerce platforms:
+1. Shopify Plus suits large stores.
+2. Wix is the easiest to start with.
+3. BigCommerce has no transaction fees."""
+
+SUPPLIED = [
+    {"brand_id": "shopify", "mentioned": False},
+    {"brand_id": "wix", "mentioned": True, "position": 4},
+]
+
+
+def edit(session, brand_id: str, variations: str) -> BrandRematch:
+    """Edit a brand's variations the way PATCH /api/brands/{id} does and run the re-match"""
+    brand = session.get(Brand, (brand_id, DEFAULT_PROJECT_ID))
+    rematch = start_rematch(session, brand, brand.name, variations)
+    run_rematch(rematch.id)
+    session.expire_all()
+    return session.get(BrandRematch, rematch.id)
+
+
+def test_edit_rematches_parsed_prompts(session, add_brand, mentions):
+    add_brand("shopify", "Shopify", "Shopify Basic")
+    add_brand("wix", "Wix")
+    prompt = ingest_prompt(session, "best ecommerce platform", ANSWER, [])
+    assert mentions(prompt.id) == {"shopify": None, "wix": 1}
+
+    rematch = edit(session, "shopify", "Shopify Plus")
+
+    assert (rematch.status, rematch.total, rematch.parsed) == (DONE, 1, 1)
+    assert mentions(prompt.id) == {"shopify": 1, "wix": 2}
+    assert session.get(Brand, ("shopify", DEFAULT_PROJECT_ID)).variations == "Shopify Plus"
+    assert session.get(Prompt, prompt.id).matcher_version == project_matcher(session, DEFAULT_PROJECT_ID).version
+    assert session.exec(select(func.count()).select_from(StagedMention)).one() == 0
+
+
+def test_edit_rematches_only_the_brand_row_of_supplied_prompts(session, add_brand, mentions):
+    add_brand("shopify", "Shopify", "Shopify Basic")
+    add_brand("wix", "Wix")
+    prompt = ingest_prompt(session, "best ecommerce platform", ANSWER, [], brand_mentions=SUPPLIED)
+
+    rematch = edit(session, "shopify", "Shopify Plus")
+
+    assert (rematch.status, rematch.total) == (DONE, 1)
+    # The edited brand is found with its new variation; the supplied rank of the others stays
+    assert mentions(prompt.id) == {"shopify": 1, "wix": 4}
+    assert session.get(Prompt, prompt.id).matcher_version is None
+
+    edit(session, "shopify", "Shopify Basic")
+    assert mentions(prompt.id) == {"shopify": None, "wix": 4}
+
+
+def test_runs_ingested_during_the_rematch_are_swapped_too(session, add_brand, mentions):
+    add_brand("shopify", "Shopify", "Shopify Basic")
+    add_brand("wix", "Wix")
+    brand = session.get(Brand, ("shopify", DEFAULT_PROJECT_ID))
+    rematch = start_rematch(session, brand, brand.name, "Shopify Plus")
+    late = ingest_prompt(session, "best ecommerce platform", ANSWER, [])
+    late_supplied = ingest_prompt(session, "best ecommerce platform", ANSWER, [], brand_mentions=SUPPLIED)
+
+    run_rematch(rematch.id)
+
+    assert mentions(late.id) == {"shopify": 1, "wix": 2}
+    assert mentions(late_supplied.id) == {"shopify": 1, "wix": 4}
+
+
+def test_newer_edit_supersedes_a_running_rematch(session, add_brand, mentions):
+    add_brand("shopify", "Shopify", "Shopify Basic")
+    add_brand("wix", "Wix")
+    prompt = ingest_prompt(session, "best ecommerce platform", ANSWER, [])
+    brand = session.get(Brand, ("shopify", DEFAULT_PROJECT_ID))
+    first = start_rematch(session, brand, brand.name, "Shopify Plus")
+    second = start_rematch(session, brand, brand.name, "Shopify Enterprise")
+
+    run_rematch(first.id)
+    assert mentions(prompt.id) == {"shopify": None, "wix": 1}
+    run_rematch(second.id)
+
+    session.expire_all()
+    assert session.get(BrandRematch, first.id).status == SUPERSEDED
+    assert session.get(BrandRematch, second.id).status == DONE
+    assert session.get(Brand, ("shopify", DEFAULT_PROJECT_ID)).variations == "Shopify Enterprise"
+
+
+def test_rematch_starts_over_when_other_brands_change(session, add_brand, mentions):
+    add_brand("shopify", "Shopify", "Shopify Basic")
+    add_brand("wix", "Wix")
+    prompt = ingest_prompt(session, "best ecommerce platform", ANSWER, [])
+    brand = session.get(Brand, ("shopify", DEFAULT_PROJECT_ID))
+    rematch = start_rematch(session, brand, brand.name, "Shopify Plus")
+    assert rematch.status == RUNNING
+    add_brand("bigcommerce", "BigCommerce")  # Changes the project's matcher while the re-match waits
+
+    run_rematch(rematch.id)
+
+    session.expire_all()
+    assert session.get(BrandRematch, rematch.id).status == DONE
+    # Staged rows were parsed again with the new brand set
+    assert mentions(prompt.id) == {"shopify": 1, "wix": 2, "bigcommerce": 3}
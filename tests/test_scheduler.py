@@ -0,0 +1,79 @@
+"""Spreading recurring scrapes over a month without duplicates (backend/scheduler.py)."""
+
+from datetime import datetime, timedelta
+
+from sqlmodel import select
+
+from ingest import ingest_prompt
+from jobs import CANCELLED, QUEUED, enqueue
+from models import DEFAULT_PROJECT_ID, Job
+from scheduler import schedule_scrapes, scrape_job_key, spread_runs
+
+START = datetime(2025, 3, 1)
+END = datetime(2025, 4, 1)
+
+
+def scheduled(session) -> dict[str, str]:
+    """Status of each scrape job by key"""
+    return {job.key: job.status for job in session.exec(select(Job).where(Job.kind == "scrape")).all()}
+
+
+def track(session, *queries: str) -> None:
+    for query in queries:
+        ingest_prompt(session, query, None, [], brand_mentions=[], scraped_at=datetime(2025, 2, 10))
+
+
+def test_runs_are_spread_round_robin_at_least_min_delay_apart():
+    runs = spread_runs({"a": [1, 2], "b": [1]}, START, END, min_delay=60, max_delay=120, seed=1)
+
+    assert [(run.query, run.run) for run in runs] == [("a", 1), ("b", 1), ("a", 2)]
+    times = [run.run_after for run in runs]
+    assert times == sorted(times)
+    assert all(later - earlier >= timedelta(seconds=60) for earlier, later in zip(times, times[1:]))
+    assert START <= times[0] and times[-1] < END
+
+
+def test_runs_that_do_not_fit_the_window_are_left_out():
+    runs = spread_runs({"a": [1, 2, 3]}, START, START + timedelta(seconds=100), min_delay=40, max_delay=60)
+
+    assert [run.run for run in runs] == [1, 2]
+
+
+def test_missing_runs_are_queued_once(session):
+    track(session, "best crm", "best erp")
+
+    first = schedule_scrapes(session, DEFAULT_PROJECT_ID, 2, 30, 60, month="2025-03", now=START)
+    again = schedule_scrapes(session, DEFAULT_PROJECT_ID, 2, 30, 60, month="2025-03", now=START)
+
+    assert len(first.queued) == 4
+    assert (len(again.queued), again.moved, again.cancelled) == (0, 4, 0)
+    assert scheduled(session) == {
+        scrape_job_key(DEFAULT_PROJECT_ID, "2025-03", run, query): QUEUED
+        for query in ("best crm", "best erp")
+        for run in (1, 2)
+    }
+
+
+def test_ingested_runs_cancel_surplus_scrapes(session):
+    track(session, "best crm")
+    schedule_scrapes(session, DEFAULT_PROJECT_ID, 2, 30, 60, month="2025-03", now=START)
+    ingest_prompt(session, "best crm", None, [], brand_mentions=[], scraped_at=datetime(2025, 3, 2))
+
+    result = schedule_scrapes(session, DEFAULT_PROJECT_ID, 2, 30, 60, month="2025-03", now=datetime(2025, 3, 3))
+
+    assert (len(result.queued), result.cancelled) == (0, 1)
+    assert scheduled(session) == {
+        scrape_job_key(DEFAULT_PROJECT_ID, "2025-03", 1, "best crm"): QUEUED,
+        scrape_job_key(DEFAULT_PROJECT_ID, "2025-03", 2, "best crm"): CANCELLED,
+    }
+
+
+def test_scrapes_queued_under_the_same_key_are_counted(session):
+    track(session, "best crm")
+    # An ad-hoc scrape of the query's first run (scripts/enqueue_scrapes.py)
+    enqueue(session, "scrape", {"query": "best crm"}, key=scrape_job_key(DEFAULT_PROJECT_ID, "2025-03", 1, "best crm"))
+
+    result = schedule_scrapes(session, DEFAULT_PROJECT_ID, 2, 30, 60, month="2025-03", now=START)
+
+    assert [job.key for job in result.queued] == [scrape_job_key(DEFAULT_PROJECT_ID, "2025-03", 2, "best crm")]
+    assert result.moved == 1